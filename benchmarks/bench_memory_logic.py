@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+遊戲邏輯每幀耗時的基準測試
+以兩張一回合的翻牌畫面模擬一局遊戲中段（所有卡牌已記住、三分之一已配對），
+量測 24 格與 100 格遊戲板上每幀翻開或蓋回一張卡牌時 update_game_state、
+frame_deltas + apply_card_deltas 增量更新與 get_suggestions（有直接配對建議）的耗時，
+以及與上一幀相同、沒有任何變化的幀以增量更新的耗時。
+
+用法: python -m benchmarks.bench_memory_logic
+"""
+
+import sys
+import time
+import numpy as np
+from logic.memory_logic import MemoryLogic
+
+BOARD_SIZES = [24, 100]
+FRAMES = 2000
+
+
+def make_frames(num_cells: int, rng: np.random.Generator):
+    """建立遊戲中段的回合畫面（每回合翻開兩張再蓋回）與之後輪流送出的兩幀
+
+    前三分之一的符號一回合翻開同一組而配對，其餘卡牌兩張不同符號一回合翻開後蓋回，
+    因此所有卡牌都已記住但大部分尚未配對；之後的兩幀為翻開一張記得另一半的卡牌與蓋回。
+    """
+    symbols = rng.permutation(np.repeat(np.arange(num_cells // 2), 2))
+    columns = 6 if num_cells == 24 else 10
+    paired = [i for i in range(num_cells) if symbols[i] < num_cells // 6]
+
+    def frame(*flipped: int) -> dict:
+        up = set(paired) | set(flipped)
+        return {'cards': {f'card_{i}': {
+            'position': (0, 0, 40, 40),
+            'flipped': i in up,
+            'symbol': f"symbol_{symbols[i]}" if i in up else None,
+            'confidence': 0.95,
+            'grid_pos': (i % columns, i // columns)
+        } for i in range(num_cells)}}
+
+    turns = [frame()]
+    # 配對的符號：同一回合翻開同一組（之後保持翻開）
+    for symbol in range(num_cells // 6):
+        first, second = np.flatnonzero(symbols == symbol)
+        turns.append(frame(first, second))
+    # 其餘卡牌依符號排序後前後兩半一一配成回合，兩張的符號必定不同
+    unmatched = sorted((i for i in range(num_cells) if i not in paired), key=lambda i: symbols[i])
+    half = len(unmatched) // 2
+    for first, second in zip(unmatched[:half], unmatched[half:]):
+        turns.append(frame(first, second))
+        turns.append(frame())
+
+    reveal = frame(unmatched[0])
+    return turns, reveal, frame()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'格數':>6} {'update µs/幀':>14} {'delta µs/幀':>14} {'不變 µs/幀':>14} {'suggest µs/幀':>14}")
+    for num_cells in BOARD_SIZES:
+        turns, reveal, idle = make_frames(num_cells, rng)
+        logic = MemoryLogic(total_groups=num_cells // 2)
+        incremental = MemoryLogic(total_groups=num_cells // 2)
+        for detected in turns:
+            logic.update_game_state(detected)
+            incremental.apply_card_deltas(incremental.frame_deltas(detected))
+        assert not logic.game_complete and len(logic.memory_map) == num_cells
+
+        # 每幀翻開一張記得另一半的卡牌或蓋回
+        start = time.perf_counter()
+        for i in range(FRAMES):
+            logic.update_game_state(reveal if i % 2 == 0 else idle)
+        update_us = (time.perf_counter() - start) / FRAMES * 1e6
+
+        start = time.perf_counter()
+        for i in range(FRAMES):
+            incremental.apply_card_deltas(incremental.frame_deltas(reveal if i % 2 == 0 else idle))
+        delta_us = (time.perf_counter() - start) / FRAMES * 1e6
+
+        # 沒有變化的幀（相機每秒數十幀，大部分的幀都與上一幀相同）
+        incremental.apply_card_deltas(incremental.frame_deltas(reveal))
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            incremental.apply_card_deltas(incremental.frame_deltas(reveal))
+        unchanged_us = (time.perf_counter() - start) / FRAMES * 1e6
+
+        logic.update_game_state(reveal)
+        assert logic.get_suggestions(reveal)[0]['type'] == 'direct_match'
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            logic.get_suggestions(reveal)
+        suggest_us = (time.perf_counter() - start) / FRAMES * 1e6
+
+        print(f"{num_cells:>6} {update_us:>14.1f} {delta_us:>14.1f} {unchanged_us:>14.1f} {suggest_us:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
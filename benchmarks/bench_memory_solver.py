@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+最佳翻牌求解器決策延遲的基準測試
+量測不同遊戲板大小下，冷快取（第一次查詢需計算整個期望值表）
+與熱快取（跨幀重複使用）的單次決策耗時，以及冷快取是否超過每幀時間預算。
+
+用法: python -m benchmarks.bench_memory_solver
+"""
+
+import sys
+import time
+import numpy as np
+from logic.memory_solver import MemorySolver, BoardKnowledge
+
+BOARD_SIZES = [24, 48, 100, 200, 400]
+DECISIONS = 2000
+TIME_BUDGET = 0.005
+
+
+def make_board(num_cells: int, rng: np.random.Generator) -> BoardKnowledge:
+    """建立遊戲初期的盤面：配對了少數符號，部分卡牌只記住一張"""
+    symbols = rng.permutation(np.repeat(np.arange(num_cells // 2), 2))
+    cells = [f'card_{i}' for i in range(num_cells)]
+    matched = [cells[i] for i in range(num_cells) if symbols[i] < num_cells // 12]
+    symbol_cards = {}
+    for i in rng.permutation(num_cells)[:num_cells // 4]:
+        if symbols[i] >= num_cells // 12:
+            symbol_cards.setdefault(f'symbol_{symbols[i]}', []).append(cells[i])
+    # 只保留單張，讓決策落在翻開未見過卡牌的分支
+    symbol_cards = {symbol: cards[:1] for symbol, cards in symbol_cards.items()}
+    return BoardKnowledge.from_memory(cells, symbol_cards, matched)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'格數':>6} {'冷快取 ms':>10} {'熱快取 µs':>10} {'預算內':>6} {'期望回合':>8}")
+    for num_cells in BOARD_SIZES:
+        board = make_board(num_cells, rng)
+
+        solver = MemorySolver(time_budget=0)
+        start = time.perf_counter()
+        decision = solver.decide(board)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(DECISIONS):
+            solver.decide(board)
+        warm_us = (time.perf_counter() - start) / DECISIONS * 1e6
+
+        within_budget = MemorySolver(time_budget=TIME_BUDGET).decide(board) is not None
+        print(f"{num_cells:>6} {cold_ms:>10.2f} {warm_us:>10.1f} {'是' if within_budget else '否':>6} "
+              f"{decision['expected_turns']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+識別時間對模板庫大小的基準測試
+比較暴力匹配與串接識別（縮圖預篩 + 完整相關）在 12 到 1000 個符號下的耗時與準確率
+
+用法: python -m benchmarks.bench_recognition_scaling
+"""
+
+import sys
+import time
+import tempfile
+import cv2
+import numpy as np
+from recognition.symbol_recognizer import SymbolRecognizer
+from recognition.template_bank import TemplateBank
+
+BANK_SIZES = [12, 50, 100, 250, 500, 1000]
+CARDS_PER_FRAME = 24
+REPEATS = 5
+
+
+def make_symbols(count: int, rng: np.random.Generator) -> dict:
+    """產生類似卡牌符號的平滑隨機圖像"""
+    symbols = {}
+    for i in range(count):
+        coarse = rng.integers(0, 255, (8, 8, 3), dtype=np.uint8)
+        symbols[f"symbol_{i}"] = cv2.resize(coarse, (64, 64), interpolation=cv2.INTER_CUBIC)
+    return symbols
+
+
+def make_crops(symbols: dict, rng: np.random.Generator):
+    """從符號中抽出一幀的卡牌，加入雜訊與輕微錯位模擬攝像頭畫面"""
+    names = list(symbols.keys())
+    picked = rng.choice(len(names), CARDS_PER_FRAME)
+    crops = []
+    for idx in picked:
+        image = cv2.resize(symbols[names[idx]], (70, 70))
+        dx, dy = rng.integers(0, 4, 2)
+        crop = image[dy:dy + 66, dx:dx + 66].astype(np.int16)
+        crop += rng.integers(-12, 13, crop.shape, dtype=np.int16)
+        crops.append(np.clip(crop, 0, 255).astype(np.uint8))
+    return [names[idx] for idx in picked], crops
+
+
+def run(recognizer: SymbolRecognizer, labels, crops):
+    """返回 (每張卡牌微秒數, 準確率)"""
+    recognizer.recognize_batch(crops)  # 預熱
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        results = recognizer.recognize_batch(crops)
+    elapsed = (time.perf_counter() - start) / (REPEATS * len(crops))
+    correct = sum(result.symbol == label for result, label in zip(results, labels))
+    return elapsed * 1e6, correct / len(labels)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as template_dir:
+        recognizer = SymbolRecognizer(template_dir=template_dir, cache_size=0)
+
+        print(f"{'模板數':>8} {'暴力 µs/張':>12} {'準確率':>8} {'串接 µs/張':>12} {'準確率':>8}")
+        for size in BANK_SIZES:
+            symbols = make_symbols(size, rng)
+            recognizer.set_template_bank(TemplateBank.from_images(symbols))
+            labels, crops = make_crops(symbols, rng)
+
+            recognizer.cascade_min_templates = sys.maxsize
+            brute_us, brute_acc = run(recognizer, labels, crops)
+            recognizer.cascade_min_templates = 0
+            cascade_us, cascade_acc = run(recognizer, labels, crops)
+
+            print(f"{size:>8} {brute_us:>12.1f} {brute_acc:>8.0%} {cascade_us:>12.1f} {cascade_acc:>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+多局遊戲狀態儲存的基準測試
+量測同時進行 1k / 10k / 100k 局時，一次批次更新與批次建議的耗時與記憶體用量，
+並與逐局呼叫 MemoryLogic 比較。
+
+用法: python -m benchmarks.bench_session_store
+"""
+
+import sys
+import time
+import numpy as np
+from logic.memory_logic import MemoryLogic
+from logic.session_store import SessionStore, CELL_DOWN
+
+SESSION_COUNTS = [1000, 10000, 100000]
+NUM_CELLS = 24
+ROUNDS = 5
+
+
+def random_observations(num_sessions: int, rng: np.random.Generator) -> np.ndarray:
+    """每局翻開一到兩張卡牌"""
+    observed = np.full((num_sessions, NUM_CELLS), CELL_DOWN, dtype=np.int16)
+    rows = np.arange(num_sessions)
+    observed[rows, rng.integers(0, NUM_CELLS, num_sessions)] = rng.integers(0, NUM_CELLS // 2, num_sessions)
+    second = rng.random(num_sessions) < 0.5
+    observed[rows[second], rng.integers(0, NUM_CELLS, second.sum())] = rng.integers(0, NUM_CELLS // 2, second.sum())
+    return observed
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'局數':>8} {'更新 ms':>9} {'建議 ms':>9} {'µs/局':>7} {'位元組/局':>9}")
+    for num_sessions in SESSION_COUNTS:
+        store = SessionStore(NUM_CELLS, capacity=num_sessions)
+        for game in range(num_sessions):
+            store.open(game)
+        rows = np.arange(num_sessions)
+
+        update_time = suggest_time = 0.0
+        for round_index in range(ROUNDS):
+            observed = random_observations(num_sessions, rng)
+            start = time.perf_counter()
+            store.update(rows, observed, now=float(round_index))
+            update_time += time.perf_counter() - start
+            start = time.perf_counter()
+            store.suggest(rows)
+            suggest_time += time.perf_counter() - start
+
+        update_ms = update_time / ROUNDS * 1000
+        suggest_ms = suggest_time / ROUNDS * 1000
+        per_session = (update_ms + suggest_ms) * 1000 / num_sessions
+        print(f"{num_sessions:>8} {update_ms:>9.2f} {suggest_ms:>9.2f} {per_session:>7.2f} "
+              f"{store.bytes_per_session:>9}")
+
+    # 對照：逐局呼叫 MemoryLogic
+    logic = MemoryLogic()
+    frame = {'cards': {f'card_{i}': {'position': (0, 0, 40, 40), 'flipped': i < 2,
+                                     'symbol': f'symbol_{i}' if i < 2 else None, 'confidence': 0.9,
+                                     'grid_pos': (i % 6, i // 6)} for i in range(NUM_CELLS)}}
+    start = time.perf_counter()
+    for _ in range(1000):
+        logic.update_game_state(frame)
+        logic.get_suggestions(frame)
+    print(f"MemoryLogic 逐局: {(time.perf_counter() - start) * 1000:.2f} µs/局")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+匹配設定掃描工具
+以每一種解析度、通道與內縮裁切組合識別一組已標記的卡牌圖像，
+列出準確率與每張卡牌的耗時，並標出帕累托最佳（沒有其他設定更快又更準）的設定。
+
+標記資料集為一個目錄，每個子目錄名稱即符號名稱，裡面放該符號的卡牌截圖；
+未指定時以模板加上錯位與雜訊合成測試圖像。
+
+用法: python -m benchmarks.sweep_matching_modes [模板目錄] [標記資料目錄]
+"""
+
+import sys
+import time
+import itertools
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Tuple
+from recognition.symbol_recognizer import SymbolRecognizer
+from recognition.template_bank import MATCH_CHANNELS
+
+RESOLUTIONS = [64, 48, 32, 24, 16]
+INSETS = [0.0, 0.1, 0.2]
+SYNTHETIC_PER_SYMBOL = 10
+REPEATS = 5
+
+
+def load_labelled_crops(crop_dir: str) -> Tuple[List[str], List[np.ndarray]]:
+    """讀取 子目錄=符號名稱 結構的標記卡牌圖像"""
+    labels, crops = [], []
+    for symbol_dir in sorted(Path(crop_dir).iterdir()):
+        if not symbol_dir.is_dir():
+            continue
+        for file in sorted(symbol_dir.glob('*.png')):
+            crop = cv2.imread(str(file))
+            if crop is not None:
+                labels.append(symbol_dir.name)
+                crops.append(crop)
+    return labels, crops
+
+
+def synthesize_crops(templates: Dict[str, np.ndarray],
+                     rng: np.random.Generator) -> Tuple[List[str], List[np.ndarray]]:
+    """由模板合成帶有錯位、亮度變化與雜訊的卡牌圖像"""
+    labels, crops = [], []
+    for name, template in templates.items():
+        image = cv2.resize(template, (72, 72))
+        for _ in range(SYNTHETIC_PER_SYMBOL):
+            dx, dy = rng.integers(0, 7, 2)
+            crop = image[dy:dy + 66, dx:dx + 66].astype(np.float32)
+            crop = crop * rng.uniform(0.8, 1.2) + rng.normal(0, 8, crop.shape)
+            labels.append(name)
+            crops.append(np.clip(crop, 0, 255).astype(np.uint8))
+    return labels, crops
+
+
+def measure(recognizer: SymbolRecognizer, labels: List[str],
+            crops: List[np.ndarray]) -> Tuple[float, float]:
+    """返回 (準確率, 每張卡牌微秒數)"""
+    results = recognizer.recognize_batch(crops)  # 預熱並建立此設定的模板向量
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        recognizer.recognize_batch(crops)
+    elapsed = (time.perf_counter() - start) / (REPEATS * len(crops))
+    correct = sum(result.symbol == label for result, label in zip(results, labels))
+    return correct / len(labels), elapsed * 1e6
+
+
+def pareto_front(rows: List[Dict]) -> set:
+    """找出沒有被其他設定同時在準確率與速度上勝過的設定"""
+    front = set()
+    for i, row in enumerate(rows):
+        dominated = any(
+            other['accuracy'] >= row['accuracy'] and other['us_per_crop'] <= row['us_per_crop'] and
+            (other['accuracy'] > row['accuracy'] or other['us_per_crop'] < row['us_per_crop'])
+            for other in rows
+        )
+        if not dominated:
+            front.add(i)
+    return front
+
+
+def main():
+    template_dir = sys.argv[1] if len(sys.argv) > 1 else "templates"
+    recognizer = SymbolRecognizer(template_dir=template_dir, cache_size=0)
+    if not recognizer.templates:
+        print(f"✗ 模板目錄 {template_dir} 中沒有模板")
+        return 1
+
+    if len(sys.argv) > 2:
+        labels, crops = load_labelled_crops(sys.argv[2])
+    else:
+        labels, crops = synthesize_crops(recognizer.templates, np.random.default_rng(0))
+    if not crops:
+        print("✗ 沒有可用的標記卡牌圖像")
+        return 1
+    print(f"以 {len(crops)} 張卡牌、{len(recognizer.templates)} 個模板掃描匹配設定\n")
+
+    rows = []
+    for resolution, channels, inset in itertools.product(RESOLUTIONS, MATCH_CHANNELS, INSETS):
+        recognizer.set_matching_mode(resolution, channels, inset)
+        accuracy, us_per_crop = measure(recognizer, labels, crops)
+        rows.append({'mode': str(recognizer.matching_mode), 'accuracy': accuracy,
+                     'us_per_crop': us_per_crop})
+
+    front = pareto_front(rows)
+    print(f"{'設定':<24} {'準確率':>8} {'µs/張':>10}")
+    for i in sorted(range(len(rows)), key=lambda i: rows[i]['us_per_crop']):
+        row = rows[i]
+        marker = ' ★' if i in front else ''
+        print(f"{row['mode']:<24} {row['accuracy']:>8.1%} {row['us_per_crop']:>10.1f}{marker}")
+    print("\n★ 帕累托最佳設定")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class CardBelief:
+    """卡牌符號的機率信念 - 每張卡牌對每個符號的機率
+
+    每次觀察以識別分數換算為對數概似（分數 / temperature）累加到該卡牌，
+    再以 Sinkhorn 交替正規化讓每張卡牌的機率總和為 1、每個符號的期望張數為 copies_per_symbol
+    （符號數乘以張數多於卡牌數時，改為不超過 copies_per_symbol）。
+    單次識別錯誤只是一筆證據，之後的觀察與「每個符號只有兩張」的限制都能修正它；
+    因此 certain_symbols 另外要求多次觀察都以該符號為最高分，單次高分的誤認不會讓卡牌停止識別。
+    """
+
+    def __init__(self, symbols: Sequence[str], cells: Iterable[str] = (), copies_per_symbol: int = 2,
+                 temperature: float = 0.05, iterations: int = 200):
+        self.symbols: List[str] = list(symbols)
+        self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.copies_per_symbol = copies_per_symbol
+        self.temperature = temperature
+        self.iterations = iterations
+        self.cells: List[str] = []
+        self._cell_index: Dict[str, int] = {}
+        self.log_evidence = np.zeros((0, len(self.symbols)))
+        self.fixed = np.full(0, -1, dtype=np.intp)  # 已確定（已配對）的符號，-1 表示未確定
+        self.agreements = np.zeros((0, len(self.symbols)), dtype=np.int64)  # 各符號為最高分的觀察次數
+        self.probabilities = np.zeros((0, len(self.symbols)))
+        self.add_cells(cells)
+
+    def add_cells(self, cells: Iterable[str]):
+        """加入新的卡牌（沒有任何觀察時各符號機率相同）"""
+        new = [cell for cell in dict.fromkeys(cells) if cell not in self._cell_index]
+        if not new:
+            return
+        for cell in new:
+            self._cell_index[cell] = len(self.cells)
+            self.cells.append(cell)
+        self.log_evidence = np.vstack([self.log_evidence, np.zeros((len(new), len(self.symbols)))])
+        self.fixed = np.concatenate([self.fixed, np.full(len(new), -1, dtype=np.intp)])
+        self.agreements = np.vstack([self.agreements, np.zeros((len(new), len(self.symbols)), dtype=np.int64)])
+        self._normalize()
+
+    def reset(self):
+        """清除所有觀察（保留卡牌與符號）"""
+        self.log_evidence[:] = 0.0
+        self.fixed[:] = -1
+        self.agreements[:] = 0
+        self._normalize()
+
+    def snapshot(self) -> Dict:
+        """累積的證據（可 JSON 序列化），由 from_snapshot 還原"""
+        return {
+            'symbols': self.symbols,
+            'cells': self.cells,
+            'copies': self.copies_per_symbol,
+            'evidence': np.round(self.log_evidence, 3).tolist(),
+            'fixed': self.fixed.tolist(),
+            'agreements': self.agreements.tolist()
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict) -> 'CardBelief':
+        """由快照還原信念"""
+        belief = cls(snapshot['symbols'], copies_per_symbol=snapshot['copies'])
+        belief.add_cells(snapshot['cells'])
+        if snapshot['cells']:
+            belief.log_evidence = np.array(snapshot['evidence'], dtype=float).reshape(len(belief.cells), -1)
+            belief.fixed = np.array(snapshot['fixed'], dtype=np.intp)
+            if snapshot.get('agreements') is not None:
+                belief.agreements = np.array(snapshot['agreements'], dtype=np.int64).reshape(belief.log_evidence.shape)
+        belief._normalize()
+        return belief
+
+    # ----- 觀察 -----
+
+    @staticmethod
+    def observation_scores(card_info: Dict) -> Optional[Dict[str, float]]:
+        """由 detect_cards 的卡牌資訊取出各符號的識別分數，沒有可用的識別結果時返回 None
+
+        有 RecognitionResult 時使用前 k 名的分數，其餘符號視為與最低的候選同分；
+        只有符號與信心度時，其餘符號視為 0 分。
+        """
+        recognition = card_info.get('recognition')
+        if recognition is not None and recognition.top_k:
+            return dict(recognition.top_k)
+        if card_info.get('symbol') and card_info.get('confidence') is not None:
+            return {card_info['symbol']: float(card_info['confidence'])}
+        return None
+
+    def observe(self, observations: Dict[str, Dict[str, float]], fixed: Optional[Dict[str, str]] = None):
+        """套用一幀的所有觀察，整個信念矩陣只重新正規化一次
+
+        observations 為 卡牌 -> {符號: 識別分數}；fixed 為確定的卡牌符號（例如已配對的卡牌）。
+        不在符號表中的符號會被忽略。
+        """
+        fixed = fixed or {}
+        self.add_cells(list(observations) + list(fixed))
+        if not self.symbols:
+            return  # 沒有符號表（例如沒有模板時的分群模式），沒有可累積的機率
+        if observations:
+            rows = np.array([self._cell_index[cell] for cell in observations])
+            scores = np.empty((len(rows), len(self.symbols)))
+            for i, symbol_scores in enumerate(observations.values()):
+                known = {self._symbol_index[symbol]: score for symbol, score in symbol_scores.items()
+                         if symbol in self._symbol_index}
+                scores[i] = min(known.values()) if len(known) > 1 else min(list(known.values()) + [0.0])
+                for column, score in known.items():
+                    scores[i, column] = score
+            # 同一卡牌在同一幀只算一次觀察
+            self.log_evidence[rows] += scores / self.temperature
+            self.agreements[rows, scores.argmax(axis=1)] += 1
+            self.log_evidence[rows] -= self.log_evidence[rows].max(axis=1, keepdims=True)
+        for cell, symbol in fixed.items():
+            if symbol in self._symbol_index:
+                self.fixed[self._cell_index[cell]] = self._symbol_index[symbol]
+        self._normalize()
+
+    def _normalize(self):
+        """Sinkhorn 交替正規化：每列總和為 1，每欄總和為（或不超過）每個符號的張數"""
+        if not len(self.cells) or not len(self.symbols):
+            self.probabilities = np.zeros((len(self.cells), len(self.symbols)))
+            return
+        weights = np.exp(self.log_evidence - self.log_evidence.max(axis=1, keepdims=True))
+        fixed_rows = np.flatnonzero(self.fixed >= 0)
+        weights[fixed_rows] = 0.0
+        weights[fixed_rows, self.fixed[fixed_rows]] = 1.0
+
+        exact = len(self.cells) == self.copies_per_symbol * len(self.symbols)
+        for _ in range(self.iterations):
+            weights /= weights.sum(axis=1, keepdims=True)
+            column_sums = weights.sum(axis=0)
+            scale = self.copies_per_symbol / np.maximum(column_sums, 1e-12)
+            if not exact:
+                scale = np.minimum(scale, 1.0)
+            previous = weights
+            weights = weights * scale
+            if np.abs(weights - previous).max() < 1e-6:
+                break
+        weights /= weights.sum(axis=1, keepdims=True)
+        self.probabilities = weights
+
+    # ----- 查詢 -----
+
+    def distribution(self, cell: str) -> Dict[str, float]:
+        """一張卡牌對每個符號的機率"""
+        row = self.probabilities[self._cell_index[cell]]
+        return {symbol: float(p) for symbol, p in zip(self.symbols, row)}
+
+    def probability(self, cell: str, symbol: str) -> float:
+        """一張卡牌是某個符號的機率（未知的卡牌或符號為 0）"""
+        if cell not in self._cell_index or symbol not in self._symbol_index:
+            return 0.0
+        return float(self.probabilities[self._cell_index[cell], self._symbol_index[symbol]])
+
+    def most_likely(self, cell: str) -> Tuple[Optional[str], float]:
+        """一張卡牌最可能的符號與其機率"""
+        if cell not in self._cell_index or not self.symbols:
+            return None, 0.0
+        row = self.probabilities[self._cell_index[cell]]
+        column = int(row.argmax())
+        return self.symbols[column], float(row[column])
+
+    def most_likely_symbols(self, cells: Iterable[str]) -> Dict[str, str]:
+        """多張卡牌最可能的符號（一次取出）"""
+        cells = [cell for cell in cells if cell in self._cell_index]
+        if not cells or not self.symbols:
+            return {}
+        columns = self.probabilities[[self._cell_index[cell] for cell in cells]].argmax(axis=1)
+        return {cell: self.symbols[column] for cell, column in zip(cells, columns)}
+
+    def certain_symbols(self, threshold: float = 0.99, min_observations: int = 2) -> Dict[str, str]:
+        """機率超過門檻、且至少 min_observations 次觀察都以該符號為最高分（或已確定）而不需要再識別的卡牌符號"""
+        if not len(self.cells) or not self.symbols:
+            return {}
+        rows = np.arange(len(self.cells))
+        best = self.probabilities.argmax(axis=1)
+        confident = self.probabilities[rows, best] >= threshold
+        confident &= (self.agreements[rows, best] >= min_observations) | (self.fixed == best)
+        return {self.cells[row]: self.symbols[best[row]] for row in np.flatnonzero(confident)}
+
+    def match_probability(self, cell_a: str, cell_b: str) -> float:
+        """兩張卡牌符號相同的機率（以兩張卡牌的分佈相互獨立近似）"""
+        if cell_a not in self._cell_index or cell_b not in self._cell_index:
+            return 0.0
+        row_a = self.probabilities[self._cell_index[cell_a]]
+        row_b = self.probabilities[self._cell_index[cell_b]]
+        return float(min(max(row_a @ row_b, 0.0), 1.0))
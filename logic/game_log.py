@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+遊戲事件紀錄
+以只能附加的 JSONL 記錄一局遊戲的事件（翻開、蓋回、配對、回合結束），
+可由事件快速重建任一時間點的 MemoryLogic 狀態，或將整局遊戲重新餵給新版邏輯。
+每局遊戲的第一個事件記錄組大小的設定，重播時以相同的設定重建；
+同一個檔案接續多局遊戲時，重播到每個 setup 事件即重新開始一局。
+
+用法: python -m logic.game_log <事件紀錄.jsonl> [...]
+"""
+
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+EVENT_SETUP = 'setup'        # 遊戲設定：group_size, group_sizes, total_groups
+EVENT_REVEAL = 'reveal'      # 卡牌翻開：card, symbol, pos, conf
+EVENT_HIDE = 'hide'          # 卡牌蓋回：card
+EVENT_MATCH = 'match'        # 完成配對：cards, symbol
+EVENT_TURN_END = 'turn_end'  # 回合結束：turn, matched
+EVENT_TYPES = (EVENT_SETUP, EVENT_REVEAL, EVENT_HIDE, EVENT_MATCH, EVENT_TURN_END)
+
+
+class GameEventLog:
+    """遊戲事件紀錄 - 只能附加的事件序列，指定檔案時同時逐行寫入 JSONL"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.events: List[Dict] = []
+        self._file = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, event_type: str, timestamp: float, **fields) -> Dict:
+        """附加一個事件"""
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"未知的事件類型: {event_type}")
+        event = {'type': event_type, 't': timestamp, **fields}
+        self.events.append(event)
+        if self._file is not None:
+            self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+        return event
+
+    def flush(self):
+        """將已寫入的事件送出到磁碟"""
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """關閉紀錄檔案"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def load(path: str) -> List[Dict]:
+        """讀取 JSONL 事件紀錄（忽略寫到一半的最後一行）"""
+        events = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break  # 程式中斷時最後一行可能不完整
+        return events
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+
+def replay_events(events: List[Dict], logic=None, until: Optional[float] = None):
+    """依序套用事件重建遊戲邏輯狀態，until 為時間戳記時只套用到該時間點（含）為止
+
+    直接套用記錄的結果，不需重新識別或比對畫面，速度遠快於實際遊戲時間。
+    未指定 logic 時建立新的 MemoryLogic，由紀錄中的 setup 事件設定組大小（三張一組的遊戲也能正確重播）。
+    紀錄包含多局遊戲時，每個 setup 事件都會重置狀態，返回的是最後一局（或 until 當時那一局）的狀態。
+    """
+    if logic is None:
+        from logic.memory_logic import MemoryLogic
+        logic = MemoryLogic()
+    for event in events:
+        if until is not None and event['t'] > until:
+            break
+        logic.apply_event(event)
+    return logic
+
+
+def frames_from_events(events: List[Dict]) -> Iterator[Dict]:
+    """由事件重建每個時間點的畫面資料（與 CardDetector.detect_cards 相同格式）
+
+    用於將記錄的遊戲重新餵給新版 update_game_state，讓新邏輯自行判斷配對；
+    同一時間戳記的事件視為同一幀，每一幀附帶 'time' 以重現原本的時間。
+    """
+    cards: Dict[str, Dict] = {}
+    index = 0
+    while index < len(events):
+        timestamp = events[index]['t']
+        changed = False
+        while index < len(events) and events[index]['t'] == timestamp:
+            event = events[index]
+            if event['type'] == EVENT_REVEAL:
+                cards[event['card']] = {
+                    'position': None,
+                    'flipped': True,
+                    'symbol': event.get('symbol'),
+                    'confidence': event.get('conf'),
+                    'grid_pos': tuple(event['pos']) if event.get('pos') is not None else None
+                }
+                changed = True
+            elif event['type'] == EVENT_HIDE and event['card'] in cards:
+                cards[event['card']] = dict(cards[event['card']], flipped=False, symbol=None, confidence=0.0)
+                changed = True
+            index += 1
+        if changed:
+            yield {'cards': {card_id: dict(info) for card_id, info in cards.items()}, 'time': timestamp}
+
+
+def main():
+    """命令列工具：重播事件紀錄並顯示最終狀態與重播速度"""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+
+    for path in sys.argv[1:]:
+        events = GameEventLog.load(path)
+        start = time.perf_counter()
+        logic = replay_events(events)
+        elapsed = time.perf_counter() - start
+
+        duration = events[-1]['t'] - events[0]['t'] if events else 0.0
+        turns = sum(1 for event in events if event['type'] == EVENT_TURN_END)
+        print(f"✓ {path}: {len(events)} 個事件，{turns} 回合，配對 {len(logic.matched_pairs)} 組，"
+              f"遊戲時間 {duration:.1f} 秒，重播 {elapsed * 1000:.2f} 毫秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+翻翻樂遊戲模擬器
+以 NumPy 陣列同時模擬大量遊戲（每一列為一局），比較不同翻牌策略完成遊戲所需的回合數。
+可設定遊戲板大小、記憶錯誤模型（遺忘、記錯符號）與策略；多個批次可分配到行程池平行執行。
+
+用法: python -m logic.game_simulator [--policy heuristic|random|optimal] [--games N]
+                                     [--pairs N] [--forget R] [--confusion R] [--workers N]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import Pool
+from typing import Callable, Dict, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class MemoryModel:
+    """記憶錯誤模型
+
+    forget_rate：每回合開始時，每張記住的卡牌被忘記的機率。
+    confusion_rate：翻開卡牌時記成錯誤符號的機率（也可視為識別錯誤）。
+    """
+    forget_rate: float = 0.0
+    confusion_rate: float = 0.0
+
+    def __post_init__(self):
+        for name in ('forget_rate', 'confusion_rate'):
+            value = getattr(self, name)
+            if not 0.0 <= value <= 1.0:
+                raise ValueError(f"{name} 必須介於 0 與 1 之間: {value}")
+
+
+PERFECT_MEMORY = MemoryModel()
+
+
+class SimulationState:
+    """一批進行中的遊戲
+
+    symbols：每一格的真實符號 (局數, 格數)
+    matched：已配對的格子
+    memory：記憶中每一格的符號，-1 表示不知道
+    """
+
+    def __init__(self, symbols: np.ndarray, rng: np.random.Generator):
+        self.symbols = symbols
+        self.num_symbols = int(symbols.max()) + 1
+        self.matched = np.zeros(symbols.shape, dtype=bool)
+        self.memory = np.full(symbols.shape, -1, dtype=symbols.dtype)
+        self.rng = rng
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def keep(self, rows: np.ndarray):
+        """只保留指定的遊戲（移除已完成的遊戲）"""
+        self.symbols = self.symbols[rows]
+        self.matched = self.matched[rows]
+        self.memory = self.memory[rows]
+
+    def unknown(self) -> np.ndarray:
+        """尚未配對且不記得符號的格子"""
+        return (self.memory < 0) & ~self.matched
+
+    def remembered(self) -> np.ndarray:
+        """尚未配對且記得符號的格子"""
+        return (self.memory >= 0) & ~self.matched
+
+
+# 策略：policy(state, first) 返回每一局要翻開的格子；first 為 None 時是回合的第一張，
+# 否則為每一局已翻開的第一張格子，返回的格子必須是未配對且不同於 first 的格子
+Policy = Callable[[SimulationState, Optional[np.ndarray]], np.ndarray]
+
+
+def pick_random(state: SimulationState, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """在每一局的候選格子中隨機選一格，返回 (格子, 是否有候選)"""
+    weights = state.rng.random(mask.shape)
+    weights[~mask] = -1.0
+    return weights.argmax(axis=1), mask.any(axis=1)
+
+
+def _exclude(mask: np.ndarray, first: Optional[np.ndarray]) -> np.ndarray:
+    """從候選中排除已翻開的第一張"""
+    if first is not None:
+        mask[np.arange(len(mask)), first] = False
+    return mask
+
+
+def _fallback(state: SimulationState, cells: np.ndarray, found: np.ndarray,
+              candidates: np.ndarray, first: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """找不到指定格子的遊戲改從候選中隨機選"""
+    if found.all():
+        return cells, found
+    fallback, has = pick_random(state, _exclude(candidates, first))
+    return np.where(found, cells, fallback), found | has
+
+
+def known_pair_cells(state: SimulationState) -> Tuple[np.ndarray, np.ndarray]:
+    """每一局記憶中兩張位置都知道的符號，返回其中一張的格子與是否存在"""
+    remembered = state.remembered()
+    rows = np.broadcast_to(np.arange(len(state))[:, None], remembered.shape)
+    keys = rows[remembered] * state.num_symbols + state.memory[remembered]
+    counts = np.bincount(keys, minlength=len(state) * state.num_symbols).reshape(len(state), -1)
+    paired = counts >= 2
+    symbol = paired.argmax(axis=1)
+    cells = ((state.memory == symbol[:, None]) & remembered).argmax(axis=1)
+    return cells, paired.any(axis=1)
+
+
+def partner_cells(state: SimulationState, first: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """記憶中與第一張符號相同的另一張格子"""
+    symbol = state.memory[np.arange(len(state)), first]
+    mask = _exclude((state.memory == symbol[:, None]) & state.remembered(), first)
+    return mask.argmax(axis=1), mask.any(axis=1) & (symbol >= 0)
+
+
+def random_policy(state: SimulationState, first: Optional[np.ndarray]) -> np.ndarray:
+    """隨機翻開任一張未配對的卡牌（不使用記憶）"""
+    cells, _ = pick_random(state, _exclude(~state.matched, first))
+    return cells
+
+
+def heuristic_policy(state: SimulationState, first: Optional[np.ndarray]) -> np.ndarray:
+    """依照 MemoryLogic.get_suggestions 的建議翻牌，沒有建議時隨機翻開未配對的卡牌
+
+    第一張：記得的配對；第二張：第一張記得的另一半，否則翻開未見過的卡牌。
+    """
+    if first is None:
+        cells, found = known_pair_cells(state)
+        cells, _ = _fallback(state, cells, found, ~state.matched, None)
+        return cells
+    cells, found = partner_cells(state, first)
+    cells, found = _fallback(state, cells, found, state.unknown(), first)
+    cells, _ = _fallback(state, cells, found, ~state.matched, first)
+    return cells
+
+
+def optimal_policy(state: SimulationState, first: Optional[np.ndarray]) -> np.ndarray:
+    """貪婪策略：先翻記得的配對，否則一律翻開未見過的卡牌，第二張與 heuristic_policy 相同
+
+    MemorySolver 的動態規劃另外考慮第二張故意翻開已知的卡牌，但在一般大小的遊戲板上
+    從不選擇這個動作（見測試），因此此貪婪策略即為最佳策略，平均回合數等於求解器的期望值。
+    """
+    if first is None:
+        cells, found = known_pair_cells(state)
+        cells, found = _fallback(state, cells, found, state.unknown(), None)
+        cells, _ = _fallback(state, cells, found, ~state.matched, None)
+        return cells
+    return heuristic_policy(state, first)
+
+
+POLICIES: Dict[str, Policy] = {
+    'heuristic': heuristic_policy,
+    'random': random_policy,
+    'optimal': optimal_policy,
+}
+
+
+def _reveal(state: SimulationState, cells: np.ndarray, memory_model: MemoryModel):
+    """翻開格子並記住符號，依記憶模型可能記成錯誤的符號"""
+    rows = np.arange(len(state))
+    seen = state.symbols[rows, cells]
+    if memory_model.confusion_rate:
+        confused = state.rng.random(len(state)) < memory_model.confusion_rate
+        wrong = state.rng.integers(0, state.num_symbols, len(state), dtype=seen.dtype)
+        seen = np.where(confused, wrong, seen)
+    state.memory[rows, cells] = seen
+
+
+def simulate_games(policy: Union[str, Policy] = 'optimal', num_games: int = 10000, num_pairs: int = 12,
+                   memory_model: MemoryModel = PERFECT_MEMORY, seed: Optional[int] = None,
+                   max_turns: int = 100000) -> np.ndarray:
+    """同時模擬一批遊戲，返回每一局完成所需的回合數"""
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    rng = np.random.default_rng(seed)
+    dtype = np.int16 if num_pairs < 2 ** 15 else np.int32
+    symbols = np.repeat(np.arange(num_pairs, dtype=dtype), 2)
+    state = SimulationState(rng.permuted(np.tile(symbols, (num_games, 1)), axis=1), rng)
+
+    turns = np.zeros(num_games, dtype=np.int32)
+    active = np.arange(num_games)
+    rows = np.arange(num_games)
+    for turn in range(1, max_turns + 1):
+        if memory_model.forget_rate:
+            state.memory[state.rng.random(state.memory.shape) < memory_model.forget_rate] = -1
+
+        first = policy(state, None)
+        _reveal(state, first, memory_model)
+        second = policy(state, first)
+        _reveal(state, second, memory_model)
+
+        match = (state.symbols[rows, first] == state.symbols[rows, second]) & (first != second)
+        state.matched[rows[match], first[match]] = True
+        state.matched[rows[match], second[match]] = True
+
+        done = state.matched.all(axis=1)
+        if done.any():
+            turns[active[done]] = turn
+            keep = ~done
+            active = active[keep]
+            state.keep(keep)
+            rows = rows[:len(active)]
+            if not len(active):
+                break
+    else:
+        turns[active] = max_turns
+    return turns
+
+
+def _simulate_batch(args: Tuple) -> np.ndarray:
+    """行程池使用的包裝函數"""
+    return simulate_games(*args)
+
+
+def run_simulation(policy: Union[str, Policy] = 'optimal', num_games: int = 100000, num_pairs: int = 12,
+                   memory_model: MemoryModel = PERFECT_MEMORY, workers: Optional[int] = None,
+                   batch_size: int = 50000, seed: int = 0) -> Dict:
+    """將遊戲分批模擬（可分配到多個行程），返回完成回合數的統計
+
+    自訂策略需為模組層級的函數，才能傳到子行程。
+    """
+    start = time.perf_counter()
+    batches = []
+    remaining = num_games
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        batches.append((policy, size, num_pairs, memory_model, seed + len(batches)))
+        remaining -= size
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(batches) > 1:
+        with Pool(min(workers, len(batches))) as pool:
+            results = pool.map(_simulate_batch, batches)
+    else:
+        results = [_simulate_batch(batch) for batch in batches]
+
+    turns = np.concatenate(results) if results else np.zeros(0, dtype=np.int32)
+    return summarize_turns(turns, time.perf_counter() - start)
+
+
+def summarize_turns(turns: np.ndarray, elapsed: float = 0.0) -> Dict:
+    """完成回合數的平均與百分位數"""
+    if not len(turns):
+        return {'games': 0, 'mean': 0.0, 'std': 0.0, 'p50': 0.0, 'p90': 0.0, 'p95': 0.0,
+                'p99': 0.0, 'max': 0, 'elapsed': elapsed}
+    p50, p90, p95, p99 = np.percentile(turns, [50, 90, 95, 99])
+    return {
+        'games': len(turns),
+        'mean': float(turns.mean()),
+        'std': float(turns.std()),
+        'p50': float(p50),
+        'p90': float(p90),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': int(turns.max()),
+        'elapsed': elapsed
+    }
+
+
+def _option(args, name, default, convert):
+    """讀取並移除命令列選項"""
+    if name not in args:
+        return default
+    position = args.index(name)
+    value = convert(args[position + 1])
+    del args[position:position + 2]
+    return value
+
+
+def main():
+    """命令列工具"""
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        print(__doc__)
+        return 0
+    policies = _option(args, '--policy', 'heuristic,random,optimal', str).split(',')
+    num_games = _option(args, '--games', 100000, int)
+    num_pairs = _option(args, '--pairs', 12, int)
+    memory_model = MemoryModel(_option(args, '--forget', 0.0, float), _option(args, '--confusion', 0.0, float))
+    workers = _option(args, '--workers', None, int)
+    if args or any(name not in POLICIES for name in policies):
+        print(__doc__)
+        return 1
+
+    print(f"{num_pairs * 2} 張卡牌，每個策略 {num_games} 局，記憶模型 {memory_model}")
+    print(f"{'策略':>10} {'平均':>8} {'p50':>6} {'p90':>6} {'p95':>6} {'p99':>6} {'秒':>7}")
+    for name in policies:
+        stats = run_simulation(name, num_games, num_pairs, memory_model, workers)
+        print(f"{name:>10} {stats['mean']:>8.2f} {stats['p50']:>6.0f} {stats['p90']:>6.0f} "
+              f"{stats['p95']:>6.0f} {stats['p99']:>6.0f} {stats['elapsed']:>7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
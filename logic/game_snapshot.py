@@ -0,0 +1,122 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+SNAPSHOT_VERSION = 1
+# 固定在專案目錄下，不受啟動時的工作目錄影響
+DEFAULT_SNAPSHOT_PATH = str(Path(__file__).resolve().parent.parent / 'snapshots' / 'last_game.json')
+
+
+def write_json_atomic(path: Path, data: Dict) -> bool:
+    """原子性寫入精簡的 JSON（先寫暫存檔並同步到磁碟再改名），斷電時不會留下寫到一半的快照"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_snapshot(path: str) -> Optional[Dict]:
+    """讀取遊戲快照，檔案不存在、損壞或版本不符時返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def is_resumable(snapshot: Optional[Dict]) -> bool:
+    """快照是否值得恢復：遊戲尚未完成且已經記住卡牌或完成配對"""
+    return bool(snapshot) and not snapshot.get('game_complete') and bool(
+        snapshot.get('memory') or snapshot.get('matched'))
+
+
+class SnapshotWriter:
+    """快照寫入器 - 在背景執行緒定期寫入最新的遊戲狀態快照
+
+    save() 只記下最新的快照並立即返回（快照本身是獨立的複本，之後的幀不會再修改它），
+    寫入執行緒最多每 interval 秒寫入一次，中間的快照只保留最新的一份，不會拖慢畫面處理。
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH, interval: float = 1.0):
+        self.path = Path(path)
+        self.interval = interval
+        self._pending: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None  # 有待寫入快照時才存在，寫完即結束
+        self._flushing = False
+        self.written = 0
+        self.failed = 0
+
+    def save(self, snapshot: Dict):
+        """排入快照寫入（不阻塞）"""
+        with self._lock:
+            self._pending = snapshot
+            self._idle.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="SnapshotWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """寫入執行緒：寫入最新的快照後等待 interval，直到沒有待寫入的快照為止"""
+        while True:
+            with self._lock:
+                self._wakeup.clear()
+                snapshot, self._pending = self._pending, None
+
+            if snapshot is None:
+                pass  # 已被 discard 捨棄
+            elif write_json_atomic(self.path, snapshot):
+                self.written += 1
+            else:
+                self.failed += 1
+                print(f"⚠ 無法寫入遊戲快照：{self.path}")
+
+            with self._lock:
+                flushing = self._flushing
+            if not flushing and self.interval > 0:
+                self._wakeup.wait(self.interval)  # flush 時提前喚醒
+
+            with self._lock:
+                if self._pending is None:
+                    self._flushing = False
+                    self._thread = None
+                    self._idle.set()
+                    return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即寫入待寫入的快照並等待完成，逾時返回 False"""
+        with self._lock:
+            if self._idle.is_set():
+                return True
+            self._flushing = True  # 略過寫入間隔
+            self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def discard(self, timeout: Optional[float] = None):
+        """捨棄待寫入的快照並刪除快照檔案（遊戲完成或重置時使用）"""
+        with self._lock:
+            self._pending = None
+        self.flush(timeout)
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
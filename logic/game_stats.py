@@ -0,0 +1,190 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class RingBuffer:
+    """固定大小的環形緩衝區 - 多欄位的數值序列，滿了之後覆蓋最舊的紀錄"""
+
+    def __init__(self, capacity: int, fields: tuple):
+        self.capacity = capacity
+        self.fields = fields
+        self._data = np.zeros((capacity, len(fields)))
+        self._next = 0
+        self.total = 0  # 寫入過的紀錄數（包含已被覆蓋的）
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, *values: float):
+        """附加一筆紀錄"""
+        self._data[self._next] = values
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def last(self, back: int = 0) -> Optional[np.ndarray]:
+        """倒數第 back + 1 筆紀錄（不存在時返回 None）"""
+        if back >= len(self):
+            return None
+        return self._data[(self._next - 1 - back) % self.capacity]
+
+    def values(self) -> np.ndarray:
+        """依寫入順序排列的所有紀錄（複本）"""
+        if self.total <= self.capacity:
+            return self._data[:self.total].copy()
+        return np.roll(self._data, -self._next, axis=0)
+
+    def to_dicts(self):
+        """轉為字典列表，方便匯出"""
+        return [dict(zip(self.fields, (float(value) for value in row))) for row in self.values()]
+
+    def clear(self):
+        """清除所有紀錄"""
+        self._next = 0
+        self.total = 0
+
+
+class GameStatistics:
+    """遊戲統計時間序列 - 每回合與每秒的指標，以及可在 O(1) 內讀取的累計值
+
+    每回合記錄結束時間、耗時與是否配對；每秒記錄配對數、記憶卡牌數與回合數。
+    回合耗時另外累計到固定區間的直方圖，平均與 p95 不需排序整個序列。
+    序列存在固定大小的環形緩衝區，超過容量時只保留最近的紀錄，累計值仍包含整局遊戲。
+    """
+
+    def __init__(self, turn_capacity: int = 512, second_capacity: int = 3600,
+                 bin_width: float = 0.25, max_turn_time: float = 60.0):
+        self.turns = RingBuffer(turn_capacity, ('time', 'duration', 'matched'))
+        self.seconds = RingBuffer(second_capacity, ('time', 'matched_pairs', 'cards_remembered', 'turns'))
+        self.bin_width = bin_width
+        self._histogram = np.zeros(int(np.ceil(max_turn_time / bin_width)) + 1, dtype=np.int64)
+        self.reset()
+
+    def reset(self, start_time: Optional[float] = None):
+        """開始新的一局"""
+        self.turns.clear()
+        self.seconds.clear()
+        self._histogram[:] = 0
+        self.start_time = start_time
+        self.turn_count = 0
+        self.matched_turns = 0
+        self._duration_sum = 0.0
+        self._duration_max = 0.0
+        self._turn_start: Optional[float] = None
+        self._last_second: Optional[int] = None
+        self._current = (0, 0, 0)  # 最新的配對數、記憶卡牌數、回合數
+
+    # ----- 記錄 -----
+
+    def start_turn(self, now: float):
+        """回合開始（第一張卡牌翻開）"""
+        if self.start_time is None:
+            self.start_time = now
+        self._turn_start = now
+
+    def end_turn(self, now: float, matched: bool):
+        """回合結束，累計耗時與配對結果"""
+        duration = now - self._turn_start if self._turn_start is not None else 0.0
+        self._turn_start = None
+        self.turns.append(now, duration, matched)
+        self.turn_count += 1
+        self.matched_turns += bool(matched)
+        self._duration_sum += duration
+        self._duration_max = max(self._duration_max, duration)
+        self._histogram[min(int(duration / self.bin_width), len(self._histogram) - 1)] += 1
+
+    def sample(self, now: float, matched_pairs: int, cards_remembered: int, turns: int):
+        """更新目前的狀態，並為經過的每一秒記錄一筆（沒有變化的秒沿用上一筆的值）"""
+        if self.start_time is None:
+            self.start_time = now
+        second = int(now - self.start_time)
+        if self._last_second is not None:
+            # 補上沒有呼叫的秒，最多補滿緩衝區
+            first = max(self._last_second + 1, second - self.seconds.capacity + 1)
+            for missed in range(first, second):
+                self.seconds.append(self.start_time + missed, *self._current)
+        if self._last_second != second:
+            self.seconds.append(now, matched_pairs, cards_remembered, turns)
+            self._last_second = second
+        self._current = (matched_pairs, cards_remembered, turns)
+
+    def snapshot(self) -> Dict:
+        """累計值與計時的精簡快照（不含時間序列）"""
+        bins = np.flatnonzero(self._histogram)
+        return {
+            'start_time': self.start_time,
+            'turn_start': self._turn_start,
+            'turns': self.turn_count,
+            'matched_turns': self.matched_turns,
+            'duration_sum': self._duration_sum,
+            'duration_max': self._duration_max,
+            'histogram': [[int(index), int(self._histogram[index])] for index in bins]
+        }
+
+    def restore(self, snapshot: Dict):
+        """由快照還原累計值與計時（時間序列從還原後重新開始）"""
+        self.reset(snapshot.get('start_time'))
+        self._turn_start = snapshot.get('turn_start')
+        self.turn_count = snapshot.get('turns', 0)
+        self.matched_turns = snapshot.get('matched_turns', 0)
+        self._duration_sum = snapshot.get('duration_sum', 0.0)
+        self._duration_max = snapshot.get('duration_max', 0.0)
+        for index, count in snapshot.get('histogram', []):
+            self._histogram[min(index, len(self._histogram) - 1)] += count
+
+    # ----- 讀取 -----
+
+    def mean_turn_time(self) -> float:
+        """平均回合耗時"""
+        return self._duration_sum / self.turn_count if self.turn_count else 0.0
+
+    def turn_time_percentile(self, percentile: float = 95.0) -> float:
+        """回合耗時的百分位數（以直方圖區間的上界估計，解析度為 bin_width）"""
+        if not self.turn_count:
+            return 0.0
+        rank = int(np.ceil(self.turn_count * percentile / 100.0))
+        index = int(np.searchsorted(np.cumsum(self._histogram), max(rank, 1)))
+        return min((index + 1) * self.bin_width, self._duration_max)
+
+    def matches_per_minute(self, now: float, window: float = 60.0) -> Dict[str, float]:
+        """整局與最近 window 秒的每分鐘配對數"""
+        if self.start_time is None:
+            return {'overall': 0.0, 'recent': 0.0}
+        elapsed = max(now - self.start_time, 1e-9)
+        matched_pairs = self._current[0]
+        back = int(window) - 1
+        earlier = self.seconds.last(min(back, len(self.seconds) - 1)) if len(self.seconds) else None
+        recent_pairs = matched_pairs - (earlier[1] if earlier is not None else 0)
+        return {
+            'overall': matched_pairs * 60.0 / elapsed,
+            'recent': recent_pairs * 60.0 / min(elapsed, window)
+        }
+
+    def summary(self, now: float) -> Dict:
+        """目前的累計統計（只讀取累計值，不走訪序列）"""
+        rates = self.matches_per_minute(now)
+        return {
+            'elapsed_time': now - self.start_time if self.start_time is not None else 0,
+            'turns': self.turn_count,
+            'matched_turns': self.matched_turns,
+            'mean_turn_time': self.mean_turn_time(),
+            'p95_turn_time': self.turn_time_percentile(95.0),
+            'max_turn_time': self._duration_max,
+            'matches_per_minute': rates['overall'],
+            'recent_matches_per_minute': rates['recent']
+        }
+
+    def export(self, now: float, path: Optional[str] = None) -> Dict:
+        """匯出整局的時間序列與累計統計，指定 path 時同時寫入 JSON 檔案"""
+        data = {
+            'start_time': self.start_time,
+            'summary': self.summary(now),
+            'turns': self.turns.to_dicts(),
+            'seconds': self.seconds.to_dicts()
+        }
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        return data
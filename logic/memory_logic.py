@@ -1,88 +1,558 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Set, Iterable
 import time
+from operator import itemgetter
+from logic.game_log import GameEventLog, EVENT_SETUP, EVENT_REVEAL, EVENT_HIDE, EVENT_MATCH, EVENT_TURN_END
+from logic.memory_solver import MemorySolver, BoardKnowledge, ACTION_FLIP_UNKNOWN, ACTION_FLIP_KNOWN
+from logic.turn_state import TurnStateMachine, PHASE_IDLE, PHASE_RESOLVED_MATCH
+from logic.card_belief import CardBelief
+from logic.game_stats import GameStatistics
+from logic.game_snapshot import SNAPSHOT_VERSION
+
+_CARD_STATE = itemgetter('flipped', 'symbol')  # frame_deltas 比對的卡牌欄位
 
 class MemoryLogic:
-    """翻翻樂遊戲邏輯處理器"""
+    """翻翻樂遊戲邏輯處理器
+    
+    每組需要 group_size 張相同符號的卡牌才算配對（預設兩張一組，3 為三張一組），
+    group_sizes 可個別指定符號的張數（混合組的遊戲板），total_groups 為遊戲板上的組數。
+    """
     
-    def __init__(self):
+    def __init__(self, group_size: int = 2, total_groups: int = 12,
+                 group_sizes: Optional[Dict[str, int]] = None):
+        self.group_size = group_size
+        self.group_sizes = dict(group_sizes or {})
+        self.total_groups = total_groups
         self.game_state = {}
         self.matched_pairs = []
         self.memory_map = {}  # 記住已看過的卡牌
         self.last_flipped = []  # 最近翻開的卡牌
         self.game_start_time = None
         self.game_complete = False
+        self.turn_count = 0
+        self.event_log: Optional[GameEventLog] = None  # 設定後記錄每一幀的遊戲事件
+        self._setup_logged = False  # 本局的組大小設定已寫入事件紀錄
+        self._face_up = {}  # 目前翻開的卡牌 -> 符號（依翻開順序）
+        self._frame_signature = None  # 上一個與目前狀態一致的畫面：(卡牌, 每張卡牌的 (翻開, 符號))
+        self._open_symbols = {}  # 翻開且未配對的符號 -> 卡牌（以字典保持翻開的順序）
+        self._cells = {}  # 遊戲板上的卡牌 -> 網格位置
+        self.turn_state = TurnStateMachine(group_size, group_sizes)  # 翻牌回合階段
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._suggestions: Optional[List[Dict]] = None  # 目前階段的建議快取
+        self.solver = MemorySolver()  # 最佳翻牌求解器（快取跨幀重複使用）
+        self.belief: Optional[CardBelief] = None  # 卡牌符號的機率信念（enable_belief 啟用）
+        self.stats = GameStatistics()  # 每回合與每秒的統計時間序列
+        
+    @property
+    def matched_pairs(self) -> List[Tuple[str, ...]]:
+        """已配對的卡牌組合（依配對順序，每組 group_size 張）"""
+        return self._matched_pairs
+        
+    @matched_pairs.setter
+    def matched_pairs(self, pairs: Iterable[Tuple[str, ...]]):
+        """設定已配對的卡牌組合，同時重建已配對卡牌集合"""
+        self._matched_pairs = list(pairs)
+        self._matched_cards = {card_id for pair in self._matched_pairs for card_id in pair}
+        if '_symbol_cards' in self.__dict__:
+            for symbol in list(self._symbol_cards):
+                self._refresh_group(symbol)
+        
+    @property
+    def memory_map(self) -> Dict[str, Dict]:
+        """記憶中每張卡牌的符號、位置與最後看到的時間"""
+        return self._memory_map
+        
+    @memory_map.setter
+    def memory_map(self, memory_map: Dict[str, Dict]):
+        """設定記憶地圖，同時重建符號到卡牌的索引"""
+        self._memory_map = {}
+        self._symbol_cards = {}  # 符號 -> 記憶中該符號的卡牌（以字典保持記住的順序）
+        self._complete_symbols = {}  # 記憶中未配對的卡牌剛好湊滿一組的符號
+        for card_id, memory_info in memory_map.items():
+            self._remember(card_id, memory_info)
+            
+    def _remember(self, card_id: str, memory_info: Dict):
+        """寫入記憶地圖並更新符號索引"""
+        previous = self._memory_map.get(card_id)
+        if previous is not None and previous['symbol'] != memory_info['symbol']:
+            cards = self._symbol_cards[previous['symbol']]
+            del cards[card_id]
+            if not cards:
+                del self._symbol_cards[previous['symbol']]
+        self._memory_map[card_id] = memory_info
+        self._symbol_cards.setdefault(memory_info['symbol'], {})[card_id] = None
+        if previous is not None and previous['symbol'] != memory_info['symbol']:
+            self._refresh_group(previous['symbol'])
+        self._refresh_group(memory_info['symbol'])
+        
+    def _refresh_group(self, symbol: str):
+        """更新一個符號是否已記住完整的一組（只走訪該符號的卡牌）"""
+        cards = self._symbol_cards.get(symbol, ())
+        unmatched = sum(1 for card_id in cards if card_id not in self._matched_cards)
+        if symbol is not None and unmatched == self.group_size_of(symbol):
+            self._complete_symbols[symbol] = None
+        else:
+            self._complete_symbols.pop(symbol, None)
+        
+    def group_size_of(self, symbol: Optional[str]) -> int:
+        """一組符號的張數"""
+        return self.group_sizes.get(symbol, self.group_size)
+        
+    def set_groups(self, group_size: int, group_sizes: Optional[Dict[str, int]] = None,
+                   total_groups: Optional[int] = None):
+        """變更組大小的設定（還原快照或重播紀錄時使用），回合狀態機隨之更新"""
+        self.group_size = group_size
+        self.group_sizes = dict(group_sizes or {})
+        if total_groups is not None:
+            self.total_groups = total_groups
+        self.turn_state.group_size = self.group_size
+        self.turn_state.group_sizes = dict(self.group_sizes)
+        for symbol in list(self._symbol_cards):
+            self._refresh_group(symbol)
+        
+    def _add_matched_pair(self, pair: Tuple[str, ...]):
+        """記錄新的配對"""
+        self._matched_pairs.append(pair)
+        self._matched_cards.update(pair)
+        for symbol in {self._memory_map[card_id]['symbol'] for card_id in pair if card_id in self._memory_map}:
+            self._refresh_group(symbol)
         
-    def update_game_state(self, detected_cards: Dict) -> Dict:
-        """更新遊戲狀態"""
+    def update_game_state(self, detected_cards: Dict, now: Optional[float] = None) -> Dict:
+        """以完整的一幀更新遊戲狀態，now 可指定這一幀的時間（重播紀錄時使用）
+        
+        只有與上一幀相比改變的卡牌會被套用（見 apply_card_deltas）。
+        """
         if 'cards' not in detected_cards:
             return {'error': '無效的卡牌數據'}
             
-        current_time = time.time()
+        current_time = time.time() if now is None else now
         if self.game_start_time is None:
             self.game_start_time = current_time
-            
-        cards = detected_cards['cards']
-        
-        # 更新記憶地圖
-        for card_id, card_info in cards.items():
-            if card_info['flipped'] and card_info['symbol']:
-                self.memory_map[card_id] = {
-                    'symbol': card_info['symbol'],
-                    'position': card_info['grid_pos'],
-                    'last_seen': current_time
-                }
-                
-        # 檢測新翻開的卡牌
-        current_flipped = [card_id for card_id, card_info in cards.items() 
-                          if card_info['flipped']]
-        
-        # 更新最近翻開的卡牌列表
-        self.last_flipped = current_flipped[-2:] if len(current_flipped) >= 2 else current_flipped
-        
-        # 檢查配對
-        self._check_for_matches(cards)
+        changes = self.apply_card_deltas(self.frame_deltas(detected_cards), now=current_time)
         
         # 檢查遊戲是否完成
-        self.game_complete = len(self.matched_pairs) == 12
+        self.game_complete = len(self.matched_pairs) == self.total_groups
         
         return {
             'matched_pairs': len(self.matched_pairs),
             'memory_map_size': len(self.memory_map),
             'last_flipped': self.last_flipped,
             'game_complete': self.game_complete,
+            'phase': changes['phase'],
             'elapsed_time': current_time - self.game_start_time if self.game_start_time else 0
         }
         
-    def _check_for_matches(self, cards: Dict):
-        """檢查是否有新的配對"""
-        # 找出當前翻開且未配對的卡牌
-        flipped_unmatched = []
+    def frame_deltas(self, detected_cards: Dict) -> Dict[str, Dict]:
+        """找出與目前狀態相比翻開狀態或符號改變的卡牌，結果可直接傳給 apply_card_deltas
+        
+        沒有紀錄過的卡牌視為蓋著，並記下其網格位置（用於產生建議）；每張卡牌只比較兩個欄位。
+        與上一個沒有變化的畫面相同時直接返回空字典，不逐張比對狀態。
+        """
+        cards = detected_cards.get('cards', {})
+        signature = (list(cards), list(map(_CARD_STATE, cards.values())))
+        if signature == self._frame_signature:
+            return {}
+        deltas = {}
         for card_id, card_info in cards.items():
-            if (card_info['flipped'] and 
-                card_info['symbol'] and 
-                not self._is_card_matched(card_id)):
-                flipped_unmatched.append((card_id, card_info['symbol']))
+            if card_id not in self._cells:
+                self._cells[card_id] = card_info.get('grid_pos')
+            if card_info['flipped']:
+                if card_id not in self._face_up or self._face_up[card_id] != card_info['symbol']:
+                    deltas[card_id] = card_info
+            elif card_id in self._face_up:
+                deltas[card_id] = card_info
+        if not deltas:
+            self._frame_signature = signature
+        return deltas
+        
+    def apply_card_deltas(self, deltas: Dict[str, Dict], now: Optional[float] = None) -> Dict:
+        """只套用自上一幀以來改變的卡牌，返回這一幀的變更集合
+        
+        deltas 與 detect_cards 的 'cards' 格式相同，但只包含狀態改變的卡牌，
+        記憶、配對與回合狀態都只更新這些卡牌；沒有改變的幀傳入空字典即可，幾乎不需計算。
+        回合階段改變時通知 subscribe 註冊的函數。
+        """
+        changes = {'changed': bool(deltas), 'revealed': [], 'hidden': [], 'new_pairs': [],
+                   'turn_ended': False, 'game_complete': self.game_complete,
+                   'phase': self.turn_state.phase, 'transitions': []}
+        if not deltas:
+            return changes
+            
+        self._frame_signature = None
+        current_time = time.time() if now is None else now
+        if self.game_start_time is None:
+            self.game_start_time = current_time
+        transitions = changes['transitions']
+        self.turn_state.turn = self.turn_count
+        observations = {}
+        
+        # 先處理蓋回的卡牌，同一幀蓋回上一回合並翻開新卡牌時回合順序才正確
+        for card_id, card_info in sorted(deltas.items(), key=lambda item: bool(item[1]['flipped'])):
+            self._cells[card_id] = card_info.get('grid_pos')
+            was_up = card_id in self._face_up
+            matched = self._is_card_matched(card_id)
+            if was_up and not matched:
+                self._close_card(card_id)
+                
+            if not card_info['flipped']:
+                if was_up:
+                    del self._face_up[card_id]
+                    changes['hidden'].append(card_id)
+                    transitions.extend(self.turn_state.hide(card_id, current_time))
+                continue
+                
+            symbol = card_info['symbol']
+            self._face_up.pop(card_id, None)
+            self._face_up[card_id] = symbol  # 移到最後，保持翻開的順序
+            changes['revealed'].append(card_id)
+            if self.belief is not None and not card_info.get('from_belief'):
+                scores = CardBelief.observation_scores(card_info)
+                if scores:
+                    observations[card_id] = scores
+            if symbol:
+                self._remember(card_id, {
+                    'symbol': symbol,
+                    'position': card_info['grid_pos'],
+                    'last_seen': current_time,
+                    'confidence': card_info.get('confidence')
+                })
+            if matched:
+                continue
+                
+            paired = False
+            if symbol:
+                open_cards = self._open_symbols.setdefault(symbol, {})
+                open_cards[card_id] = None
+                if len(open_cards) >= self.group_size_of(symbol):
+                    # 翻開的同符號卡牌湊滿一組
+                    pair = tuple(open_cards)
+                    for partner in pair:
+                        self._close_card(partner)
+                    self._add_matched_pair(pair)
+                    changes['new_pairs'].append(pair)
+                    paired = True
+            transitions.extend(self.turn_state.reveal(card_id, symbol, paired, current_time))
+                
+        # 仍翻開的卡牌在這一刻也被看到
+        for card_id, symbol in self._face_up.items():
+            if symbol:
+                self._memory_map[card_id]['last_seen'] = current_time
+                
+        if self.belief is not None and (observations or changes['new_pairs']):
+            fixed = {card_id: self._face_up[pair[-1]] for pair in changes['new_pairs'] for card_id in pair}
+            self.belief.observe(observations, fixed)
+            self._sync_belief()
+            
+        # 回到閒置階段即為回合結束
+        changes['turn_ended'] = self.turn_state.turn != self.turn_count
+        self.turn_count = self.turn_state.turn
+        changes['phase'] = self.turn_state.phase
+        self.last_flipped = list(self._face_up)[-self.group_size:]
+        self.game_complete = len(self.matched_pairs) == self.total_groups
+        changes['game_complete'] = self.game_complete
+        
+        self._record_statistics(transitions, current_time)
+        if self.event_log is not None:
+            self._record_deltas(deltas, changes, current_time)
+        if transitions:
+            self._suggestions = None
+            self._notify(transitions)
+        return changes
+        
+    def enable_belief(self, symbols: Iterable[str], copies_per_symbol: Optional[int] = None):
+        """啟用卡牌符號的機率信念，之後每一幀的識別分數都會累積成每張卡牌的符號機率
+        
+        啟用後記憶中的符號改採機率最高的符號，建議的信心度改為實際的配對機率。
+        已經記住的卡牌以其信心度作為第一筆觀察；copies_per_symbol 預設為 group_size。
+        沒有符號表時（沒有模板、以分群產生符號）不啟用，建議沿用識別分數。
+        """
+        symbols = list(symbols)
+        if not symbols:
+            self.belief = None
+            return
+        copies = self.group_size if copies_per_symbol is None else copies_per_symbol
+        self.belief = CardBelief(symbols, self._cells, copies)
+        observations = {card_id: {memory_info['symbol']: memory_info.get('confidence') or 1.0}
+                        for card_id, memory_info in self._memory_map.items()}
+        fixed = {card_id: self._memory_map[card_id]['symbol']
+                 for card_id in self._matched_cards if card_id in self._memory_map}
+        self.belief.observe(observations, fixed)
+        self._sync_belief()
+        
+    def _sync_belief(self):
+        """以機率最高的符號更新記憶中蓋著且未配對的卡牌（翻開的卡牌以畫面為準）"""
+        cards = [card_id for card_id in self._memory_map
+                 if card_id not in self._face_up and not self._is_card_matched(card_id)]
+        for card_id, symbol in self.belief.most_likely_symbols(cards).items():
+            memory_info = self._memory_map[card_id]
+            current = memory_info['symbol']
+            # 不在符號表中的符號沒有機率可比較，保留識別結果
+            if (current != symbol and current in self.belief.symbols and
+                    self.belief.probability(card_id, symbol) > self.belief.probability(card_id, current)):
+                self._remember(card_id, dict(memory_info, symbol=symbol))
+                
+    def get_certain_symbols(self, threshold: float = 0.99, min_observations: int = 2) -> Dict[str, str]:
+        """機率超過門檻且多次觀察一致、翻開時不需要再識別的卡牌符號（未啟用機率信念時為空）"""
+        if self.belief is None:
+            return {}
+        return self.belief.certain_symbols(threshold, min_observations)
+        
+    def _close_card(self, card_id: str):
+        """將翻開且未配對的卡牌移出增量索引"""
+        symbol = self._face_up.get(card_id)
+        open_cards = self._open_symbols.get(symbol) if symbol else None
+        if open_cards is not None and card_id in open_cards:
+            del open_cards[card_id]
+            if not open_cards:
+                del self._open_symbols[symbol]
+        
+    def _record_statistics(self, transitions: List[Dict], current_time: float):
+        """依回合階段轉換累計回合耗時，並記錄目前的進度"""
+        for transition in transitions:
+            if transition['previous'] == PHASE_IDLE and transition['phase'] != PHASE_IDLE:
+                self.stats.start_turn(transition['time'])
+            elif transition['phase'] == PHASE_IDLE:
+                self.stats.end_turn(transition['time'], transition['previous'] == PHASE_RESOLVED_MATCH)
+        self.stats.sample(current_time, len(self._matched_pairs), len(self._memory_map), self.turn_count)
+        
+    def _record_deltas(self, deltas: Dict[str, Dict], changes: Dict, current_time: float):
+        """記錄增量更新產生的事件（每局的第一個事件為組大小的設定）"""
+        if not self._setup_logged:
+            self.event_log.append(EVENT_SETUP, current_time, group_size=self.group_size,
+                                  group_sizes=dict(self.group_sizes), total_groups=self.total_groups)
+            self._setup_logged = True
+        for card_id in changes['revealed']:
+            card_info = deltas[card_id]
+            grid_pos = card_info.get('grid_pos')
+            self.event_log.append(EVENT_REVEAL, current_time, card=card_id, symbol=card_info['symbol'],
+                                  pos=list(grid_pos) if grid_pos is not None else None,
+                                  conf=card_info.get('confidence'))
+        for card_id in changes['hidden']:
+            self.event_log.append(EVENT_HIDE, current_time, card=card_id)
+        for pair in changes['new_pairs']:
+            self.event_log.append(EVENT_MATCH, current_time, cards=list(pair), symbol=self._face_up[pair[-1]])
+        for transition in changes['transitions']:
+            if transition['phase'] == PHASE_IDLE:
+                self.event_log.append(EVENT_TURN_END, current_time, turn=transition['turn'],
+                                      matched=transition['previous'] == PHASE_RESOLVED_MATCH)
+                
+    def subscribe(self, callback: Callable[[Dict], None]) -> Callable[[Dict], None]:
+        """註冊回合階段改變的通知
+        
+        每次階段轉換呼叫 callback(轉換)，轉換包含 'phase'、'previous'、'cards'、'turn'、'time'
+        以及依新階段重新計算的 'suggestions'。返回 callback，方便之後取消註冊。
+        """
+        self._listeners.append(callback)
+        return callback
+        
+    def unsubscribe(self, callback: Callable[[Dict], None]):
+        """取消註冊"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+            
+    def _notify(self, transitions: List[Dict]):
+        """通知訂閱者階段轉換（整幀套用完畢後才通知，建議只計算一次）"""
+        if not self._listeners:
+            return
+        suggestions = self.current_suggestions()
+        for transition in transitions:
+            payload = dict(transition, suggestions=suggestions)
+            for callback in list(self._listeners):
+                try:
+                    callback(payload)
+                except Exception as e:
+                    print(f"⚠ 回合階段通知錯誤：{e}")
+                    
+    def current_suggestions(self) -> List[Dict]:
+        """目前回合階段的翻牌建議，只在階段改變後重新計算"""
+        if self._suggestions is None:
+            self._suggestions = self.get_suggestions(self._board_cards())
+        return self._suggestions
+        
+    def _board_cards(self) -> Dict:
+        """由目前狀態組成與 detect_cards 相同格式的畫面資料"""
+        cards = {}
+        for card_id, grid_pos in self._cells.items():
+            flipped = card_id in self._face_up
+            memory_info = self._memory_map.get(card_id)
+            cards[card_id] = {
+                'position': None,
+                'flipped': flipped,
+                'symbol': self._face_up.get(card_id),
+                'confidence': memory_info.get('confidence') if flipped and memory_info else None,
+                'grid_pos': grid_pos
+            }
+        return {'cards': cards}
+        
+    def apply_event(self, event: Dict):
+        """套用一個紀錄中的事件（重播用），直接採用記錄的配對結果
+
+        setup 事件代表新的一局，會先重置遊戲狀態再套用組大小的設定。
+        last_seen 以最後一個事件的時間為準，沒有任何變化的幀不會出現在紀錄中。
+        """
+        self._frame_signature = None
+        event_type = event['type']
+        if event_type == EVENT_SETUP:
+            # 新的一局：同一個紀錄檔可能接續多局遊戲，先清除上一局的狀態
+            self.reset_game()
+            self.set_groups(event['group_size'], event.get('group_sizes'), event.get('total_groups'))
+            return
+            
+        timestamp = event['t']
+        if self.game_start_time is None:
+            self.game_start_time = timestamp
+            
+        transitions = []
+        if event_type == EVENT_REVEAL:
+            if event.get('symbol'):
+                self._remember(event['card'], {
+                    'symbol': event['symbol'],
+                    'position': tuple(event['pos']) if event.get('pos') is not None else None,
+                    'last_seen': timestamp,
+                    'confidence': event.get('conf')
+                })
+            self._face_up.pop(event['card'], None)
+            self._face_up[event['card']] = event.get('symbol')
+            self._cells[event['card']] = tuple(event['pos']) if event.get('pos') is not None else None
+            if self.belief is not None and event.get('symbol'):
+                self.belief.observe({event['card']: {event['symbol']: event.get('conf') or 1.0}})
+            if not self._is_card_matched(event['card']):
+                transitions = self.turn_state.reveal(event['card'], event.get('symbol'), timestamp=timestamp)
+        elif event_type == EVENT_HIDE:
+            self._face_up.pop(event['card'], None)
+            transitions = self.turn_state.hide(event['card'], timestamp)
+        elif event_type == EVENT_MATCH:
+            pair = tuple(event['cards'])
+            self._add_matched_pair(pair)
+            transitions = self.turn_state.reveal(pair[-1], event.get('symbol'), True, timestamp)
+            if self.belief is not None and event.get('symbol'):
+                self.belief.observe({}, {card_id: event['symbol'] for card_id in pair})
+            self.game_complete = len(self.matched_pairs) == self.total_groups
+        elif event_type == EVENT_TURN_END:
+            self.turn_count = event['turn']
+            
+        # 仍翻開的卡牌在這一刻也被看到（沒有事件的幀不會記錄，因此以最後一個事件的時間為準）
+        for card_id, symbol in self._face_up.items():
+            if symbol and card_id in self._memory_map:
+                self._memory_map[card_id]['last_seen'] = timestamp
+                
+        self._rebuild_open_symbols()
+        self.turn_state.turn = self.turn_count
+        self._record_statistics(transitions, timestamp)
+        self._suggestions = None
+        self.last_flipped = list(self._face_up)[-self.group_size:]
                 
-        # 檢查是否有配對
-        symbols_seen = {}
-        for card_id, symbol in flipped_unmatched:
-            if symbol in symbols_seen:
-                # 找到配對
-                pair = (symbols_seen[symbol], card_id)
-                if pair not in self.matched_pairs and (pair[1], pair[0]) not in self.matched_pairs:
-                    self.matched_pairs.append(pair)
-            else:
-                symbols_seen[symbol] = card_id
+    def snapshot(self) -> Dict:
+        """目前遊戲狀態的精簡快照（獨立的複本，可 JSON 序列化），restore_snapshot 可完整還原
+        
+        包含組大小的設定、記憶、配對、翻開的卡牌、回合階段、計時與機率信念；建議與求解器快取會重新計算。
+        """
+        def position(grid_pos):
+            return list(grid_pos) if grid_pos is not None else None
+            
+        turn_state = self.turn_state
+        return {
+            'version': SNAPSHOT_VERSION,
+            'groups': {'size': self.group_size, 'sizes': dict(self.group_sizes), 'total': self.total_groups},
+            'memory': [[card_id, info['symbol'], position(info['position']), info['last_seen'],
+                        info.get('confidence')] for card_id, info in self._memory_map.items()],
+            'matched': [list(pair) for pair in self._matched_pairs],
+            'face_up': [[card_id, symbol] for card_id, symbol in self._face_up.items()],
+            'cells': [[card_id, position(grid_pos)] for card_id, grid_pos in self._cells.items()],
+            'turn': {'phase': turn_state.phase, 'cards': list(turn_state.cards),
+                     'symbols': dict(turn_state.symbols), 'visible': list(turn_state.visible),
+                     'turn': turn_state.turn},
+            'turn_count': self.turn_count,
+            'game_start_time': self.game_start_time,
+            'game_complete': self.game_complete,
+            'stats': self.stats.snapshot(),
+            'belief': self.belief.snapshot() if self.belief is not None else None
+        }
+        
+    def restore_snapshot(self, snapshot: Dict):
+        """由 snapshot() 的快照還原遊戲狀態（事件紀錄保持不變）"""
+        def position(grid_pos):
+            return tuple(grid_pos) if grid_pos is not None else None
+            
+        groups = snapshot.get('groups')
+        if groups is not None:
+            self.set_groups(groups['size'], groups['sizes'], groups['total'])
+        self.reset_game()
+        self.memory_map = {card_id: {'symbol': symbol, 'position': position(grid_pos),
+                                     'last_seen': last_seen, 'confidence': confidence}
+                           for card_id, symbol, grid_pos, last_seen, confidence in snapshot['memory']}
+        self.matched_pairs = [tuple(pair) for pair in snapshot['matched']]
+        self._face_up = {card_id: symbol for card_id, symbol in snapshot['face_up']}
+        self._cells = {card_id: position(grid_pos) for card_id, grid_pos in snapshot['cells']}
+        self._rebuild_open_symbols()
+        
+        turn = snapshot['turn']
+        self.turn_state.phase = turn['phase']
+        self.turn_state.cards = list(turn['cards'])
+        self.turn_state.symbols = dict(turn['symbols'])
+        self.turn_state.visible = dict.fromkeys(turn['visible'])
+        self.turn_state.turn = turn['turn']
+        self.turn_count = snapshot['turn_count']
+        self.game_start_time = snapshot['game_start_time']
+        self.game_complete = snapshot['game_complete']
+        self.last_flipped = list(self._face_up)[-self.group_size:]
+        self.stats.restore(snapshot.get('stats', {}))
+        if snapshot.get('belief') is not None:
+            self.belief = CardBelief.from_snapshot(snapshot['belief'])
+        self._suggestions = None
+        
+    def _rebuild_open_symbols(self):
+        """由翻開的卡牌重建翻開且未配對的符號索引"""
+        self._open_symbols = {}
+        for card_id, symbol in self._face_up.items():
+            if symbol and not self._is_card_matched(card_id):
+                self._open_symbols.setdefault(symbol, {})[card_id] = None
                 
     def _is_card_matched(self, card_id: str) -> bool:
         """檢查卡牌是否已配對"""
-        for pair in self.matched_pairs:
-            if card_id in pair:
-                return True
-        return False
+        return card_id in self._matched_cards
+        
+    def get_possible_symbols(self, all_symbols: Iterable[str]) -> Set[str]:
+        """獲取尚未見過的卡牌仍可能出現的符號
+
+        已配對的符號，以及整組卡牌位置都已記住的符號，都不可能再出現在其他位置。
+        """
+        located = {symbol for symbol, cards in self._symbol_cards.items()
+                   if len(cards) >= self.group_size_of(symbol)}
+        return set(all_symbols) - located
+        
+    def get_remembered_symbols(self) -> Dict[str, str]:
+        """獲取記憶中每張卡牌的符號"""
+        return {card_id: memory_info['symbol'] for card_id, memory_info in self.memory_map.items()}
+        
+    def get_decision(self, current_cards: Dict) -> Optional[Dict]:
+        """以求解器決定下一步翻牌，包含剩餘回合數期望值
+        
+        本回合已翻開兩張、記憶與盤面不一致或超過求解時間預算時返回 None；
+        求解器只處理兩張一組的遊戲，其他組大小也返回 None。
+        """
+        if 'cards' not in current_cards or not self._pairs_only():
+            return None
+        cards = current_cards['cards']
+        face_up = [card_id for card_id, card_info in cards.items()
+                   if card_info['flipped'] and not self._is_card_matched(card_id)]
+        if len(face_up) > 1:
+            return None
+            
+        # 不在這一幀畫面中的已記憶卡牌也屬於盤面
+        cells = list(cards) + [card_id for card_id in self._memory_map if card_id not in cards]
+        board = BoardKnowledge.from_memory(cells, self._symbol_cards, self._matched_cards)
+        return self.solver.decide(board, face_up[0] if face_up else None)
+        
+    def _pairs_only(self) -> bool:
+        """是否每種符號都是兩張一組"""
+        return self.group_size == 2 and all(size == 2 for size in self.group_sizes.values())
         
     def get_suggestions(self, current_cards: Dict) -> List[Dict]:
-        """獲取翻牌建議"""
+        """獲取翻牌建議
+        
+        本回合翻開的卡牌都是同一符號且還不到一組時，建議記憶中同符號的其他卡牌；
+        否則建議記憶中已湊滿一組的符號。
+        """
         if 'cards' not in current_cards:
             return []
             
@@ -95,14 +565,18 @@ class MemoryLogic:
             if card_info['flipped'] and not self._is_card_matched(card_id):
                 currently_flipped.append((card_id, card_info['symbol'], card_info['grid_pos']))
                 
-        # 如果有一張卡翻開，尋找其配對
-        if len(currently_flipped) == 1:
-            target_symbol = currently_flipped[0][1]
+        # 翻開的卡牌還不到一組時，尋找同組的其他卡牌
+        target_symbol = currently_flipped[0][1] if currently_flipped else None
+        building = (0 < len(currently_flipped) < self.group_size_of(target_symbol) and
+                    all(symbol == target_symbol for _, symbol, _ in currently_flipped))
+        if building:
+            flipped_ids = [card_id for card_id, _, _ in currently_flipped]
+            flipped_confidences = [cards[card_id].get('confidence') for card_id in flipped_ids]
             
-            # 在記憶中尋找配對
-            for card_id, memory_info in self.memory_map.items():
-                if (memory_info['symbol'] == target_symbol and 
-                    card_id != currently_flipped[0][0] and
+            # 在記憶中尋找配對（只查詢同符號的卡牌）
+            for card_id in self._symbol_cards.get(target_symbol, ()):
+                memory_info = self.memory_map[card_id]
+                if (card_id not in flipped_ids and
                     not self._is_card_matched(card_id)):
                     
                     suggestions.append({
@@ -110,35 +584,55 @@ class MemoryLogic:
                         'card_id': card_id,
                         'position': memory_info['position'],
                         'symbol': target_symbol,
-                        'confidence': 0.9,
+                        'confidence': self._pair_confidence(
+                            tuple(flipped_ids) + (card_id,),
+                            flipped_confidences + [memory_info.get('confidence')], 0.9),
                         'reason': f'記憶中的{target_symbol}配對'
                     })
                     
+        # 翻開的卡牌沒有已知配對時，由求解器決定第二張
+        if building and not suggestions and not self._pairs_only():
+            suggestions.extend(self._explore_suggestion(cards, target_symbol))
+        elif len(currently_flipped) == 1 and not suggestions:
+            decision = self.get_decision(current_cards)
+            if decision is not None and decision['action'] in (ACTION_FLIP_UNKNOWN, ACTION_FLIP_KNOWN):
+                card_id = decision['cards'][0]
+                explore = decision['action'] == ACTION_FLIP_UNKNOWN
+                position = (cards[card_id]['grid_pos'] if card_id in cards
+                            else self.memory_map[card_id]['position'])
+                suggestions.append({
+                    'type': 'explore' if explore else 'safe_flip',
+                    'card_id': card_id,
+                    'position': position,
+                    'symbol': None if explore else self.memory_map[card_id]['symbol'],
+                    'confidence': decision['match_probability'],
+                    'expected_turns': decision['expected_turns'],
+                    'reason': (f'翻開未見過的卡牌，預計還需 {decision["expected_turns"]:.1f} 回合'
+                               if explore else '翻開已知卡牌，不揭露新的卡牌')
+                })
+                
         # 如果沒有直接配對，提供記憶中的建議
         if not suggestions:
-            # 尋找記憶中的配對機會
-            symbol_positions = {}
-            for card_id, memory_info in self.memory_map.items():
-                if not self._is_card_matched(card_id):
-                    symbol = memory_info['symbol']
-                    if symbol not in symbol_positions:
-                        symbol_positions[symbol] = []
-                    symbol_positions[symbol].append({
-                        'card_id': card_id,
-                        'position': memory_info['position'],
-                        'last_seen': memory_info['last_seen']
-                    })
-                    
-            # 推薦有配對可能的符號
-            for symbol, positions in symbol_positions.items():
-                if len(positions) == 2:  # 記住了兩張相同符號的卡
+            # 記憶中已湊滿一組的符號（索引隨記憶更新，不需走訪所有記住的卡牌）
+            for symbol in self._complete_symbols:
+                positions = [{
+                    'card_id': card_id,
+                    'position': self.memory_map[card_id]['position'],
+                    'last_seen': self.memory_map[card_id]['last_seen'],
+                    'confidence': self.memory_map[card_id].get('confidence')
+                } for card_id in self._symbol_cards[symbol] if not self._is_card_matched(card_id)]
+                
+                if positions:
+                    pair_confidence = self._pair_confidence(
+                        tuple(pos_info['card_id'] for pos_info in positions),
+                        [pos_info['confidence'] for pos_info in positions], 0.7)
                     for pos_info in positions:
                         suggestions.append({
                             'type': 'memory_pair',
                             'card_id': pos_info['card_id'],
                             'position': pos_info['position'],
                             'symbol': symbol,
-                            'confidence': 0.7,
+                            'confidence': pair_confidence,
                             'reason': f'記憶中的{symbol}配對組合'
                         })
                         
@@ -147,26 +641,84 @@ class MemoryLogic:
         
         return suggestions[:3]  # 返回最多3個建議
         
-    def get_statistics(self) -> Dict:
-        """獲取遊戲統計資訊"""
-        current_time = time.time()
+    def _explore_suggestion(self, cards: Dict, symbol: Optional[str]) -> List[Dict]:
+        """翻開一張未見過的卡牌，信心度為其剛好是同組符號的機率"""
+        unknown = [card_id for card_id in list(cards) + list(self._cells)
+                   if card_id not in self._memory_map and not self._is_card_matched(card_id)
+                   and card_id not in self._face_up and not cards.get(card_id, {}).get('flipped')]
+        unknown = list(dict.fromkeys(unknown))
+        if not unknown:
+            return []
+        card_id = unknown[0]
+        remaining = self.group_size_of(symbol) - len(self._symbol_cards.get(symbol, ()))
+        return [{
+            'type': 'explore',
+            'card_id': card_id,
+            'position': cards[card_id]['grid_pos'] if card_id in cards else self._cells.get(card_id),
+            'symbol': None,
+            'confidence': max(remaining, 0) / len(unknown),
+            'reason': '翻開未見過的卡牌'
+        }]
+        
+    def _pair_confidence(self, cards: Tuple[str, ...], scores: List[Optional[float]], default: float) -> float:
+        """一組卡牌配對的信心度：啟用機率信念時為每張都與第一張符號相同的機率，否則合併識別分數"""
+        if self.belief is not None and self.belief.symbols:
+            confidence = 1.0
+            for card_id in cards[1:]:
+                confidence *= self.belief.match_probability(cards[0], card_id)
+            return confidence
+        return self._combined_confidence(scores, default)
+        
+    @staticmethod
+    def _combined_confidence(scores: List[Optional[float]], default: float) -> float:
+        """將多張卡牌的識別分數合併為建議信心度，缺少識別分數時使用預設值"""
+        if any(score is None for score in scores):
+            return default
+        confidence = 1.0
+        for score in scores:
+            confidence *= min(max(score, 0.0), 1.0)
+        return confidence
+        
+    def get_statistics(self, now: Optional[float] = None) -> Dict:
+        """獲取遊戲統計資訊（只讀取累計值，可頻繁呼叫）
+        
+        除了進度之外，包含回合數、平均與 p95 回合耗時及每分鐘配對數（見 GameStatistics.summary）。
+        """
+        current_time = time.time() if now is None else now
         elapsed_time = current_time - self.game_start_time if self.game_start_time else 0
         
-        return {
+        stats = self.stats.summary(current_time)
+        stats.update({
             'matched_pairs': len(self.matched_pairs),
-            'total_pairs': 12,
-            'progress_percentage': (len(self.matched_pairs) / 12) * 100,
+            'total_pairs': self.total_groups,
+            'progress_percentage': (len(self.matched_pairs) / self.total_groups) * 100,
             'cards_remembered': len(self.memory_map),
             'elapsed_time': elapsed_time,
             'game_complete': self.game_complete,
             'efficiency': len(self.matched_pairs) / max(len(self.memory_map), 1)
-        }
+        })
+        return stats
+        
+    def export_statistics(self, path: Optional[str] = None, now: Optional[float] = None) -> Dict:
+        """匯出整局的統計時間序列（每回合與每秒），指定 path 時寫入 JSON 檔案"""
+        return self.stats.export(time.time() if now is None else now, path)
         
     def reset_game(self):
-        """重置遊戲狀態"""
+        """重置遊戲狀態（事件紀錄保持不變）"""
         self.game_state = {}
         self.matched_pairs = []
         self.memory_map = {}
         self.last_flipped = []
         self.game_start_time = None
         self.game_complete = False
+        self.turn_count = 0
+        self._face_up = {}
+        self._frame_signature = None
+        self._open_symbols = {}
+        self._cells = {}
+        self._setup_logged = False
+        self.turn_state.reset()
+        self.stats.reset()
+        self._suggestions = None
+        if self.belief is not None:
+            self.belief.reset()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+翻翻樂最佳翻牌求解器
+以位元遮罩表示盤面知識（每個符號已知未配對的卡牌、未見過的卡牌、已配對的卡牌），
+並以動態規劃計算剩餘回合數期望值最小的翻牌方式。
+
+未見過的卡牌彼此對稱，期望值只取決於「未見過的卡牌數 n」與「只知道一張位置的符號數 k」，
+因此狀態數為 O(n²)；計算結果以有上限的快取保存並跨幀重複使用。
+
+用法: python -m logic.memory_solver [卡牌數]
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+ACTION_MATCH_PAIR = 'match_pair'      # 兩張位置都已知的符號，直接翻開配對
+ACTION_MATCH_CARD = 'match_card'      # 已翻開卡牌的配對位置已知
+ACTION_FLIP_UNKNOWN = 'flip_unknown'  # 翻開未見過的卡牌
+ACTION_FLIP_KNOWN = 'flip_known'      # 翻開已知的卡牌（不揭露新資訊）
+
+
+def popcount(mask: int) -> int:
+    """計算遮罩中的卡牌數"""
+    return bin(mask).count('1')
+
+
+def mask_cells(mask: int, cells: Sequence[str]) -> List[str]:
+    """將遮罩轉換為卡牌 ID（依卡牌索引排序）"""
+    result = []
+    while mask:
+        lowest = mask & -mask
+        result.append(cells[lowest.bit_length() - 1])
+        mask ^= lowest
+    return result
+
+
+@dataclass(frozen=True)
+class BoardKnowledge:
+    """以位元遮罩表示的盤面知識，第 i 位元對應 cells[i]"""
+    cells: Tuple[str, ...]
+    unknown: int                                      # 從未見過的卡牌
+    matched: int                                      # 已配對的卡牌
+    known: Dict[str, int] = field(default_factory=dict)  # 符號 -> 已知但未配對的卡牌
+
+    @classmethod
+    def from_memory(cls, cells: Iterable[str], symbol_cards: Mapping[str, Iterable[str]],
+                    matched_cards: Iterable[str]) -> 'BoardKnowledge':
+        """由卡牌 ID、符號到卡牌的記憶索引與已配對的卡牌建立盤面知識"""
+        cells = tuple(cells)
+        index = {card_id: i for i, card_id in enumerate(cells)}
+        matched = 0
+        for card_id in matched_cards:
+            if card_id in index:
+                matched |= 1 << index[card_id]
+
+        known = {}
+        seen = matched
+        for symbol, card_ids in symbol_cards.items():
+            mask = 0
+            for card_id in card_ids:
+                if card_id in index:
+                    mask |= 1 << index[card_id]
+            mask &= ~matched
+            seen |= mask
+            if mask:
+                known[symbol] = mask
+
+        unknown = ((1 << len(cells)) - 1) & ~seen
+        return cls(cells, unknown, matched, known)
+
+    def symbol_of(self, card_id: str) -> Optional[str]:
+        """查詢已知卡牌的符號"""
+        bit = 1 << self.cells.index(card_id)
+        for symbol, mask in self.known.items():
+            if mask & bit:
+                return symbol
+        return None
+
+    @property
+    def unknown_count(self) -> int:
+        """未見過的卡牌數"""
+        return popcount(self.unknown)
+
+    @property
+    def singles(self) -> List[str]:
+        """只知道一張位置的符號"""
+        return [symbol for symbol, mask in self.known.items() if popcount(mask) == 1]
+
+    @property
+    def pairs(self) -> List[str]:
+        """至少知道兩張位置的符號"""
+        return [symbol for symbol, mask in self.known.items() if popcount(mask) >= 2]
+
+
+class MemorySolver:
+    """剩餘回合數期望值的動態規劃求解器
+
+    E(n, k) 為未見過 n 張卡牌、其中 k 張是已知單張的另一半時，最佳策略下的剩餘回合數期望值；
+    兩張位置都已知的符號一律先配對，每組多一回合。快取以 n 為單位保存整列，
+    超過上限時淘汰最久未使用的列；單次查詢超過時間預算時返回 None，
+    已算出的列保留在快取中，下一幀從中斷處繼續。
+    """
+
+    def __init__(self, max_rows: int = 1024, time_budget: float = 0.005):
+        self.max_rows = max_rows
+        self.time_budget = time_budget
+        self._rows: 'OrderedDict[int, List[Optional[float]]]' = OrderedDict()
+
+    # ----- 期望值 -----
+
+    def _row(self, n: int) -> Optional[List[Optional[float]]]:
+        """取得快取中的一列並標記為最近使用"""
+        row = self._rows.get(n)
+        if row is not None:
+            self._rows.move_to_end(n)
+        return row
+
+    def _store(self, n: int, row: List[Optional[float]]):
+        """存入一列，超過上限時淘汰最久未使用的列"""
+        self._rows[n] = row
+        self._rows.move_to_end(n)
+        while len(self._rows) > self.max_rows:
+            self._rows.popitem(last=False)
+
+    @staticmethod
+    def _second_flip(prev: List[Optional[float]], row: List[Optional[float]], n: int, k: int) -> Tuple[float, str]:
+        """第一張翻開的是單張符號（另一半未見過）時，第二張的最佳選擇
+
+        n、k 為翻開第一張之後的狀態（k 包含第一張的符號），prev 為 n - 1 列。
+        返回 (不含本回合的剩餘回合數期望值, 動作)。
+        """
+        # 翻開未見過的卡牌：配對成功、翻到其他單張的另一半（之後多一回合配對）、或翻到新符號
+        explore = (prev[k - 1] * k + (k - 1)
+                   + ((n - k) * prev[k + 1] if n > k else 0.0)) / n
+        if k >= 2 and row[k] is not None and row[k] < explore:
+            return row[k], ACTION_FLIP_KNOWN
+        return explore, ACTION_FLIP_UNKNOWN
+
+    def _compute_row(self, n: int, prev: List[Optional[float]], prev2: List[Optional[float]]) -> List[Optional[float]]:
+        """由 n - 1 與 n - 2 列計算第 n 列（n - k 為奇數的狀態不存在）"""
+        row: List[Optional[float]] = [None] * (n + 1)
+        for k in range(n % 2, n + 1, 2):
+            value = 0.0
+            if k:
+                # 翻到已知單張的另一半，直接翻開已知的那張配對
+                value += k / n * (1.0 + prev[k - 1])
+            if n > k:
+                # 翻到新符號，再決定第二張
+                second, _ = self._second_flip(prev2, prev, n - 1, k + 1)
+                value += (n - k) / n * (1.0 + second)
+            row[k] = value
+        return row
+
+    def _ensure_rows(self, n: int, deadline: Optional[float]) -> bool:
+        """確保查詢需要的 n、n - 1、n - 2 列都已計算，超過期限時返回 False"""
+        if all(self._row(m) is not None for m in (n, n - 1, n - 2) if m >= 0):
+            return True
+
+        # 從最高的連續兩列快取開始往上計算
+        start = 0
+        for m in range(n - 1, -1, -1):
+            if m in self._rows and (m == 0 or m - 1 in self._rows):
+                start = m + 1
+                break
+
+        rows = {m: self._rows[m] for m in (start - 1, start - 2) if m >= 0}
+        for m in range(start, n + 1):
+            # 每次查詢至少計算一列，確保跨幀一定會有進展
+            if m > start and deadline is not None and time.perf_counter() > deadline:
+                return False
+            if m == 0:
+                row = [0.0]
+            else:
+                row = self._compute_row(m, rows[m - 1], rows.get(m - 2, []))
+            rows[m] = row
+            self._store(m, row)
+            rows.pop(m - 2, None)
+        return True
+
+    def _deadline(self) -> Optional[float]:
+        """依時間預算計算本次查詢的期限"""
+        return time.perf_counter() + self.time_budget if self.time_budget else None
+
+    def expected_turns(self, unknown: int, singles: int, known_pairs: int = 0) -> Optional[float]:
+        """剩餘回合數期望值，狀態不存在或超過時間預算時返回 None"""
+        if singles > unknown or (unknown - singles) % 2:
+            return None
+        if not self._ensure_rows(unknown, self._deadline()):
+            return None
+        return known_pairs + self._rows[unknown][singles]
+
+    # ----- 決策 -----
+
+    def decide(self, board: BoardKnowledge, face_up: Optional[str] = None) -> Optional[Dict]:
+        """決定下一步翻牌
+
+        face_up 為本回合已翻開的第一張卡牌（None 表示回合開始）。返回
+        {'action', 'cards', 'expected_turns', 'match_probability'}；
+        記憶與盤面不一致或超過時間預算時返回 None，由呼叫端改用其他建議。
+        """
+        n = board.unknown_count
+        singles = board.singles
+        pairs = board.pairs
+        k = len(singles)
+        if k > n or (n - k) % 2:
+            return None
+        if not self._ensure_rows(n, self._deadline()):
+            return None
+        row, prev = self._rows[n], self._rows.get(n - 1)
+
+        if face_up is None:
+            # 已知的配對一律先翻，其餘情況翻開未見過的卡牌
+            if pairs:
+                cards = mask_cells(board.known[pairs[0]], board.cells)[:2]
+                return self._decision(ACTION_MATCH_PAIR, cards, len(pairs) + row[k], 1.0)
+            if not n:
+                return None
+            cards = mask_cells(board.unknown, board.cells)
+            probability = k / n
+            if n > k:
+                _, action = self._second_flip(self._rows.get(n - 2, []), prev, n - 1, k + 1)
+                if action == ACTION_FLIP_UNKNOWN:
+                    probability += (n - k) / n / (n - 1)
+            return self._decision(ACTION_FLIP_UNKNOWN, cards, row[k], probability)
+
+        symbol = board.symbol_of(face_up) if face_up in board.cells else None
+        if symbol is None:
+            return None
+        others = board.known[symbol] & ~(1 << board.cells.index(face_up))
+        if others:
+            # 另一半的位置已知
+            return self._decision(ACTION_MATCH_CARD, mask_cells(others, board.cells)[:1],
+                                  len(pairs) + row[k], 1.0)
+
+        # 另一半未見過：翻開未見過的卡牌，或翻開其他已知卡牌
+        if not n:
+            return None
+        second, action = self._second_flip(prev, row, n, k)
+        if action == ACTION_FLIP_KNOWN:
+            known_cards = [card for s in singles if s != symbol
+                           for card in mask_cells(board.known[s], board.cells)]
+            return self._decision(action, known_cards, len(pairs) + second, 0.0)
+        return self._decision(action, mask_cells(board.unknown, board.cells), len(pairs) + second, 1.0 / n)
+
+    @staticmethod
+    def _decision(action: str, cards: List[str], expected: float, probability: float) -> Dict:
+        """組合決策結果"""
+        return {'action': action, 'cards': cards, 'expected_turns': expected,
+                'match_probability': probability}
+
+    def clear(self):
+        """清除快取"""
+        self._rows.clear()
+
+
+def main():
+    """命令列工具：顯示整局遊戲在最佳策略下的回合數期望值"""
+    cells = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    if cells <= 0 or cells % 2:
+        print(__doc__)
+        return 1
+
+    solver = MemorySolver(time_budget=0)
+    start = time.perf_counter()
+    expected = solver.expected_turns(cells, 0)
+    elapsed = time.perf_counter() - start
+    print(f"✓ {cells} 張卡牌：最佳策略平均 {expected:.3f} 回合（計算 {elapsed * 1000:.2f} 毫秒）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import time
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Sequence
+
+# 每一格的觀察結果
+CELL_DOWN = -1          # 蓋著
+CELL_UNRECOGNIZED = -2  # 翻開但沒有識別出符號
+
+# 建議類型（與 MemoryLogic.get_suggestions 的類型對應）
+SUGGEST_NONE = 0
+SUGGEST_DIRECT = 1   # direct_match：翻開卡牌的配對位置已知
+SUGGEST_PAIR = 2     # memory_pair：兩張位置都已知的符號
+SUGGEST_EXPLORE = 3  # explore：翻開未見過的卡牌
+SUGGESTION_TYPES = {SUGGEST_DIRECT: 'direct_match', SUGGEST_PAIR: 'memory_pair', SUGGEST_EXPLORE: 'explore'}
+
+
+class SessionStore:
+    """多局遊戲的狀態儲存 - 以陣列保存數千局遊戲，一次呼叫更新或建議所有遊戲
+
+    每局遊戲一列：記憶中每一格的符號編號（-1 為不知道）、最後看到的時間（相對於開始時間的秒數，
+    float32 存放絕對的 epoch 秒數只有約兩分鐘的解析度）、
+    是否已配對、是否翻開，以及回合數與開始時間，24 格約兩百位元組。
+    符號名稱在所有遊戲間共用同一組編號。
+    """
+
+    def __init__(self, num_cells: int = 24, capacity: int = 1024):
+        self.num_cells = num_cells
+        self.symbol_names: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._keys: Dict[Hashable, int] = {}   # 外部識別碼 -> 列
+        self._free: List[int] = []
+        self._pending: Dict[int, np.ndarray] = {}
+        self._size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """配置（或擴充）陣列，保留既有的遊戲"""
+        old = getattr(self, 'symbols', None)
+        fields = {
+            'symbols': ((capacity, self.num_cells), np.int16, -1),
+            'last_seen': ((capacity, self.num_cells), np.float32, 0.0),
+            'matched': ((capacity, self.num_cells), bool, False),
+            'face_up': ((capacity, self.num_cells), bool, False),
+            'turns': ((capacity,), np.int32, 0),
+            'start_time': ((capacity,), np.float64, np.nan),
+            'active': ((capacity,), bool, False),
+        }
+        for name, (shape, dtype, fill) in fields.items():
+            array = np.full(shape, fill, dtype=dtype)
+            if old is not None:
+                previous = getattr(self, name)
+                array[:len(previous)] = previous
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    @property
+    def bytes_per_session(self) -> int:
+        """每局遊戲佔用的位元組數"""
+        arrays = (self.symbols, self.last_seen, self.matched, self.face_up,
+                  self.turns, self.start_time, self.active)
+        return sum(array.nbytes for array in arrays) // self.capacity
+
+    def __len__(self):
+        return len(self._keys)
+
+    # ----- 遊戲管理 -----
+
+    def open(self, key: Hashable) -> int:
+        """建立一局遊戲，返回其列編號（已存在時直接返回）"""
+        if key in self._keys:
+            return self._keys[key]
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == self.capacity:
+                self._allocate(self.capacity * 2)
+            row = self._size
+            self._size += 1
+        self._reset_rows(np.array([row]))
+        self.active[row] = True
+        self._keys[key] = row
+        return row
+
+    def close(self, key: Hashable):
+        """結束一局遊戲並釋出其列"""
+        row = self._keys.pop(key)
+        self.active[row] = False
+        self._pending.pop(row, None)
+        self._free.append(row)
+
+    def row(self, key: Hashable) -> int:
+        """查詢遊戲的列編號"""
+        return self._keys[key]
+
+    def reset(self, rows: Sequence[int]):
+        """重置指定的遊戲"""
+        self._reset_rows(np.asarray(rows, dtype=np.intp))
+
+    def _reset_rows(self, rows: np.ndarray):
+        """清除指定列的遊戲狀態"""
+        self.symbols[rows] = -1
+        self.last_seen[rows] = 0.0
+        self.matched[rows] = False
+        self.face_up[rows] = False
+        self.turns[rows] = 0
+        self.start_time[rows] = np.nan
+
+    # ----- 觀察結果 -----
+
+    def symbol_id(self, name: str) -> int:
+        """符號名稱的編號（第一次出現時配置）"""
+        if name not in self._symbol_ids:
+            self._symbol_ids[name] = len(self.symbol_names)
+            self.symbol_names.append(name)
+        return self._symbol_ids[name]
+
+    def encode(self, detected_cards: Dict, cell_ids: Optional[Sequence[str]] = None) -> np.ndarray:
+        """將 detect_cards 的結果轉換為一列觀察結果（預設依 card_0、card_1 … 排列）"""
+        cell_ids = cell_ids or [f'card_{i}' for i in range(self.num_cells)]
+        cards = detected_cards.get('cards', {})
+        observed = np.full(self.num_cells, CELL_DOWN, dtype=np.int16)
+        for cell, card_id in enumerate(cell_ids):
+            card_info = cards.get(card_id)
+            if card_info is None or not card_info['flipped']:
+                continue
+            observed[cell] = self.symbol_id(card_info['symbol']) if card_info['symbol'] else CELL_UNRECOGNIZED
+        return observed
+
+    def submit(self, key: Hashable, detected_cards: Dict, cell_ids: Optional[Sequence[str]] = None):
+        """登記一局遊戲待處理的檢測結果（同一局只保留最新的一幀）"""
+        self._pending[self._keys[key]] = self.encode(detected_cards, cell_ids)
+
+    def update_pending(self, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """以一次批次更新處理所有待處理的檢測結果"""
+        if not self._pending:
+            return self.update(np.zeros(0, dtype=np.intp), np.zeros((0, self.num_cells), dtype=np.int16), now)
+        rows = np.fromiter(self._pending.keys(), dtype=np.intp, count=len(self._pending))
+        observed = np.stack(list(self._pending.values()))
+        self._pending.clear()
+        return self.update(rows, observed, now)
+
+    # ----- 批次更新 -----
+
+    def update(self, rows: np.ndarray, observed: np.ndarray, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """批次套用多局遊戲各一幀的觀察結果
+
+        observed 的每一列為一局遊戲的每一格：符號編號、CELL_DOWN 或 CELL_UNRECOGNIZED。
+        翻開且未配對的卡牌中，同一局剛好兩張同符號即記為配對；
+        配對成功或翻開的卡牌全部蓋回即為回合結束。
+        返回每一局的 'new_pairs'（新配對數）、'turn_ended' 與 'game_complete'。
+        """
+        current_time = time.time() if now is None else now
+        rows = np.asarray(rows, dtype=np.intp)
+        observed = np.asarray(observed, dtype=np.int16)
+        count = len(rows)
+
+        start = self.start_time[rows]
+        self.start_time[rows] = np.where(np.isnan(start), current_time, start)
+
+        # 記憶每一張識別出符號的翻開卡牌
+        symbols = self.symbols[rows]
+        last_seen = self.last_seen[rows]
+        recognized = observed >= 0
+        symbols[recognized] = observed[recognized]
+        last_seen[recognized] = np.broadcast_to((current_time - self.start_time[rows])[:, None],
+                                                observed.shape)[recognized]
+        self.symbols[rows] = symbols
+        self.last_seen[rows] = last_seen
+
+        matched = self.matched[rows]
+        face_up = observed != CELL_DOWN
+        open_before = (self.face_up[rows] & ~matched).any(axis=1)
+
+        # 每局翻開且未配對的卡牌依符號計數，剛好兩張的符號完成配對
+        candidates = recognized & ~matched
+        local = np.broadcast_to(np.arange(count)[:, None], observed.shape)
+        num_symbols = max(len(self.symbol_names), int(observed.max(initial=-1)) + 1, 1)
+        keys = local[candidates] * num_symbols + observed[candidates]
+        counts = np.bincount(keys, minlength=count * num_symbols)
+        pairing = np.zeros(observed.shape, dtype=bool)
+        pairing[candidates] = counts[keys] == 2
+        matched |= pairing
+        self.matched[rows] = matched
+        self.face_up[rows] = face_up
+
+        new_pairs = pairing.sum(axis=1) // 2
+        open_after = (face_up & ~matched).any(axis=1)
+        turn_ended = (new_pairs > 0) | (open_before & ~open_after)
+        self.turns[rows] += turn_ended
+        return {
+            'new_pairs': new_pairs,
+            'turn_ended': turn_ended,
+            'game_complete': matched.all(axis=1)
+        }
+
+    # ----- 批次建議 -----
+
+    def suggest(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """一次計算多局遊戲的翻牌建議
+
+        與 MemoryLogic.get_suggestions 相同的規則：只翻開一張時建議其記憶中的另一半，
+        沒有另一半時翻開未見過的卡牌；否則建議記憶中兩張位置都已知的符號。
+        返回 'kind'（SUGGEST_*）與 'cells'（每局兩格，沒有時為 -1）。
+        """
+        rows = np.flatnonzero(self.active[:self._size]) if rows is None else np.asarray(rows, dtype=np.intp)
+        count = len(rows)
+        symbols = self.symbols[rows]
+        matched = self.matched[rows]
+        face_up = self.face_up[rows]
+        kind = np.zeros(count, dtype=np.int8)
+        cells = np.full((count, 2), -1, dtype=np.int16)
+        if not count:
+            return {'rows': rows, 'kind': kind, 'cells': cells}
+
+        local = np.arange(count)
+        open_cards = face_up & ~matched
+        single = open_cards.sum(axis=1) == 1
+        first = open_cards.argmax(axis=1)
+        first_symbol = symbols[local, first]
+
+        # 翻開一張：記憶中同符號的另一張
+        remembered = (symbols >= 0) & ~matched
+        partner = remembered & ~face_up & (symbols == first_symbol[:, None]) & (first_symbol >= 0)[:, None]
+        direct = single & partner.any(axis=1)
+        kind[direct] = SUGGEST_DIRECT
+        cells[direct, 0] = partner[direct].argmax(axis=1)
+
+        # 翻開一張但另一半未見過：翻開第一張未見過的卡牌
+        unknown = (symbols < 0) & ~matched & ~face_up
+        explore = single & ~direct & unknown.any(axis=1)
+        kind[explore] = SUGGEST_EXPLORE
+        cells[explore, 0] = unknown[explore].argmax(axis=1)
+
+        # 其餘情況：記憶中兩張位置都已知的符號
+        rest = kind == SUGGEST_NONE
+        num_symbols = max(len(self.symbol_names), int(symbols.max(initial=-1)) + 1, 1)
+        valid = remembered & rest[:, None]
+        local_rows = np.broadcast_to(local[:, None], symbols.shape)
+        counts = np.bincount(local_rows[valid] * num_symbols + symbols[valid],
+                             minlength=count * num_symbols).reshape(count, num_symbols)
+        paired = counts == 2
+        has_pair = paired.any(axis=1)
+        pair_symbol = paired.argmax(axis=1)
+        members = valid & (symbols == pair_symbol[:, None]) & has_pair[:, None]
+        kind[has_pair] = SUGGEST_PAIR
+        first_member = members.argmax(axis=1)
+        members[local, first_member] = False
+        cells[has_pair, 0] = first_member[has_pair]
+        cells[has_pair, 1] = members[has_pair].argmax(axis=1)
+        return {'rows': rows, 'kind': kind, 'cells': cells}
+
+    def session_state(self, key: Hashable) -> Dict:
+        """一局遊戲的狀態（除錯與顯示用）"""
+        row = self._keys[key]
+        return {
+            'memory': {f'card_{cell}': self.symbol_names[symbol]
+                       for cell, symbol in enumerate(self.symbols[row]) if symbol >= 0},
+            'matched_pairs': int(self.matched[row].sum()) // 2,
+            'turns': int(self.turns[row]),
+            'game_complete': bool(self.matched[row].all()),
+            'start_time': None if np.isnan(self.start_time[row]) else float(self.start_time[row]),
+            'last_seen': {f'card_{cell}': float(self.start_time[row] + self.last_seen[row, cell])
+                          for cell, symbol in enumerate(self.symbols[row]) if symbol >= 0}
+        }
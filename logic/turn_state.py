@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional
+
+# 回合階段
+PHASE_IDLE = 'idle'                      # 沒有翻開的卡牌
+PHASE_FIRST_UP = 'first_up'              # 第一張翻開
+PHASE_SECOND_UP = 'second_up'            # 第二張（或之後）翻開，尚未知道是否配對
+PHASE_RESOLVED_MATCH = 'resolved_match'  # 兩張配對成功
+PHASE_RESOLVED_MISS = 'resolved_miss'    # 兩張不同，等待蓋回
+PHASES = (PHASE_IDLE, PHASE_FIRST_UP, PHASE_SECOND_UP, PHASE_RESOLVED_MATCH, PHASE_RESOLVED_MISS)
+
+
+class TurnStateMachine:
+    """翻牌回合狀態機：閒置 → 第一張翻開 → 第二張翻開 → 配對成功／失敗 → 閒置
+
+    reveal 與 hide 返回這次造成的階段轉換（依發生順序），每個轉換為
+    {'phase', 'previous', 'cards', 'turn', 'time'}；回到閒置即為回合結束，turn 為已結束的回合數。
+    本回合的卡牌識別出新的符號但階段不變時，也會產生一個相同階段的轉換。
+    配對成功後立即回到閒置；配對失敗則等本回合的卡牌都蓋回才回到閒置。
+    每組需要 group_size 張相同符號的卡牌（group_sizes 可個別指定符號的張數），
+    本回合翻開的符號都相同且還不到一組時可以繼續翻開，出現不同的符號即配對失敗。
+    """
+
+    def __init__(self, group_size: int = 2, group_sizes: Optional[Dict[str, int]] = None):
+        self.group_size = group_size
+        self.group_sizes = dict(group_sizes or {})
+        self.phase = PHASE_IDLE
+        self.cards: List[str] = []            # 本回合翻開的卡牌（依翻開順序）
+        self.symbols: Dict[str, Optional[str]] = {}
+        self.visible: Dict[str, None] = {}    # 本回合仍翻開的卡牌
+        self.turn = 0
+
+    def _move(self, phase: str, timestamp: Optional[float], transitions: List[Dict]):
+        """轉換到新的階段"""
+        transitions.append({'phase': phase, 'previous': self.phase, 'cards': list(self.cards),
+                            'turn': self.turn, 'time': timestamp})
+        self.phase = phase
+
+    def _finish(self, timestamp: Optional[float], transitions: List[Dict]):
+        """結束本回合並回到閒置"""
+        self.turn += 1
+        self._move(PHASE_IDLE, timestamp, transitions)
+        self.cards = []
+        self.symbols = {}
+        self.visible = {}
+
+    def _resolve(self, paired: bool, timestamp: Optional[float], transitions: List[Dict]):
+        """本回合的卡牌識別出符號後決定配對結果（出現兩種符號即配對失敗）"""
+        if paired:
+            self._move(PHASE_RESOLVED_MATCH, timestamp, transitions)
+            self._finish(timestamp, transitions)
+        else:
+            symbols = {self.symbols.get(card_id) for card_id in self.cards} - {None}
+            if len(symbols) > 1:
+                self._move(PHASE_RESOLVED_MISS, timestamp, transitions)
+                
+    def _turn_size(self) -> int:
+        """本回合最多翻開的張數（依第一個識別出的符號的組大小）"""
+        for card_id in self.cards:
+            symbol = self.symbols.get(card_id)
+            if symbol:
+                return self.group_sizes.get(symbol, self.group_size)
+        return self.group_size
+
+    def reveal(self, card_id: str, symbol: Optional[str], paired: bool = False,
+               timestamp: Optional[float] = None) -> List[Dict]:
+        """一張未配對的卡牌翻開（或翻開中的卡牌識別出新的符號），paired 表示因此完成配對"""
+        transitions: List[Dict] = []
+        if card_id in self.cards:
+            # 已翻開的卡牌識別出新的符號；沒有決定配對結果時以相同階段重新進入，讓建議隨之更新
+            changed = self.symbols.get(card_id) != symbol
+            self.symbols[card_id] = symbol
+            self.visible[card_id] = None
+            if paired or self.phase == PHASE_SECOND_UP:
+                self._resolve(paired, timestamp, transitions)
+            if changed and not transitions:
+                self._move(self.phase, timestamp, transitions)
+            return transitions
+
+        if self.phase == PHASE_RESOLVED_MISS or (
+                self.phase == PHASE_SECOND_UP and len(self.cards) >= self._turn_size()):
+            # 上一回合的卡牌還沒蓋回就翻開新卡牌，視為上一回合已結束
+            if self.phase == PHASE_SECOND_UP:
+                self._move(PHASE_RESOLVED_MISS, timestamp, transitions)
+            self._finish(timestamp, transitions)
+
+        self.cards.append(card_id)
+        self.symbols[card_id] = symbol
+        self.visible[card_id] = None
+        if self.phase == PHASE_IDLE:
+            self._move(PHASE_FIRST_UP, timestamp, transitions)
+            if paired:  # 翻開的卡牌與回合外仍翻開的卡牌配對
+                self._resolve(True, timestamp, transitions)
+        else:
+            self._move(PHASE_SECOND_UP, timestamp, transitions)
+            self._resolve(paired, timestamp, transitions)
+        return transitions
+
+    def hide(self, card_id: str, timestamp: Optional[float] = None) -> List[Dict]:
+        """一張卡牌蓋回，本回合的卡牌全部蓋回時回合結束"""
+        transitions: List[Dict] = []
+        if card_id not in self.visible:
+            return transitions
+        del self.visible[card_id]
+        if not self.visible:
+            if self.phase == PHASE_SECOND_UP:
+                self._move(PHASE_RESOLVED_MISS, timestamp, transitions)
+            self._finish(timestamp, transitions)
+        return transitions
+
+    def reset(self):
+        """重置狀態機（保留組大小的設定）"""
+        self.__init__(self.group_size, self.group_sizes)
@@ -5,11 +5,12 @@
 """
 
 import sys
-import os
 import signal
 from camera.video_capture import VideoCapture
 from recognition.card_detector import CardDetector
 from logic.memory_logic import MemoryLogic
+from logic.game_log import GameEventLog
+from logic.game_snapshot import SnapshotWriter, DEFAULT_SNAPSHOT_PATH, load_snapshot, is_resumable
 from ui.gui import GameGUI
 
 def signal_handler(sig, frame):
@@ -25,13 +26,27 @@ def main():
     print("目標: 6x4 翻翻樂遊戲輔助")
     print("-" * 40)
     
+    # 選用：每組的張數（預設兩張一組，例如 --group-size 3 為三張一組），在開啟攝像頭前檢查
+    group_size = 2
+    if '--group-size' in sys.argv[1:]:
+        try:
+            group_size = int(sys.argv[sys.argv.index('--group-size') + 1])
+        except (IndexError, ValueError):
+            group_size = 0
+        if group_size < 2:
+            print("用法錯誤: --group-size 必須是 2 以上的整數", file=sys.stderr)
+            return 2
+            
     # 註冊信號處理器
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
     # 初始化組件
     video_capture = None
+    card_detector = None
+    memory_logic = None
     gui = None
+    snapshot_writer = None
     
     try:
         # 初始化視頻捕獲
@@ -49,26 +64,59 @@ def main():
         
         # 初始化卡牌檢測器
         print("初始化卡牌檢測器...")
-        card_detector = CardDetector()
+        card_detector = CardDetector(group_size=group_size)
         
-        # 載入符號模板（如果存在）
-        template_dir = "templates"
-        if os.path.exists(template_dir):
-            card_detector.symbol_recognizer.load_templates()
+        # 符號模板已在識別器初始化時載入（優先使用打包模板庫），不需重複載入
+        template_dir = card_detector.symbol_recognizer.template_dir
+        if card_detector.symbol_recognizer.templates:
+            # 打包模板庫過期時在背景重建，下次啟動即可直接映射
+            card_detector.symbol_recognizer.enable_bank_writing()
             print(f"✓ 載入符號模板: {template_dir}")
         else:
             print("⚠ 未找到符號模板，將使用實時學習模式")
             
+        # 選用：監看模板目錄，新增或修正模板後不需重新啟動
+        if '--watch-templates' in sys.argv[1:]:
+            card_detector.symbol_recognizer.start_template_watcher()
+            print(f"✓ 監看模板目錄變更: {template_dir}")
+            
         print("✓ 卡牌檢測器初始化成功")
         
         # 初始化記憶邏輯
         print("初始化遊戲邏輯...")
-        memory_logic = MemoryLogic()
+        board_cards = card_detector.grid_size[0] * card_detector.grid_size[1]
+        memory_logic = MemoryLogic(group_size=group_size, total_groups=board_cards // group_size)
+        
+        # 選用：記錄遊戲事件，之後可用 python -m logic.game_log 重播
+        if '--event-log' in sys.argv[1:]:
+            log_path = sys.argv[sys.argv.index('--event-log') + 1]
+            memory_logic.event_log = GameEventLog(log_path)
+            print(f"✓ 記錄遊戲事件: {log_path}")
         print("✓ 遊戲邏輯初始化成功")
         
         # 初始化GUI
         print("啟動用戶介面...")
         gui = GameGUI(video_capture, card_detector, memory_logic)
+        
+        # 選用：遊戲完成時匯出每回合與每秒的統計時間序列
+        if '--stats-export' in sys.argv[1:]:
+            gui.stats_export_path = sys.argv[sys.argv.index('--stats-export') + 1]
+            print(f"✓ 遊戲完成時匯出統計: {gui.stats_export_path}")
+            
+        # 遊戲狀態快照：當機或重新開機後可從上次的進度繼續（--no-snapshot 停用）
+        if '--no-snapshot' not in sys.argv[1:]:
+            snapshot_path = DEFAULT_SNAPSHOT_PATH
+            if '--snapshot' in sys.argv[1:]:
+                snapshot_path = sys.argv[sys.argv.index('--snapshot') + 1]
+            snapshot = load_snapshot(snapshot_path)
+            snapshot_writer = SnapshotWriter(snapshot_path)
+            gui.snapshot_writer = snapshot_writer
+            if is_resumable(snapshot):
+                if gui.offer_resume(snapshot):
+                    print(f"✓ 已從快照恢復遊戲: {snapshot_path}")
+                else:
+                    snapshot_writer.discard()
+            print(f"✓ 遊戲狀態快照: {snapshot_path}")
         print("✓ 用戶介面啟動成功")
         
         print("\n系統準備就緒！")
@@ -96,9 +144,22 @@ def main():
         if gui:
             gui.close()
             
+        # 寫入最後的遊戲狀態快照
+        if snapshot_writer and not snapshot_writer.flush(timeout=2.0):
+            print("⚠ 遊戲狀態快照未能在時限內寫入")
+            
+        # 寫入尚未保存的學習模板
+        if card_detector:
+            card_detector.symbol_recognizer.stop_template_watcher()
+            if not card_detector.symbol_recognizer.flush(timeout=10.0):
+                print("⚠ 部分學習模板未能在時限內寫入")
+            
         if video_capture:
             video_capture.release()
             
+        if memory_logic and memory_logic.event_log:
+            memory_logic.event_log.close()
+            
         print("程式已關閉")
         
     return 0
@@ -1,16 +1,20 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Set
 from utils.image_utils import ImageUtils
 from recognition.symbol_recognizer import SymbolRecognizer
 
 class CardDetector:
     """卡牌檢測器 - 檢測翻翻樂中的卡牌位置和狀態"""
     
-    def __init__(self):
+    def __init__(self, group_size: int = 2):
         self.image_utils = ImageUtils()
-        self.symbol_recognizer = SymbolRecognizer()
         self.grid_size = (6, 4)  # 6列4行
+        self.group_size = group_size  # 每組的張數
+        # 沒有模板時的分群數上限為遊戲板上的組數（每組 group_size 張）
+        self.symbol_recognizer = SymbolRecognizer(
+            max_clusters=self.grid_size[0] * self.grid_size[1] // group_size
+        )
         self.card_positions = []
         self.back_template = None
         self.setup_complete = False
@@ -66,87 +70,111 @@ class CardDetector:
             result['ready'] = True
             result['message'] = "系統準備就緒！"
             self.setup_complete = True
-            
+
         return result
-        
-    def _detect_game_grid(self, frame: np.ndarray) -> Tuple[bool, List]:
-        """檢測6x4遊戲網格"""
-        print("=== 開始檢測遊戲網格 ===")
+
+    def calibration_reference(self) -> Optional[Dict]:
+        """校準結果（網格大小與卡牌位置），可寫入快照後由 restore_calibration 還原；未校準時返回 None"""
+        if not self.setup_complete:
+            return None
+        return {
+            'grid_size': list(self.grid_size),
+            'card_positions': [[int(x1), int(y1), int(x2), int(y2), float(area)]
+                               for x1, y1, x2, y2, area in self.card_positions]
+        }
+
+    def restore_calibration(self, reference: Optional[Dict]) -> bool:
+        """還原先前的校準結果，網格大小或卡牌數不符時返回 False"""
+        if not reference or tuple(reference.get('grid_size', ())) != tuple(self.grid_size):
+            return False
+        positions = [tuple(position) for position in reference.get('card_positions', [])]
+        if len(positions) != self.grid_size[0] * self.grid_size[1]:
+            return False
+        self.card_positions = positions
+        self.setup_complete = True
+        return True
+
+    @staticmethod
+    def _detect_game_grid(frame: np.ndarray, verbose: bool = True) -> Tuple[bool, List]:
+        """檢測6x4遊戲網格（不依賴檢測器狀態，模板採集也使用），verbose 為 False 時不輸出過程"""
+        log = print if verbose else (lambda *args, **kwargs: None)
+        log("=== 開始檢測遊戲網格 ===")
         
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        print(f"影像轉換為灰度圖，尺寸: {gray.shape}")
+        log(f"影像轉換為灰度圖，尺寸: {gray.shape}")
         
         # 使用邊緣檢測
         edges = cv2.Canny(gray, 50, 150)
-        print("已完成 Canny 邊緣檢測 (閾值: 50-150)")
+        log("已完成 Canny 邊緣檢測 (閾值: 50-150)")
         
         # 尋找輪廓
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        print(f"找到 {len(contours)} 個輪廓")
+        log(f"找到 {len(contours)} 個輪廓")
         
         # 篩選矩形卡牌
         card_contours = []
-        print("開始篩選矩形卡牌...")
+        log("開始篩選矩形卡牌...")
         
         for i, contour in enumerate(contours):
             # 計算輪廓面積
             area = cv2.contourArea(contour)
             
             if area < 500:  # 太小的區域忽略
-                print(f"  輪廓 {i}: 面積 {area:.1f} 太小，忽略")
+                log(f"  輪廓 {i}: 面積 {area:.1f} 太小，忽略")
                 continue
             
-            print(f"  輪廓 {i}: 面積 {area:.1f}")
+            log(f"  輪廓 {i}: 面積 {area:.1f}")
             
             # 近似輪廓為多邊形
             epsilon = 0.02 * cv2.arcLength(contour, True)
             approx = cv2.approxPolyDP(contour, epsilon, True)
             
-            print(f"    → 多邊形近似結果: {len(approx)} 個頂點")
+            log(f"    → 多邊形近似結果: {len(approx)} 個頂點")
             
             # 檢查是否為矩形（4個頂點）
             if len(approx) == 4:
                 x, y, w, h = cv2.boundingRect(contour)
                 aspect_ratio = w / h
                 
-                print(f"    → 邊界矩形: ({x}, {y}, {w}, {h}), 長寬比: {aspect_ratio:.2f}")
+                log(f"    → 邊界矩形: ({x}, {y}, {w}, {h}), 長寬比: {aspect_ratio:.2f}")
                 
                 # 檢查長寬比是否合理（卡牌通常接近正方形）
                 if 0.7 < aspect_ratio < 1.5:
                     card_contours.append((x, y, x+w, y+h, area))
-                    print(f"    → ✓ 符合條件，加入候選卡牌 (總數: {len(card_contours)})")
+                    log(f"    → ✓ 符合條件，加入候選卡牌 (總數: {len(card_contours)})")
                 else:
-                    print(f"    → ✗ 長寬比不符合 (0.7 < {aspect_ratio:.2f} < 1.5)")
+                    log(f"    → ✗ 長寬比不符合 (0.7 < {aspect_ratio:.2f} < 1.5)")
             else:
-                print(f"    → ✗ 非矩形 ({len(approx)} 個頂點)")
+                log(f"    → ✗ 非矩形 ({len(approx)} 個頂點)")
         
-        print(f"\n篩選完成，找到 {len(card_contours)} 個候選卡牌")
+        log(f"\n篩選完成，找到 {len(card_contours)} 個候選卡牌")
         
         # 檢查是否找到24張卡牌
         if len(card_contours) == 24:
-            print("✓ 找到正確數量的卡牌 (24張)")
+            log("✓ 找到正確數量的卡牌 (24張)")
             
             # 按位置排序
-            print("開始按位置排序...")
+            log("開始按位置排序...")
             card_contours.sort(key=lambda x: (x[1], x[0]))  # 先按y排序，再按x排序
-            print("排序完成")
+            log("排序完成")
             
             # 驗證網格排列
-            print("開始驗證網格排列...")
-            if self._verify_grid_layout(card_contours):
-                print("✓ 網格排列驗證通過")
-                print("=== 網格檢測成功 ===\n")
+            log("開始驗證網格排列...")
+            if CardDetector._verify_grid_layout(card_contours):
+                log("✓ 網格排列驗證通過")
+                log("=== 網格檢測成功 ===\n")
                 return True, card_contours
             else:
-                print("✗ 網格排列驗證失敗")
+                log("✗ 網格排列驗證失敗")
         else:
-            print(f"✗ 卡牌數量不正確 (需要24張，找到{len(card_contours)}張)")
+            log(f"✗ 卡牌數量不正確 (需要24張，找到{len(card_contours)}張)")
         
-        print("=== 網格檢測失敗 ===\n")
+        log("=== 網格檢測失敗 ===\n")
         return False, []
 
         
-    def _verify_grid_layout(self, positions: List) -> bool:
+    @staticmethod
+    def _verify_grid_layout(positions: List) -> bool:
         """驗證卡牌是否按6x4網格排列"""
         if len(positions) != 24:
             return False
@@ -169,12 +197,23 @@ class CardDetector:
                 
         return True
         
-    def detect_cards(self, frame: np.ndarray) -> Dict:
-        """檢測所有卡牌狀態"""
+    def detect_cards(self, frame: np.ndarray, possible_symbols: Optional[Set[str]] = None,
+                     remembered_symbols: Optional[Dict[str, str]] = None,
+                     certain_symbols: Optional[Dict[str, str]] = None) -> Dict:
+        """檢測所有卡牌狀態
+
+        possible_symbols 為尚未見過的卡牌仍可能出現的符號，remembered_symbols 為記憶中
+        每張卡牌的符號；提供時識別器只比對這些符號，記憶中的符號分數夠高即提前接受。
+        certain_symbols 為已確定符號的卡牌（見 MemoryLogic.get_certain_symbols），
+        這些卡牌翻開時不再識別，直接採用已確定的符號並標記 'from_belief'。
+        """
         if not self.setup_complete:
             return {'error': '系統未校準，請先執行校準'}
             
         cards = {}
+        certain_symbols = certain_symbols or {}
+        flipped_ids = []
+        flipped_regions = []
         
         for i, (x1, y1, x2, y2, _) in enumerate(self.card_positions):
             # 提取卡牌區域
@@ -190,16 +229,37 @@ class CardDetector:
                 'position': (x1, y1, x2, y2),
                 'flipped': is_flipped,
                 'symbol': None,
+                'confidence': 0.0,
+                'uncertain': False,
                 'grid_pos': (i % 6, i // 6)  # (col, row)
             }
             
-            # 如果卡牌翻開，識別符號
-            if is_flipped:
-                symbol = self.symbol_recognizer.recognize_symbol(card_region)
-                card_info['symbol'] = symbol
+            # 已確定符號的卡牌不需識別，其餘翻開的卡牌稍後一次批次識別
+            if is_flipped and f'card_{i}' in certain_symbols:
+                card_info.update(symbol=certain_symbols[f'card_{i}'], confidence=1.0,
+                                 recognition=None, from_belief=True)
+            elif is_flipped:
+                flipped_ids.append(f'card_{i}')
+                flipped_regions.append(card_region)
                 
             cards[f'card_{i}'] = card_info
             
+        # 批次識別所有翻開卡牌的符號
+        if flipped_regions:
+            remembered_symbols = remembered_symbols or {}
+            candidates = None
+            if possible_symbols is not None:
+                candidates = [possible_symbols | {remembered_symbols[card_id]}
+                              if card_id in remembered_symbols else possible_symbols
+                              for card_id in flipped_ids]
+            expected = [remembered_symbols.get(card_id) for card_id in flipped_ids]
+            results = self.symbol_recognizer.recognize_batch(flipped_regions, candidates, expected)
+            for card_id, recognition in zip(flipped_ids, results):
+                cards[card_id]['symbol'] = recognition.symbol
+                cards[card_id]['confidence'] = recognition.score
+                cards[card_id]['uncertain'] = recognition.uncertain
+                cards[card_id]['recognition'] = recognition
+            
         return {'cards': cards, 'timestamp': cv2.getTickCount()}
         
     def _is_card_flipped(self, card_image: np.ndarray) -> bool:
@@ -223,9 +283,10 @@ class CardDetector:
             self.back_template = cv2.resize(back_image, (64, 64))
             
     def get_game_progress(self, cards: Dict) -> Dict:
-        """獲取遊戲進度"""
+        """獲取遊戲進度（翻開的同符號卡牌湊滿 group_size 張即算一組）"""
+        total_pairs = self.grid_size[0] * self.grid_size[1] // self.group_size
         if 'cards' not in cards:
-            return {'progress': 0, 'matched_pairs': 0, 'total_pairs': 12}
+            return {'progress': 0, 'matched_pairs': 0, 'total_pairs': total_pairs}
             
         flipped_cards = [card for card in cards['cards'].values() if card['flipped']]
         
@@ -235,13 +296,13 @@ class CardDetector:
             if card['symbol']:
                 symbol_counts[card['symbol']] = symbol_counts.get(card['symbol'], 0) + 1
                 
-        matched_pairs = sum(1 for count in symbol_counts.values() if count == 2) // 2
-        progress = (matched_pairs / 12) * 100
+        matched_pairs = sum(1 for count in symbol_counts.values() if count == self.group_size)
+        progress = (matched_pairs / total_pairs) * 100
         
         return {
             'progress': progress,
             'matched_pairs': matched_pairs,
-            'total_pairs': 12,
+            'total_pairs': total_pairs,
             'flipped_count': len(flipped_cards),
-            'game_complete': matched_pairs == 12
+            'game_complete': matched_pairs == total_pairs
         }
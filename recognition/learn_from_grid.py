@@ -1,76 +1,162 @@
-from PIL import Image
+#!/usr/bin/env python3
+"""
+由遊戲截圖找出卡牌矩形
+依卡牌背景顏色切出矩形區域，再以最常見的尺寸判斷卡牌數量。
+
+用法: python -m recognition.learn_from_grid [圖像檔案]
+"""
+
+import sys
 import numpy as np
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+from scipy.ndimage import label, find_objects, minimum, maximum
+
+# 卡牌背景顏色（RGB）
+RECT_COLORS = [
+    [195, 165, 115],  # yellowish background
+    [170, 130, 125],  # pinkish background
+    [105, 155, 145],  # greenish background
+    [195, 90, 80],    # red background
+    [65, 45, 35],     # dark background
+    [40, 60, 135]     # blue background
+]
+
+
+def palette_membership(image: np.ndarray, colors: Sequence[Sequence[int]], tolerance: int = 20) -> np.ndarray:
+    """計算每個像素落在哪些顏色的容差內，以位元遮罩表示（第 i 位元對應第 i 個顏色）
+
+    每個通道建立 256 項查找表，記錄該數值落在哪些顏色的容差內，
+    三個通道的遮罩取交集即為完整比對，整張圖只需三次查表。
+    """
+    colors = np.asarray(colors, dtype=np.int32)
+    if len(colors) > 64:
+        raise ValueError(f"調色盤最多 64 種顏色: {len(colors)}")
+    dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+                 if len(colors) <= np.iinfo(dtype).bits)
+
+    values = np.arange(256, dtype=np.int32)[:, None]
+    bits = np.ones(1, dtype=dtype) << np.arange(len(colors), dtype=dtype)
+    mask = None
+    for channel in range(3):
+        inside = np.abs(values - colors[:, channel]) <= tolerance  # 256 x 顏色數
+        lut = np.bitwise_or.reduce(np.where(inside, bits, 0).astype(dtype), axis=1)
+        channel_mask = lut[image[..., channel]]
+        mask = channel_mask if mask is None else mask & channel_mask
+    return mask
+
+
+def quantize_to_palette(image: np.ndarray, colors: Sequence[Sequence[int]], tolerance: int = 20) -> np.ndarray:
+    """將圖像量化為調色盤索引，不符合任何顏色的像素為 -1，多個顏色都符合時取較前面的顏色"""
+    mask = palette_membership(image, colors, tolerance)
+    indices = np.full(image.shape[:2], -1, dtype=np.int8)
+    # 由後往前寫入，多個顏色都符合時留下較前面的顏色（每次只需一層布林遮罩）
+    for index in reversed(range(len(colors))):
+        indices[(mask >> mask.dtype.type(index)) & 1 == 1] = index
+    return indices
+
+
+def find_color_rects(image: np.ndarray, colors: Sequence[Sequence[int]] = RECT_COLORS,
+                     tolerance: int = 20) -> List[Tuple[int, int, int, int]]:
+    """找出所有顏色區塊的外框 (x, y, 寬, 高)
+
+    先將圖像量化為單一的調色盤索引圖（容差重疊的像素歸屬較前面的顏色），
+    再對索引圖做一次連通元件標記，記憶體只需與圖像同大小的一層標記。
+    不同顏色的區塊相鄰時會被標成同一個元件，只在該元件的外框內依顏色分開重新標記。
+    """
+    indices = quantize_to_palette(image, colors, tolerance)
+    labeled, count = label(indices >= 0)
+    if not count:
+        return []
+
+    components = np.arange(1, count + 1)
+    lowest = minimum(indices, labeled, components)
+    highest = maximum(indices, labeled, components)
 
-# Load image and convert to numpy array
-image = Image.open('image.png')
-image_np = np.array(image)
-
-# If image has alpha channel, remove it
-if image_np.shape[2] == 4:
-    image_np = image_np[:,:,:3]
-
-def find_rects_by_color(img, target_color, tolerance=30):
-    """Find bounding boxes of rectangular regions close to the target_color."""
-    from scipy.ndimage import label, find_objects
-    
-    mask = ((img >= np.array(target_color) - tolerance) & 
-            (img <= np.array(target_color) + tolerance)).all(axis=-1)
-    # Label connected components
-    labeled, num_features = label(mask)
-    slices = find_objects(labeled)
     rects = []
-    for slc in slices:
-        y1, y2 = slc[0].start, slc[0].stop
-        x1, x2 = slc[1].start, slc[1].stop
-        rects.append((x1, y1, x2 - x1, y2 - y1))
+    for component, slc in enumerate(find_objects(labeled), 1):
+        if lowest[component - 1] == highest[component - 1]:
+            rects.append(_slice_rect(slc))
+            continue
+        region = indices[slc]
+        inside = labeled[slc] == component
+        for color in np.unique(region[inside]):
+            sub_labeled, _ = label(inside & (region == color))
+            for sub in find_objects(sub_labeled):
+                x, y, w, h = _slice_rect(sub)
+                rects.append((x + slc[1].start, y + slc[0].start, w, h))
     return rects
 
-# Finding rectangular regions by color analysis
-rect_colors = [
-    [195, 165, 115], # yellowish background
-    [170, 130, 125], # pinkish background
-    [105, 155, 145], # greenish background
-    [195, 90, 80],   # red background
-    [65, 45, 35],    # dark background
-    [40, 60, 135]    # blue background
-]
 
-all_rects = []
-for color in rect_colors:
-    rects = find_rects_by_color(image_np, color, tolerance=20)
-    all_rects.extend(rects)
-
-# Count sizes for all rectangles
-sizes = [(w, h) for _, _, w, h in all_rects]
-
-# Count occurrences
-from collections import Counter
-size_counts = Counter(sizes)
-
-# Tolerance for similar sizes
-tolerance = 3
-
-def are_similar(size1, size2, tol):
-    return abs(size1[0] - size2[0]) <= tol and abs(size1[1] - size2[1]) <= tol
-
-# Group similar sizes
-group_counts = {}
-unique_sizes = list(size_counts.keys())
-for base_size in unique_sizes:
-    group_count = sum(count for size, count in size_counts.items() 
-                     if are_similar(size, base_size, tolerance))
-    group_counts[base_size] = group_count
-
-max_group_count = max(group_counts.values())
-most_common_groups = [size for size, count in group_counts.items() 
-                     if count == max_group_count]
-
-# Count rectangles in the most common size group
-count_rects = 0
-for size in sizes:
-    if any(are_similar(size, group, tolerance) for group in most_common_groups):
-        count_rects += 1
-
-print(f"Number of rectangles with highest occurrence size: {count_rects}")
-print(f"Most common size(s): {most_common_groups}")
-print(f"Occurrence count: {max_group_count}")
+def _slice_rect(slc: Tuple[slice, slice]) -> Tuple[int, int, int, int]:
+    """將 find_objects 的切片轉為外框 (x, y, 寬, 高)"""
+    return slc[1].start, slc[0].start, slc[1].stop - slc[1].start, slc[0].stop - slc[0].start
+
+
+def _similar_neighbours(size_counts: Dict[Tuple[int, int], int], tolerance: int):
+    """以 (容差 + 1) 為格寬將尺寸分格，相似尺寸只可能出現在相鄰的 3x3 格中"""
+    cell = tolerance + 1
+    bins = defaultdict(list)
+    for size in size_counts:
+        bins[(size[0] // cell, size[1] // cell)].append(size)
+
+    def neighbours(size: Tuple[int, int]) -> Iterable[Tuple[int, int]]:
+        cx, cy = size[0] // cell, size[1] // cell
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in bins.get((cx + dx, cy + dy), ()):
+                    if abs(other[0] - size[0]) <= tolerance and abs(other[1] - size[1]) <= tolerance:
+                        yield other
+    return neighbours
+
+
+def group_rect_sizes(rects: List[Tuple[int, int, int, int]], tolerance: int = 3) -> Dict:
+    """統計最常見的矩形尺寸
+
+    每個尺寸的群組數量為寬高都在容差內的矩形總數，返回數量最多的尺寸、
+    其數量，以及尺寸與這些最常見尺寸相似的矩形數。
+    """
+    size_counts = Counter((w, h) for _, _, w, h in rects)
+    if not size_counts:
+        return {'count': 0, 'most_common_sizes': [], 'occurrence': 0}
+
+    neighbours = _similar_neighbours(size_counts, tolerance)
+    group_counts = {size: sum(size_counts[other] for other in neighbours(size)) for size in size_counts}
+
+    max_group_count = max(group_counts.values())
+    most_common = [size for size, count in group_counts.items() if count == max_group_count]
+
+    # 與任一最常見尺寸相似的矩形數
+    common_neighbours = _similar_neighbours(dict.fromkeys(most_common, 1), tolerance)
+    count = sum(size_count for size, size_count in size_counts.items()
+                if any(True for _ in common_neighbours(size)))
+
+    return {'count': count, 'most_common_sizes': most_common, 'occurrence': max_group_count}
+
+
+def learn_from_grid(image: np.ndarray, colors: Sequence[Sequence[int]] = RECT_COLORS,
+                    color_tolerance: int = 20, size_tolerance: int = 3) -> Dict:
+    """由 RGB 截圖找出卡牌矩形並統計最常見的卡牌尺寸"""
+    if image.ndim == 3 and image.shape[2] == 4:
+        image = image[:, :, :3]  # 移除 alpha 通道
+    rects = find_color_rects(image, colors, color_tolerance)
+    result = group_rect_sizes(rects, size_tolerance)
+    result['rects'] = rects
+    return result
+
+
+def main():
+    """命令列工具"""
+    from PIL import Image
+
+    image_path = sys.argv[1] if len(sys.argv) > 1 else 'image.png'
+    result = learn_from_grid(np.array(Image.open(image_path)))
+
+    print(f"Number of rectangles with highest occurrence size: {result['count']}")
+    print(f"Most common size(s): {result['most_common_sizes']}")
+    print(f"Occurrence count: {result['occurrence']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
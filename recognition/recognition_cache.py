@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Dict, FrozenSet
+from recognition.recognition_result import RecognitionResult
+
+HASH_SIZE = 8  # 8x8 差異哈希，共 64 位元
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """計算已正規化卡牌圖像的差異哈希（dHash），回傳 64 位元整數"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class RecognitionCache:
+    """識別結果快取 - 以感知哈希為鍵，支援漢明距離容差與 LRU 淘汰"""
+
+    def __init__(self, max_size: int = 256, hamming_tolerance: int = 4):
+        self.max_size = max_size
+        self.hamming_tolerance = hamming_tolerance
+        self._entries = OrderedDict()  # 哈希 -> (識別結果, 候選範圍)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_hash: int, scope: Optional[FrozenSet[str]] = None) -> Optional[RecognitionResult]:
+        """查詢快取，找不到或結果不適用於候選範圍時返回 None
+
+        scope 為本次識別允許的符號集合（None 表示全部）。在範圍 S1 下算出的結果，
+        只要新的範圍 S2 是 S1 的子集且仍包含該符號，最佳匹配就不會改變。
+        """
+        key = image_hash if image_hash in self._entries else self._find_near(image_hash)
+
+        if key is not None:
+            result, entry_scope = self._entries[key]
+            if not self._scope_valid(result, entry_scope, scope):
+                key = None
+
+        if key is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, image_hash: int, result: RecognitionResult,
+            scope: Optional[FrozenSet[str]] = None):
+        """寫入快取，超過容量時淘汰最久未使用的項目"""
+        if self.max_size <= 0:
+            return
+
+        self._entries[image_hash] = (result, scope)
+        self._entries.move_to_end(image_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _scope_valid(result: RecognitionResult, entry_scope: Optional[FrozenSet[str]],
+                     scope: Optional[FrozenSet[str]]) -> bool:
+        """檢查快取結果是否適用於新的候選範圍"""
+        if scope is None:
+            return entry_scope is None
+        if entry_scope is not None and not scope <= entry_scope:
+            return False
+        return result.symbol is None or result.symbol in scope
+
+    def _find_near(self, image_hash: int) -> Optional[int]:
+        """尋找漢明距離在容差內最接近的項目"""
+        if self.hamming_tolerance <= 0:
+            return None
+
+        best_key = None
+        best_distance = self.hamming_tolerance + 1
+        for key in self._entries:
+            distance = (key ^ image_hash).bit_count()
+            if distance < best_distance:
+                best_key = key
+                best_distance = distance
+        return best_key
+
+    def clear(self):
+        """清除所有快取項目（模板變更時呼叫）"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """獲取快取統計資訊"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,72 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class RecognitionResult:
+    """單張卡牌的識別結果
+
+    symbol 為通過閾值的符號（否則為 None），top_k 為分數最高的候選 (符號, 分數)，
+    margin 為最佳與次佳分數之差，uncertain 表示結果不可靠、值得重新確認。
+    partial 表示只比對了部分候選（例如預期符號提前接受），top_k 與 margin 不含其他符號的分數。
+    """
+    symbol: Optional[str] = None
+    score: float = 0.0
+    margin: float = 0.0
+    top_k: Tuple[Tuple[str, float], ...] = field(default_factory=tuple)
+    uncertain: bool = True
+    partial: bool = False
+
+    @property
+    def best_label(self) -> Optional[str]:
+        """分數最高的符號（不論是否通過閾值）"""
+        return self.top_k[0][0] if self.top_k else self.symbol
+
+    def to_dict(self) -> Dict:
+        """轉為字典，方便記錄或序列化"""
+        return {
+            'symbol': self.symbol,
+            'score': self.score,
+            'margin': self.margin,
+            'top_k': [list(item) for item in self.top_k],
+            'uncertain': self.uncertain,
+            'partial': self.partial
+        }
+
+
+def results_from_scores(names: Sequence[str], scores: np.ndarray, columns: np.ndarray,
+                        threshold_for: Callable[[str], float], top_k: int = 3,
+                        uncertain_margin: float = 0.1) -> List[RecognitionResult]:
+    """由分數矩陣建立識別結果
+
+    scores 與 columns 皆為 卡牌數 x 候選數，columns 為每一欄對應的名稱索引；
+    分數為 -2 的欄位代表不在候選範圍內。
+    """
+    results = []
+    if scores.shape[1] == 0:
+        return [RecognitionResult() for _ in range(scores.shape[0])]
+
+    # 至少取前兩名以計算差距
+    k = min(max(top_k, 2), scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    for row in range(scores.shape[0]):
+        order = top[row][np.argsort(-scores[row, top[row]])]
+        ranked = tuple((names[columns[row, col]], float(scores[row, col]))
+                       for col in order if scores[row, col] > -2.0)
+        if not ranked:
+            results.append(RecognitionResult())
+            continue
+
+        label, score = ranked[0]
+        runner_up = max(ranked[1][1], 0.0) if len(ranked) > 1 else 0.0
+        margin = score - runner_up
+        symbol = label if score > threshold_for(label) else None
+        results.append(RecognitionResult(
+            symbol=symbol,
+            score=score,
+            margin=margin,
+            top_k=ranked[:top_k],
+            uncertain=symbol is None or margin < uncertain_margin
+        ))
+    return results
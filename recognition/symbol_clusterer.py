@@ -0,0 +1,67 @@
+import numpy as np
+from typing import Dict, Tuple
+from recognition.symbol_descriptor import compute_descriptor, DESCRIPTOR_LENGTH
+
+
+class OnlineSymbolClusterer:
+    """線上符號分群器 - 沒有模板時為未標記的符號提供穩定的識別碼
+
+    每張卡牌的描述子分配給最近的群中心，距離太遠且尚未達到群數上限時開新群，
+    群中心以遞增平均更新。每次查詢只需 O(群數) 的計算。
+    """
+
+    def __init__(self, max_clusters: int = 12, join_threshold: float = 0.9):
+        self.max_clusters = max_clusters  # 上限為遊戲板上的配對數
+        self.join_threshold = join_threshold  # 相似度達此值即併入既有群
+        self.centroids = np.zeros((max_clusters, DESCRIPTOR_LENGTH), dtype=np.float32)
+        self.counts = np.zeros(max_clusters, dtype=np.int64)
+        self.num_clusters = 0
+
+    @staticmethod
+    def cluster_name(index: int) -> str:
+        """群編號對應的符號名稱"""
+        return f"cluster_{index + 1}"
+
+    def assign(self, descriptor: np.ndarray) -> Tuple[str, float]:
+        """將描述子分配到群，返回 (符號名稱, 相似度)"""
+        if self.num_clusters:
+            similarities = self.centroids[:self.num_clusters] @ descriptor
+            best = int(np.argmax(similarities))
+            best_similarity = float(similarities[best])
+        else:
+            best, best_similarity = -1, -1.0
+
+        # 與所有群都不夠相似，且仍可開新群
+        if best_similarity < self.join_threshold and self.num_clusters < self.max_clusters:
+            best = self.num_clusters
+            self.num_clusters += 1
+            self.centroids[best] = descriptor
+            self.counts[best] = 1
+            return self.cluster_name(best), 1.0
+
+        # 遞增更新群中心並保持單位長度
+        self.counts[best] += 1
+        centroid = self.centroids[best] + (descriptor - self.centroids[best]) / self.counts[best]
+        norm = np.linalg.norm(centroid)
+        if norm > 0:
+            centroid /= norm
+        self.centroids[best] = centroid
+        return self.cluster_name(best), best_similarity
+
+    def assign_image(self, symbol_image: np.ndarray) -> Tuple[str, float]:
+        """計算卡牌圖像描述子後分群"""
+        return self.assign(compute_descriptor(symbol_image))
+
+    def reset(self):
+        """清除所有群"""
+        self.centroids[:] = 0
+        self.counts[:] = 0
+        self.num_clusters = 0
+
+    def get_stats(self) -> Dict:
+        """獲取分群統計資訊"""
+        return {
+            'num_clusters': self.num_clusters,
+            'max_clusters': self.max_clusters,
+            'cluster_sizes': self.counts[:self.num_clusters].tolist()
+        }
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+from typing import List, Dict
+from recognition.recognition_result import RecognitionResult, results_from_scores
+
+DESCRIPTOR_SIZE = (32, 32)  # 描述子計算使用的縮小尺寸
+HUE_BINS, SAT_BINS, VAL_BINS = 8, 3, 3
+HIST_BINS = HUE_BINS * SAT_BINS * VAL_BINS
+SHAPE_WEIGHT = 0.5  # 形狀矩相對於顏色直方圖的權重
+HU_MOMENTS = 4  # 只取前四個 Hu 矩，高階矩在輕微位移下會變號
+DESCRIPTOR_LENGTH = HIST_BINS + HU_MOMENTS
+
+
+def compute_descriptor(image: np.ndarray) -> np.ndarray:
+    """將卡牌圖像轉為固定長度的描述子向量（聯合量化 HSV 直方圖 + Hu 矩）
+
+    向量為單位長度，兩個描述子的內積即為相似度
+    """
+    small = cv2.resize(image, DESCRIPTOR_SIZE, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.int32)
+
+    # 聯合量化 HSV 直方圖，取平方根使內積等同 Bhattacharyya 係數
+    h = hsv[:, 0] * HUE_BINS // 180
+    s = hsv[:, 1] * SAT_BINS // 256
+    v = hsv[:, 2] * VAL_BINS // 256
+    hist = np.bincount((h * SAT_BINS + s) * VAL_BINS + v, minlength=HIST_BINS)
+    hist = np.sqrt(hist / hist.sum()).astype(np.float32)
+
+    # Hu 矩描述符號形狀，取對數壓縮數值範圍
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    hu = cv2.HuMoments(cv2.moments(gray)).ravel()[:HU_MOMENTS]
+    hu = -np.log10(np.abs(hu) + 1e-30)
+    shape = (np.clip(hu, -30, 30) / 30 * SHAPE_WEIGHT).astype(np.float32)
+
+    descriptor = np.concatenate([hist, shape])
+    return descriptor / np.linalg.norm(descriptor)
+
+
+class DescriptorIndex:
+    """描述子最近鄰索引 - 所有模板描述子存於單一矩陣，以向量化方式查詢"""
+
+    def __init__(self, names: List[str], descriptors: np.ndarray, reject_threshold: float = 0.9):
+        self.names = list(names)
+        self.matrix = np.asarray(descriptors, dtype=np.float32).reshape(-1, DESCRIPTOR_LENGTH)
+        self.reject_threshold = reject_threshold
+
+    @classmethod
+    def from_templates(cls, templates: Dict[str, np.ndarray], reject_threshold: float = 0.9):
+        """由模板圖像字典建立索引"""
+        names = list(templates.keys())
+        descriptors = np.stack([compute_descriptor(templates[name]) for name in names]) \
+            if names else np.empty((0, DESCRIPTOR_LENGTH), dtype=np.float32)
+        return cls(names, descriptors, reject_threshold)
+
+    def scores(self, query_descriptors: np.ndarray) -> np.ndarray:
+        """計算查詢描述子對所有模板的相似度矩陣（查詢數 x 模板數）"""
+        return np.atleast_2d(query_descriptors) @ self.matrix.T
+
+    def query(self, query_descriptors: np.ndarray, top_k: int = 3) -> List[RecognitionResult]:
+        """最近鄰查詢，相似度未超過拒絕閾值時 symbol 為 None"""
+        scores = self.scores(query_descriptors)
+        columns = np.broadcast_to(np.arange(len(self.names)), scores.shape)
+        return results_from_scores(self.names, scores, columns,
+                                   lambda name: self.reject_threshold, top_k)
+
+    def __len__(self):
+        return len(self.names)
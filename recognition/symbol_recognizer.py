@@ -1,13 +1,28 @@
 import cv2
 import numpy as np
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, Iterable, FrozenSet
 import os
+import threading
 from pathlib import Path
+from recognition.recognition_cache import RecognitionCache, perceptual_hash
+from recognition.symbol_descriptor import DescriptorIndex, compute_descriptor
+from recognition.symbol_clusterer import OnlineSymbolClusterer
+from recognition.recognition_result import RecognitionResult, results_from_scores
+from recognition.template_writer import TemplateWriter
+from recognition.template_watcher import TemplateWatcher
+from recognition.template_bank import (
+    TemplateBank, MatchingMode, DEFAULT_MATCHING_MODE, BANK_FILENAME, TEMPLATE_SIZE,
+    THUMBNAIL_SIZE, bank_is_augmented, is_bank_stale, normalize_for_matching, prepare_for_matching
+)
+
+RECOGNITION_MODES = ('ncc', 'descriptor')
+
 
 class SymbolRecognizer:
     """符號識別器 - 使用模板匹配識別翻翻樂符號，具備持久性學習功能"""
     
-    def __init__(self, template_dir: str = "templates"):
+    def __init__(self, template_dir: str = "templates", cache_size: int = 256,
+                 cache_tolerance: int = 4, max_clusters: int = 12):
         self.template_dir = template_dir
         self.templates = {}
         self.symbol_names = [
@@ -16,17 +31,86 @@ class SymbolRecognizer:
             'yellow_mask', 'blue_mask', 'red_bottle'
         ]
         self.match_threshold = 0.7
+        self.symbol_thresholds = {}  # 個別符號的匹配閾值，未設定時使用 match_threshold
+        self._top_k = 3  # 識別結果保留的候選數
+        self._uncertain_margin = 0.1  # 最佳與次佳分數差距低於此值視為不確定
+        self.recognition_mode = 'ncc'  # 'ncc' 模板相關匹配 / 'descriptor' 描述子最近鄰
+        self._descriptor_threshold = 0.9
+        self.matching_mode = DEFAULT_MATCHING_MODE  # 模板匹配的解析度、通道與內縮裁切
+        self.bank_path = str(Path(template_dir) / BANK_FILENAME)
+        self.auto_build_bank = False  # 是否寫入打包模板庫（見 enable_bank_writing，預設不改動模板目錄）
+        self.augment_bank = False  # 自動建立模板庫時是否加入光照與旋轉變體
+        # 串接識別：模板數超過此值時，先以縮圖挑出前 k 個候選再做完整相關匹配
+        self.cascade_min_templates = 200
+        self.cascade_top_k = 8
+        self.early_accept_threshold = 0.9  # 預期符號分數達此值即提前接受
+        self._bank = None  # 目前使用的模板庫快照（延遲建立）
+        self._descriptor_index = None
+        self.recognition_cache = RecognitionCache(cache_size, cache_tolerance)
+        self.template_writer = TemplateWriter(template_dir)  # 背景批次保存學習到的模板
+        self.template_watcher = None  # 選用的模板目錄熱更新監看器
+        self._staged_templates = []  # 監看器送出、等待下一幀套用的變更 (已計算的模板列或 None, 模板圖像, 刪除名稱)
+        self._staged_lock = threading.Lock()
+        self.symbol_clusterer = OnlineSymbolClusterer(max_clusters)  # 沒有模板時使用
         self.load_templates()  # 初始化時自動載入所有已保存的模板
 
+    @property
+    def top_k(self) -> int:
+        """識別結果保留的候選數"""
+        return self._top_k
+
+    @top_k.setter
+    def top_k(self, value: int):
+        """變更候選數，已快取的識別結果隨之失效"""
+        self._top_k = value
+        self.recognition_cache.clear()
+
+    @property
+    def uncertain_margin(self) -> float:
+        """最佳與次佳分數差距低於此值視為不確定"""
+        return self._uncertain_margin
+
+    @uncertain_margin.setter
+    def uncertain_margin(self, value: float):
+        """變更不確定差距，已快取的識別結果隨之失效"""
+        self._uncertain_margin = value
+        self.recognition_cache.clear()
+
+    @property
+    def descriptor_threshold(self) -> float:
+        """描述子模式的拒絕閾值"""
+        return self._descriptor_threshold
+
+    @descriptor_threshold.setter
+    def descriptor_threshold(self, value: float):
+        """變更描述子拒絕閾值，已快取的識別結果隨之失效"""
+        self._descriptor_threshold = value
+        self.recognition_cache.clear()
+
     def load_templates(self):
-        """載入符號模板圖像，從指定模板目錄讀取所有模板文件"""
+        """載入符號模板，優先以記憶體映射開啟打包模板庫，否則從模板目錄讀取 PNG"""
+        self.template_writer.flush()  # 先寫入尚未保存的學習模板，避免重新載入時遺失
         template_path = Path(self.template_dir)
         self.templates.clear()
+        self._invalidate_templates()
         
         if not template_path.exists():
             print(f"模板目錄 {self.template_dir} 不存在，將使用實時學習模式")
             return
         
+        # 沿用既有打包模板庫的擴增設定，過期重建時不會遺失 --augment 建立的變體
+        if bank_is_augmented(self.bank_path):
+            self.augment_bank = True
+        
+        # 打包模板庫仍有效時直接映射，不需解碼 PNG
+        if not is_bank_stale(self.template_dir, self.bank_path):
+            try:
+                self.set_template_bank(TemplateBank.load(self.bank_path))
+                print(f"已從打包模板庫載入 {len(self._bank)} 個符號模板")
+                return
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠ 打包模板庫讀取失敗，改為讀取 PNG：{e}")
+        
         # 載入目錄中的所有 PNG 模板文件
         loaded_count = 0
         for file in template_path.glob('*.png'):
@@ -37,25 +121,105 @@ class SymbolRecognizer:
                 loaded_count += 1
         
         print(f"已載入 {loaded_count} 個符號模板")
+        
+        # 重建打包模板庫（啟用寫入時由背景存檔，下次啟動即可直接映射）
+        if self.templates:
+            bank = self._get_bank()
+            if self.auto_build_bank:
+                self.template_writer.save_bank(bank, self.bank_path)
+
+    def enable_bank_writing(self):
+        """啟用打包模板庫的寫入：模板庫過期時立即在背景重建，之後學習或熱更新的模板也一併寫入
+
+        預設不寫入，建立識別器（例如測試或基準測試）不會改動模板目錄；主程式啟動時呼叫。
+        """
+        self.auto_build_bank = True
+        if self.templates and is_bank_stale(self.template_dir, self.bank_path):
+            self.template_writer.save_bank(self._get_bank(), self.bank_path)
+
+    def set_template_bank(self, bank: TemplateBank):
+        """替換目前的模板庫，模板字典直接引用模板庫中的圖像
+
+        識別時每次只讀取一次模板庫參照，模板字典也整個替換而非原地修改，因此替換是原子性的。
+        """
+        self._bank = bank
+        self.templates = dict(zip(bank.names, bank.images))
+        self._descriptor_index = None
+        self.recognition_cache.clear()
+
+    def start_template_watcher(self, interval: float = 1.0):
+        """啟動模板目錄熱更新：新增、修改或刪除的 PNG 會在下一幀自動套用，不需重新啟動"""
+        if self.template_watcher is None:
+            self.template_watcher = TemplateWatcher(self.template_dir, self._on_templates_changed, interval)
+        self.template_watcher.interval = interval
+        self.template_watcher.start()
+
+    def stop_template_watcher(self):
+        """停止模板目錄熱更新"""
+        if self.template_watcher is not None:
+            self.template_watcher.stop()
+
+    def _on_templates_changed(self, updates: Dict[str, np.ndarray], removed: Iterable[str]):
+        """監看器回呼（背景執行緒）：只為變動的模板計算特徵，留待下一幀套用
+
+        只讀取目前已建立的模板庫參照，不在這裡建立模板庫（self.templates 可能正被畫面執行緒的
+        learn_symbol 修改）；模板庫尚未建立時只送出模板圖像，由畫面執行緒計算。
+        """
+        bank = self._bank
+        removed = set(removed)
+        rows = None
+        if bank is not None:
+            # 略過內容未變的模板（例如本身學習後由背景寫入的 PNG）
+            updates = {
+                name: image for name, image in updates.items()
+                if name not in bank.index or
+                not np.array_equal(bank.images[bank.index[name]], cv2.resize(image, TEMPLATE_SIZE))
+            }
+            removed = {name for name in removed if name in bank.index}
+            if not updates and not removed:
+                return
+            rows = TemplateBank.from_images(updates, augment=bank.has_variants)
+        with self._staged_lock:
+            self._staged_templates.append((rows, updates, removed))
+
+    def _apply_staged_templates(self):
+        """在兩幀之間套用監看器已計算好的模板列，識別永遠只看到完整的模板庫"""
+        with self._staged_lock:
+            staged, self._staged_templates = self._staged_templates, []
+
+        bank = self._get_bank()
+        for rows, updates, removed in staged:
+            removed = {name for name in removed if name in bank.index}
+            if rows is None or rows.has_variants != bank.has_variants:
+                # 監看器沒有可比對的模板庫，或計算期間模板庫類型已改變，改為在這裡計算
+                bank = bank.with_templates(updates, removed)
+            else:
+                bank = bank.merged(rows, removed)
+            print(f"✓ 模板已熱更新：新增或修改 {len(updates)} 個，刪除 {len(removed)} 個")
+        self.set_template_bank(bank)
+        if self.auto_build_bank:
+            self.template_writer.save_bank(bank, self.bank_path)
 
     def learn_symbol(self, symbol_image: np.ndarray, symbol_name: str):
-        """學習新符號並將模板保存到檔案系統"""
+        """學習新符號：立即更新記憶體中的模板，PNG 與打包模板庫由背景執行緒寫入"""
         if symbol_image is not None and symbol_image.size > 0:
             # 調整圖像尺寸並加入記憶體模板
-            resized_image = cv2.resize(symbol_image, (64, 64))
-            self.templates[symbol_name] = resized_image
-            
-            # 確保模板目錄存在
-            Path(self.template_dir).mkdir(parents=True, exist_ok=True)
-            
-            # 將新學習的符號保存為 PNG 文件
-            save_path = Path(self.template_dir) / f"{symbol_name}.png"
-            success = cv2.imwrite(str(save_path), resized_image)
-            
-            if success:
-                print(f"✓ 已保存新符號模板：{save_path}")
+            resized_image = cv2.resize(symbol_image, TEMPLATE_SIZE)
+            if self._bank is not None:
+                # 只重新計算新符號這一列
+                self.set_template_bank(self._bank.with_templates({symbol_name: resized_image}))
             else:
-                print(f"✗ 保存符號模板失敗：{save_path}")
+                self.templates[symbol_name] = resized_image
+                self._invalidate_templates()
+
+            # 排入背景寫入，不阻塞識別
+            self.template_writer.save(symbol_name, resized_image)
+            if self.auto_build_bank and self._bank is not None:
+                self.template_writer.save_bank(self._bank, self.bank_path)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有學習到的模板寫入磁碟（程式結束前呼叫），逾時返回 False"""
+        return self.template_writer.flush(timeout)
 
     def extract_symbol_features(self, symbol_image: np.ndarray) -> Dict:
         """提取符號特徵"""
@@ -102,31 +266,254 @@ class SymbolRecognizer:
         # 綜合評分
         return (hist_score * 0.7 + color_score * 0.3)
 
-    def recognize_symbol(self, symbol_image: np.ndarray) -> Optional[str]:
-        """識別符號"""
+    def _invalidate_templates(self):
+        """模板變更後丟棄已建立的模板庫與識別快取"""
+        self._bank = None
+        self._descriptor_index = None
+        self.recognition_cache.clear()
+
+    def set_recognition_mode(self, mode: str):
+        """切換識別模式（'ncc' 或 'descriptor'）"""
+        if mode not in RECOGNITION_MODES:
+            raise ValueError(f"未知的識別模式: {mode}")
+        self.recognition_mode = mode
+        self.recognition_cache.clear()
+
+    def set_matching_mode(self, resolution: int = TEMPLATE_SIZE[0], channels: str = 'bgr',
+                          inset: float = 0.0):
+        """設定模板匹配的解析度、通道（'bgr'、'gray'、'chroma_a'、'chroma_b'）與內縮裁切比例
+
+        降低解析度或只用單一通道可大幅減少運算量；設定無效時拋出 ValueError
+        """
+        self.matching_mode = MatchingMode(resolution, channels, inset)
+        self.recognition_cache.clear()
+
+    def get_threshold(self, symbol_name: str) -> float:
+        """取得符號的匹配閾值"""
+        return self.symbol_thresholds.get(symbol_name, self.match_threshold)
+
+    def get_descriptor_threshold(self, symbol_name: str) -> float:
+        """取得符號在描述子模式的閾值（個別符號閾值優先，否則為 descriptor_threshold）"""
+        return self.symbol_thresholds.get(symbol_name, self.descriptor_threshold)
+
+    def set_symbol_threshold(self, symbol_name: str, threshold: Optional[float]):
+        """設定個別符號的匹配閾值，None 表示恢復使用預設閾值"""
+        if threshold is None:
+            self.symbol_thresholds.pop(symbol_name, None)
+        else:
+            self.symbol_thresholds[symbol_name] = threshold
+        self.recognition_cache.clear()
+
+    def _get_bank(self) -> TemplateBank:
+        """取得目前的模板庫（延遲由模板字典建立）"""
+        if self._bank is None:
+            self._bank = TemplateBank.from_images(self.templates, augment=self.augment_bank)
+        return self._bank
+
+    def _get_descriptor_index(self) -> DescriptorIndex:
+        """取得模板描述子索引（使用模板庫中預先計算的描述子）"""
+        if self._descriptor_index is None:
+            bank = self._get_bank()
+            self._descriptor_index = DescriptorIndex(bank.names, bank.descriptors)
+        self._descriptor_index.reject_threshold = self.descriptor_threshold
+        return self._descriptor_index
+
+    def get_symbol_names(self) -> List[str]:
+        """目前模板庫中的所有符號名稱"""
+        return list(self._get_bank().names) if self.templates else []
+
+    def recognize_batch(self, symbol_images: List[np.ndarray],
+                        candidates: Optional[List[Optional[Iterable[str]]]] = None,
+                        expected: Optional[List[Optional[str]]] = None) -> List[RecognitionResult]:
+        """一次識別多張卡牌：以單次矩陣乘法計算所有卡牌對所有模板的分數
+
+        candidates 為每張卡牌允許的符號集合（None 表示不限制），只對這些模板計算分數；
+        expected 為每張卡牌預期的符號（例如記憶中的符號），分數超過提前接受門檻即不再比對其他模板。
+        回傳每張卡牌的 RecognitionResult（前 k 名候選、最佳與次佳分數之差與是否不確定）
+        """
+        if self._staged_templates:
+            self._apply_staged_templates()
+
+        results = [RecognitionResult() for _ in symbol_images]
+        scopes = self._candidate_scopes(len(symbol_images), candidates)
+
+        # 先查詢快取，只有未命中的卡牌需要重新計算
+        pending = []
+        pending_images = []
+        pending_hashes = []
+        for i, image in enumerate(symbol_images):
+            if image is None or image.size == 0:
+                continue
+            resized = cv2.resize(image, TEMPLATE_SIZE)
+            image_hash = perceptual_hash(resized)
+            cached = self.recognition_cache.get(image_hash, scopes[i])
+            if cached is not None:
+                results[i] = cached
+                continue
+            pending.append(i)
+            pending_images.append(resized)
+            pending_hashes.append(image_hash)
+
+        if not pending:
+            return results
+
+        matched = self._match_templates(
+            pending_images,
+            [scopes[i] for i in pending],
+            [expected[i] for i in pending] if expected else None
+        )
+        for i, result in zip(pending, matched):
+            results[i] = result
+        # 提前接受的結果沒有比對其他候選，不寫入快取，之後的查詢才能取得完整的前 k 名
+        for i, image_hash in zip(pending, pending_hashes):
+            if not results[i].partial:
+                self.recognition_cache.put(image_hash, results[i], scopes[i])
+
+        return results
+
+    def _candidate_scopes(self, count: int,
+                          candidates: Optional[List[Optional[Iterable[str]]]]) -> List[Optional[FrozenSet[str]]]:
+        """整理每張卡牌的候選符號範圍，沒有模板或候選為空時不限制"""
+        if candidates is None or not self.templates:
+            return [None] * count
+        scopes = []
+        for allowed in candidates:
+            allowed = frozenset(allowed) if allowed is not None else None
+            # 候選為空代表記憶與畫面矛盾，改為比對全部模板較安全
+            scopes.append(allowed if allowed else None)
+        return scopes
+
+    def _match_templates(self, symbol_images: List[np.ndarray],
+                         scopes: Optional[List[Optional[FrozenSet[str]]]] = None,
+                         expected: Optional[List[Optional[str]]] = None) -> List[RecognitionResult]:
+        """對已調整尺寸的卡牌圖像計算模板匹配結果"""
+        results = [RecognitionResult() for _ in symbol_images]
+        scopes = scopes or [None] * len(symbol_images)
+
+        # 沒有模板時以線上分群提供穩定的識別碼
+        if not self.templates:
+            for row, image in enumerate(symbol_images):
+                symbol, score = self.symbol_clusterer.assign_image(image)
+                results[row] = RecognitionResult(symbol=symbol, score=score, margin=score,
+                                                 top_k=((symbol, score),), uncertain=False)
+            return results
+
+        # 描述子模式：小型向量最近鄰查詢，候選範圍與個別符號閾值與模板模式相同
+        if self.recognition_mode == 'descriptor':
+            return self._match_descriptors(symbol_images, scopes)
+
+        bank = self._get_bank()
+        mode = self.matching_mode
+        vectors = bank.scoring_vectors(mode)  # 擴增模板庫為所有變體
+        crops = np.stack([prepare_for_matching(image, mode) for image in symbol_images])
+
+        # 提前接受：預期符號的分數已經夠高時不再比對其他模板
+        remaining = list(range(len(symbol_images)))
+        if expected:
+            remaining = []
+            for row, symbol in enumerate(expected):
+                idx = bank.index.get(symbol) if symbol is not None else None
+                if idx is None or (scopes[row] is not None and symbol not in scopes[row]):
+                    remaining.append(row)
+                    continue
+                score = float((vectors[bank.symbol_rows(idx)] @ crops[row]).max())
+                if score >= max(self.early_accept_threshold, self.get_threshold(symbol)):
+                    # 未計算其他模板，以超出匹配閾值的幅度作為差距
+                    margin = score - self.get_threshold(symbol)
+                    results[row] = RecognitionResult(symbol=symbol, score=score, margin=margin,
+                                                     top_k=((symbol, score),),
+                                                     uncertain=margin < self.uncertain_margin, partial=True)
+                else:
+                    remaining.append(row)
+            if not remaining:
+                return results
+
+        scores, columns = self._score_templates(
+            bank, vectors, [symbol_images[row] for row in remaining], crops[remaining],
+            [scopes[row] for row in remaining]
+        )
+        matched = results_from_scores(bank.names, scores, columns, self.get_threshold,
+                                      self.top_k, self.uncertain_margin)
+        for row, result in zip(remaining, matched):
+            results[row] = result
+
+        return results
+
+    def _match_descriptors(self, symbol_images: List[np.ndarray],
+                           scopes: List[Optional[FrozenSet[str]]]) -> List[RecognitionResult]:
+        """以描述子最近鄰識別，不在候選範圍內的符號分數為 -2
+
+        描述子查詢本身很便宜，因此不做預期符號的提前接受，永遠返回完整的前 k 名。
+        """
+        index = self._get_descriptor_index()
+        descriptors = np.stack([compute_descriptor(image) for image in symbol_images])
+        scores = index.scores(descriptors)
+        for row, scope in enumerate(scopes):
+            if scope is not None:
+                scores[row, [name not in scope for name in index.names]] = -2.0
+        columns = np.broadcast_to(np.arange(len(index)), scores.shape)
+        return results_from_scores(index.names, scores, columns, self.get_descriptor_threshold,
+                                   self.top_k, self.uncertain_margin)
+
+    def _score_templates(self, bank: TemplateBank, vectors: np.ndarray, symbol_images: List[np.ndarray],
+                         crops: np.ndarray,
+                         scopes: List[Optional[FrozenSet[str]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """計算相關分數，返回 (分數矩陣, 每一欄對應的模板索引)，兩者皆為 卡牌數 x 候選數
+
+        vectors 為目前匹配設定下的模板向量（擴增模板庫為所有變體），縮圖預篩固定使用 16x16 彩色縮圖。
+        不在候選範圍內的欄位分數為 -2（低於任何相關係數）
+        """
+        # 只取所有卡牌候選範圍聯集內的模板，範圍外的欄位再逐張遮罩
+        if any(scope is None for scope in scopes):
+            union = np.arange(len(bank))
+            mask = None
+        else:
+            union = np.array(sorted({bank.index[name] for scope in scopes for name in scope
+                                     if name in bank.index}), dtype=np.intp)
+            mask = np.array([[bank.names[idx] in scope for idx in union] for scope in scopes])
+            if not union.size:
+                union = np.arange(len(bank))
+                mask = None
+
+        num_candidates = len(union)
+        if bank.has_variants:
+            # 擴增模板庫：一次計算所有變體的分數，再取每個模板所有變體中的最高分
+            scores = bank.reduce_variants(crops @ vectors.T)[:, union]
+            if mask is not None:
+                scores[~mask] = -2.0
+            return scores, np.broadcast_to(union, scores.shape)
+
+        if num_candidates < self.cascade_min_templates or num_candidates <= self.cascade_top_k:
+            # 模板數不多時直接計算完整分數矩陣
+            scores = crops @ vectors[union].T
+            if mask is not None:
+                scores[~mask] = -2.0
+            return scores, np.broadcast_to(union, scores.shape)
+
+        # 第一階段：以 16x16 縮圖挑出前 k 個候選模板
+        thumbs = np.stack([normalize_for_matching(image, THUMBNAIL_SIZE) for image in symbol_images])
+        coarse = thumbs @ bank.thumbnails[union].T
+        if mask is not None:
+            coarse[~mask] = -2.0
+        k = self.cascade_top_k
+        top = np.argpartition(-coarse, k - 1, axis=1)[:, :k]
+        columns = union[top]
+
+        # 第二階段：只對候選模板計算完整解析度的相關分數
+        scores = np.einsum('nkd,nd->nk', vectors[columns], crops)
+        if mask is not None:
+            scores[~np.take_along_axis(mask, top, axis=1)] = -2.0
+        return scores, columns
+
+    def recognize_symbol(self, symbol_image: np.ndarray,
+                         candidates: Optional[Iterable[str]] = None) -> Optional[str]:
+        """識別符號，candidates 可限制只比對仍可能出現的符號"""
         if symbol_image is None or symbol_image.size == 0:
             return None
 
-        # 預處理圖像
-        symbol_image = cv2.resize(symbol_image, (64, 64))
+        return self.recognize(symbol_image, candidates).symbol
 
-        # 如果有模板，使用模板匹配
-        if self.templates:
-            best_match = None
-            best_score = 0
-            
-            for symbol_name, template in self.templates.items():
-                template_resized = cv2.resize(template, (64, 64))
-                result = cv2.matchTemplate(symbol_image, template_resized, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, _ = cv2.minMaxLoc(result)
-                
-                if max_val > best_score and max_val > self.match_threshold:
-                    best_score = max_val
-                    best_match = symbol_name
-            
-            return best_match
-
-        # 如果沒有模板，返回特徵哈希作為識別符
-        features = self.extract_symbol_features(symbol_image)
-        symbol_hash = hash(str(features['mean_color']))
-        return f"symbol_{abs(symbol_hash) % 1000}"
+    def recognize(self, symbol_image: np.ndarray,
+                  candidates: Optional[Iterable[str]] = None) -> RecognitionResult:
+        """識別符號並返回完整識別結果（前 k 名、差距與是否不確定）"""
+        return self.recognize_batch([symbol_image], [candidates] if candidates is not None else None)[0]
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+打包模板庫
+將所有模板（已調整尺寸與正規化的圖像、名稱與預先計算的特徵）存成單一檔案，
+載入時以記憶體映射開啟，啟動時不需解碼 PNG，多個行程也可唯讀共用同一份資料。
+
+用法: python -m recognition.template_bank [模板目錄] [輸出檔案] [--augment]
+      --augment 將每個模板展開為光照與 0/90/180/270 度旋轉變體
+"""
+
+import os
+import sys
+import tempfile
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from recognition.symbol_descriptor import compute_descriptor, DESCRIPTOR_LENGTH
+
+TEMPLATE_SIZE = (64, 64)
+THUMBNAIL_SIZE = (16, 16)  # 串接識別第一階段使用的縮圖尺寸
+BANK_FILENAME = "template_bank.npy"
+NAME_DTYPE = 'U64'
+MATCH_CHANNELS = ('bgr', 'gray', 'chroma_a', 'chroma_b')  # chroma_a/b 為 Lab 色彩空間的單一色度通道
+ROTATIONS = (0, 90, 180, 270)
+# 光照變體：gamma 校正與色溫偏移（NCC 本身已不受整體亮度與對比影響）
+PHOTOMETRIC_VARIANTS = {
+    'original': {'gamma': 1.0, 'gains': (1.0, 1.0, 1.0)},
+    'dark': {'gamma': 1.6, 'gains': (1.0, 1.0, 1.0)},
+    'bright': {'gamma': 0.6, 'gains': (1.0, 1.0, 1.0)},
+    'warm': {'gamma': 1.0, 'gains': (0.8, 1.0, 1.2)},  # BGR 增益
+    'cool': {'gamma': 1.0, 'gains': (1.2, 1.0, 0.8)}
+}
+
+
+def normalize_for_matching(image: np.ndarray, size: Tuple[int, int] = TEMPLATE_SIZE) -> np.ndarray:
+    """將圖像轉為零均值、單位長度的向量，內積即等同 TM_CCOEFF_NORMED 分數"""
+    vector = cv2.resize(image, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+    # 與 OpenCV 相同：每個通道各自扣除平均值，再整體正規化
+    vector -= vector.mean(axis=(0, 1))
+    vector = vector.ravel()
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+@dataclass(frozen=True)
+class MatchingMode:
+    """模板匹配的解析度、通道與內縮裁切設定
+
+    inset 為每一邊裁掉的比例，只保留卡牌中央的符號區域。
+    """
+    resolution: int = TEMPLATE_SIZE[0]
+    channels: str = 'bgr'
+    inset: float = 0.0
+
+    def __post_init__(self):
+        if not 4 <= self.resolution <= TEMPLATE_SIZE[0]:
+            raise ValueError(f"匹配解析度必須介於 4 與 {TEMPLATE_SIZE[0]} 之間: {self.resolution}")
+        if self.channels not in MATCH_CHANNELS:
+            raise ValueError(f"未知的匹配通道: {self.channels}")
+        if not 0.0 <= self.inset < 0.5:
+            raise ValueError(f"內縮比例必須介於 0 與 0.5 之間: {self.inset}")
+
+    @property
+    def is_default(self) -> bool:
+        """是否與模板庫預先計算的 64x64 彩色向量相同"""
+        return self == DEFAULT_MATCHING_MODE
+
+    def __str__(self):
+        return f"{self.resolution}px/{self.channels}/內縮{self.inset:.0%}"
+
+
+DEFAULT_MATCHING_MODE = MatchingMode()
+
+
+def prepare_for_matching(image: np.ndarray, mode: MatchingMode = DEFAULT_MATCHING_MODE) -> np.ndarray:
+    """依匹配設定裁切、轉換通道並正規化已調整為模板尺寸的圖像"""
+    if mode.inset > 0:
+        height, width = image.shape[:2]
+        dy, dx = int(round(height * mode.inset)), int(round(width * mode.inset))
+        image = image[dy:height - dy, dx:width - dx]
+    if mode.channels == 'gray':
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    elif mode.channels in ('chroma_a', 'chroma_b'):
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)[:, :, 1 if mode.channels == 'chroma_a' else 2]
+    return normalize_for_matching(image, (mode.resolution, mode.resolution))
+
+
+def augment_template(image: np.ndarray) -> List[np.ndarray]:
+    """將模板展開為固定的光照與旋轉變體（第一個變體為原圖）"""
+    variants = []
+    for rotation in ROTATIONS:
+        rotated = np.rot90(image, k=rotation // 90) if rotation else image
+        for params in PHOTOMETRIC_VARIANTS.values():
+            variant = rotated.astype(np.float32) / 255.0
+            if params['gamma'] != 1.0:
+                variant = variant ** params['gamma']
+            variant = variant * np.array(params['gains'], dtype=np.float32)
+            variants.append(np.ascontiguousarray(np.clip(variant * 255.0, 0, 255).astype(np.uint8)))
+    return variants
+
+
+class TemplateBank:
+    """模板庫 - 建立後不再修改的模板快照，所有模板的特徵各自存成一個連續矩陣
+
+    更新模板時會產生新的 TemplateBank，識別端只需替換參照即可。
+    擴增模板庫另外保存每個模板的光照與旋轉變體，variant_symbols 記錄每個變體所屬的模板索引，
+    同一模板的變體連續存放，匹配時取各模板所有變體中的最高分。
+    """
+
+    def __init__(self, names: List[str], images: np.ndarray, vectors: np.ndarray,
+                 descriptors: np.ndarray, thumbnails: np.ndarray,
+                 variant_images: Optional[np.ndarray] = None,
+                 variant_vectors: Optional[np.ndarray] = None,
+                 variant_symbols: Optional[np.ndarray] = None):
+        self.names = [str(name) for name in names]
+        self.images = images            # 模板數 x 64 x 64 x 3 (uint8)
+        self.vectors = vectors          # 模板數 x 12288，已正規化的匹配向量
+        self.descriptors = descriptors  # 模板數 x 描述子長度
+        self.thumbnails = thumbnails    # 模板數 x 768，已正規化的 16x16 縮圖向量
+        self.variant_images = variant_images    # 變體數 x 64 x 64 x 3 (uint8)
+        self.variant_vectors = variant_vectors  # 變體數 x 12288
+        self.variant_symbols = variant_symbols  # 變體數，所屬模板索引（遞增排列）
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._mode_vectors = {}  # 其他匹配設定下的模板向量（模板庫不變，可安全快取）
+        self._variant_mode_vectors = {}
+        if self.has_variants:
+            self.variant_offsets = np.searchsorted(self.variant_symbols, np.arange(len(self.names) + 1))
+
+    @classmethod
+    def empty(cls, augment: bool = False) -> 'TemplateBank':
+        """建立空模板庫"""
+        images = np.empty((0, *TEMPLATE_SIZE, 3), dtype=np.uint8)
+        vectors = np.empty((0, TEMPLATE_SIZE[0] * TEMPLATE_SIZE[1] * 3), dtype=np.float32)
+        variant_args = (images, vectors, np.empty(0, dtype=np.int32)) if augment else ()
+        return cls([], images, vectors,
+                   np.empty((0, DESCRIPTOR_LENGTH), dtype=np.float32),
+                   np.empty((0, THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1] * 3), dtype=np.float32),
+                   *variant_args)
+
+    @classmethod
+    def from_images(cls, templates: Dict[str, np.ndarray], augment: bool = False) -> 'TemplateBank':
+        """由模板圖像字典建立模板庫，augment 為 True 時同時建立光照與旋轉變體"""
+        if not templates:
+            return cls.empty(augment)
+        names = list(templates.keys())
+        images = np.stack([cv2.resize(templates[name], TEMPLATE_SIZE) for name in names])
+        vectors = np.stack([normalize_for_matching(image) for image in images])
+        descriptors = np.stack([compute_descriptor(image) for image in images])
+        thumbnails = np.stack([normalize_for_matching(image, THUMBNAIL_SIZE) for image in images])
+        if not augment:
+            return cls(names, images, vectors, descriptors, thumbnails)
+
+        variants = [augment_template(image) for image in images]
+        variant_images = np.stack([variant for group in variants for variant in group])
+        variant_vectors = np.stack([normalize_for_matching(image) for image in variant_images])
+        variant_symbols = np.repeat(np.arange(len(names), dtype=np.int32), [len(group) for group in variants])
+        return cls(names, images, vectors, descriptors, thumbnails,
+                   variant_images, variant_vectors, variant_symbols)
+
+    @property
+    def has_variants(self) -> bool:
+        """是否為含光照與旋轉變體的擴增模板庫"""
+        return self.variant_symbols is not None
+
+    def with_templates(self, updates: Dict[str, np.ndarray],
+                       removed: Iterable[str] = ()) -> 'TemplateBank':
+        """返回更新後的新模板庫，只重新計算有變動的列（擴增模板庫會一併建立新模板的變體）"""
+        return self.merged(TemplateBank.from_images(updates, augment=self.has_variants), removed)
+
+    def merged(self, added: 'TemplateBank', removed: Iterable[str] = ()) -> 'TemplateBank':
+        """以已計算好的模板列取代同名模板並移除指定模板，返回新模板庫（不重新計算任何特徵）"""
+        removed = set(removed)
+        keep = [i for i, name in enumerate(self.names)
+                if name not in removed and name not in added.index]
+        variant_args = ()
+        if self.has_variants:
+            kept_variants = np.isin(self.variant_symbols, keep)
+            remap = np.full(len(self.names), -1, dtype=np.int32)
+            remap[keep] = np.arange(len(keep), dtype=np.int32)
+            variant_args = (
+                np.concatenate([self.variant_images[kept_variants], added.variant_images]),
+                np.concatenate([self.variant_vectors[kept_variants], added.variant_vectors]),
+                np.concatenate([remap[self.variant_symbols[kept_variants]],
+                                added.variant_symbols + len(keep)]).astype(np.int32)
+            )
+        return TemplateBank(
+            [self.names[i] for i in keep] + added.names,
+            np.concatenate([self.images[keep], added.images]),
+            np.concatenate([self.vectors[keep], added.vectors]),
+            np.concatenate([self.descriptors[keep], added.descriptors]),
+            np.concatenate([self.thumbnails[keep], added.thumbnails]),
+            *variant_args
+        )
+
+    def matching_vectors(self, mode: MatchingMode = DEFAULT_MATCHING_MODE) -> np.ndarray:
+        """取得指定匹配設定下的模板向量矩陣，預設設定直接使用預先計算的向量"""
+        if mode.is_default:
+            return self.vectors
+        if mode not in self._mode_vectors:
+            if len(self):
+                vectors = np.stack([prepare_for_matching(image, mode) for image in self.images])
+            else:
+                depth = 3 if mode.channels == 'bgr' else 1
+                vectors = np.empty((0, mode.resolution * mode.resolution * depth), dtype=np.float32)
+            self._mode_vectors[mode] = vectors
+        return self._mode_vectors[mode]
+
+    def scoring_vectors(self, mode: MatchingMode = DEFAULT_MATCHING_MODE) -> np.ndarray:
+        """識別時實際比對的向量：擴增模板庫為所有變體，否則為每個模板一列"""
+        if not self.has_variants:
+            return self.matching_vectors(mode)
+        if mode.is_default:
+            return self.variant_vectors
+        if mode not in self._variant_mode_vectors:
+            self._variant_mode_vectors[mode] = np.stack(
+                [prepare_for_matching(image, mode) for image in self.variant_images])
+        return self._variant_mode_vectors[mode]
+
+    def symbol_rows(self, idx: int) -> slice:
+        """模板在 scoring_vectors 中對應的列範圍"""
+        if not self.has_variants:
+            return slice(idx, idx + 1)
+        return slice(self.variant_offsets[idx], self.variant_offsets[idx + 1])
+
+    def reduce_variants(self, scores: np.ndarray) -> np.ndarray:
+        """將 卡牌數 x 變體數 的分數矩陣取每個模板所有變體的最高分，得到 卡牌數 x 模板數"""
+        if not self.has_variants:
+            return scores
+        return np.maximum.reduceat(scores, self.variant_offsets[:-1], axis=1)
+
+    def _sections(self) -> Dict[str, np.ndarray]:
+        """檔案中依序儲存的資料區段（擴增模板庫另有變體區段）"""
+        sections = {
+            'names': np.array(self.names, dtype=NAME_DTYPE),
+            'images': np.ascontiguousarray(self.images),
+            'vectors': np.ascontiguousarray(self.vectors, dtype=np.float32),
+            'descriptors': np.ascontiguousarray(self.descriptors, dtype=np.float32),
+            'thumbnails': np.ascontiguousarray(self.thumbnails, dtype=np.float32)
+        }
+        if self.has_variants:
+            sections['variant_images'] = np.ascontiguousarray(self.variant_images)
+            sections['variant_vectors'] = np.ascontiguousarray(self.variant_vectors, dtype=np.float32)
+            sections['variant_symbols'] = np.ascontiguousarray(self.variant_symbols, dtype=np.int32)
+        return sections
+
+    def save(self, bank_path: str):
+        """原子性寫入模板庫檔案（先寫暫存檔再改名）"""
+        sections = self._sections()
+        bank_path = Path(bank_path)
+        bank_path.parent.mkdir(parents=True, exist_ok=True)
+        # 暫存檔名稱唯一，背景寫入與啟動時重建同時進行也不會互相覆寫
+        fd, tmp_path = tempfile.mkstemp(prefix=bank_path.name + '.', suffix='.tmp', dir=bank_path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # 第一個陣列記錄各區段的名稱，之後依序存放各區段
+                np.lib.format.write_array(f, np.array(list(sections.keys()), dtype=NAME_DTYPE))
+                for array in sections.values():
+                    np.lib.format.write_array(f, array, allow_pickle=False)
+            os.replace(tmp_path, bank_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, bank_path: str) -> 'TemplateBank':
+        """以記憶體映射方式載入模板庫，資料在實際使用時才從磁碟讀取"""
+        sections = {}
+        with open(bank_path, 'rb') as f:
+            keys = [str(key) for key in np.lib.format.read_array(f)]
+            for key in keys:
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                offset = f.tell()
+                count = int(np.prod(shape))
+                if count:
+                    sections[key] = np.memmap(bank_path, dtype=dtype, mode='r', offset=offset,
+                                              shape=shape, order='F' if fortran_order else 'C')
+                else:
+                    sections[key] = np.empty(shape, dtype=dtype)
+                f.seek(offset + count * dtype.itemsize)
+
+        return cls(list(sections['names']), sections['images'], sections['vectors'],
+                   sections['descriptors'], sections['thumbnails'], sections.get('variant_images'),
+                   sections.get('variant_vectors'), sections.get('variant_symbols'))
+
+    def __len__(self):
+        return len(self.names)
+
+
+def list_template_files(template_dir: str) -> List[Path]:
+    """列出模板目錄中的 PNG 模板檔案"""
+    return sorted(Path(template_dir).glob('*.png'))
+
+
+def is_bank_stale(template_dir: str, bank_path: Optional[str] = None) -> bool:
+    """檢查打包模板庫是否比 PNG 模板舊或內容不一致（只檢查檔案資訊，不解碼圖像）"""
+    bank_path = Path(bank_path) if bank_path else Path(template_dir) / BANK_FILENAME
+    if not bank_path.exists():
+        return True
+
+    bank_mtime = bank_path.stat().st_mtime
+    files = list_template_files(template_dir)
+    if any(file.stat().st_mtime > bank_mtime for file in files):
+        return True
+
+    try:
+        with open(bank_path, 'rb') as f:
+            np.lib.format.read_array(f)  # 區段名稱
+            names = set(str(name) for name in np.lib.format.read_array(f))
+    except (OSError, ValueError):
+        return True
+    return names != {file.stem for file in files}
+
+
+def bank_is_augmented(bank_path: str) -> bool:
+    """既有的打包模板庫是否含光照與旋轉變體（只讀取區段名稱，不載入資料）"""
+    try:
+        with open(bank_path, 'rb') as f:
+            return 'variant_symbols' in {str(key) for key in np.lib.format.read_array(f)}
+    except (OSError, ValueError):
+        return False
+
+
+def build_template_bank(template_dir: str, bank_path: Optional[str] = None,
+                        augment: bool = False) -> TemplateBank:
+    """從 PNG 模板目錄建立打包模板庫並寫入檔案，augment 為 True 時加入光照與旋轉變體"""
+    templates = {}
+    for file in list_template_files(template_dir):
+        template = cv2.imread(str(file))
+        if template is not None:
+            templates[file.stem] = template
+
+    bank = TemplateBank.from_images(templates, augment=augment)
+    bank.save(bank_path or str(Path(template_dir) / BANK_FILENAME))
+    return bank
+
+
+def main():
+    """命令列轉換工具"""
+    args = [arg for arg in sys.argv[1:] if arg != '--augment']
+    augment = '--augment' in sys.argv[1:]
+    template_dir = args[0] if len(args) > 0 else "templates"
+    bank_path = args[1] if len(args) > 1 else str(Path(template_dir) / BANK_FILENAME)
+
+    bank = build_template_bank(template_dir, bank_path, augment)
+    if bank.has_variants:
+        print(f"✓ 已將 {len(bank)} 個模板及 {len(bank.variant_symbols)} 個光照/旋轉變體打包至 {bank_path}")
+    else:
+        print(f"✓ 已將 {len(bank)} 個模板打包至 {bank_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
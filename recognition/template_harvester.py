@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+模板採集工具
+由全部翻開的遊戲板截圖自動建立符號模板：以校準用的網格檢測找出 24 張卡牌，
+依相似度兩兩配對成 12 個符號，寫入模板目錄與打包模板庫。
+多張截圖以多個行程平行處理。
+
+用法: python -m recognition.template_harvester <截圖目錄> [模板目錄] [--workers N]
+"""
+
+import os
+import sys
+import re
+import cv2
+import numpy as np
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from recognition.card_detector import CardDetector
+from recognition.template_bank import (
+    TemplateBank, BANK_FILENAME, TEMPLATE_SIZE, bank_is_augmented, is_bank_stale, list_template_files,
+    normalize_for_matching
+)
+from recognition.template_writer import write_image_atomic
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def pair_by_similarity(crops: List[np.ndarray]) -> List[Tuple[int, int, float]]:
+    """依相關分數將卡牌兩兩配對，每次取剩餘卡牌中分數最高的一對
+
+    返回 (卡牌索引, 卡牌索引, 相關分數)，依分數由高到低排列
+    """
+    vectors = np.stack([normalize_for_matching(crop) for crop in crops])
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, -np.inf)
+
+    # 所有卡牌組合依分數排序後依序配對
+    rows, cols = np.triu_indices(len(crops), k=1)
+    order = np.argsort(-similarity[rows, cols], kind='stable')
+    paired = np.zeros(len(crops), dtype=bool)
+    pairs = []
+    for idx in order:
+        i, j = rows[idx], cols[idx]
+        if paired[i] or paired[j]:
+            continue
+        paired[i] = paired[j] = True
+        pairs.append((int(i), int(j), float(similarity[i, j])))
+        if len(pairs) == len(crops) // 2:
+            break
+    return pairs
+
+
+def harvest_image(image_path: str, min_pair_similarity: float = 0.5) -> Dict:
+    """由一張全部翻開的遊戲板截圖取出每個符號的模板（可在子行程中執行）"""
+    result = {'image': str(image_path), 'success': False, 'message': '',
+              'templates': [], 'similarities': []}
+
+    image = cv2.imread(str(image_path))
+    if image is None:
+        result['message'] = "無法讀取圖像"
+        return result
+
+    grid_detected, positions = CardDetector._detect_game_grid(image, verbose=False)
+    if not grid_detected:
+        result['message'] = "無法檢測到6x4遊戲網格"
+        return result
+
+    crops = [cv2.resize(image[y1:y2, x1:x2], TEMPLATE_SIZE) for x1, y1, x2, y2, _ in positions]
+    pairs = pair_by_similarity(crops)
+    weakest = min(score for _, _, score in pairs)
+    if weakest < min_pair_similarity:
+        result['message'] = f"配對相似度過低 ({weakest:.2f})，截圖可能有未翻開或被遮住的卡牌"
+        return result
+
+    # 兩張相同卡牌取平均，降低雜訊與反光的影響
+    result['templates'] = [cv2.addWeighted(crops[i], 0.5, crops[j], 0.5, 0) for i, j, _ in pairs]
+    result['similarities'] = [score for _, _, score in pairs]
+    result['success'] = True
+    result['message'] = f"找到 {len(pairs)} 組配對，最低相似度 {weakest:.2f}"
+    return result
+
+
+def _harvest_worker(args: Tuple[str, float]) -> Dict:
+    """行程池使用的包裝函數"""
+    return harvest_image(*args)
+
+
+def list_board_images(image_dir: str) -> List[Path]:
+    """列出截圖目錄中的圖像檔案"""
+    return sorted(file for file in Path(image_dir).iterdir()
+                  if file.is_file() and file.suffix.lower() in IMAGE_SUFFIXES)
+
+
+def _load_bank(template_dir: str, bank_path: str) -> TemplateBank:
+    """讀取目前的模板庫，打包檔案過期時改由 PNG 建立"""
+    if Path(template_dir).exists() and not is_bank_stale(template_dir, bank_path):
+        try:
+            return TemplateBank.load(bank_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    templates = {}
+    for file in list_template_files(template_dir):
+        template = cv2.imread(str(file))
+        if template is not None:
+            templates[file.stem] = template
+    return TemplateBank.from_images(templates, augment=bank_is_augmented(bank_path))
+
+
+def _next_symbol_index(names: List[str], prefix: str) -> int:
+    """找出模板名稱 prefix_N 中下一個可用的編號"""
+    pattern = re.compile(rf"^{re.escape(prefix)}_(\d+)$")
+    numbers = [int(match.group(1)) for match in map(pattern.match, names) if match]
+    return max(numbers, default=0) + 1
+
+
+def harvest_directory(image_dir: str, template_dir: str = "templates", workers: Optional[int] = None,
+                      prefix: str = "symbol", min_pair_similarity: float = 0.5,
+                      duplicate_threshold: float = 0.85) -> Dict:
+    """平行處理截圖目錄中的所有遊戲板，將新符號寫入模板目錄與打包模板庫
+
+    與現有模板（或先前截圖取得的模板）相關分數達 duplicate_threshold 的符號視為重複而略過，
+    因此同一副牌拍多張也只會新增一次。
+    """
+    images = list_board_images(image_dir)
+    summary = {'images': len(images), 'harvested': 0, 'failed': [], 'added': [], 'duplicates': 0}
+    if not images:
+        return summary
+
+    jobs = [(str(path), min_pair_similarity) for path in images]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(_harvest_worker, jobs)
+    else:
+        results = [_harvest_worker(job) for job in jobs]
+
+    bank_path = str(Path(template_dir) / BANK_FILENAME)
+    bank = _load_bank(template_dir, bank_path)
+    known = [bank.vectors[i] for i in range(len(bank))]
+    next_index = _next_symbol_index(bank.names, prefix)
+    added = {}
+
+    for result in results:
+        if not result['success']:
+            summary['failed'].append((result['image'], result['message']))
+            continue
+        summary['harvested'] += 1
+        for template in result['templates']:
+            vector = normalize_for_matching(template)
+            if known and max(float(vector @ other) for other in known) >= duplicate_threshold:
+                summary['duplicates'] += 1
+                continue
+            name = f"{prefix}_{next_index}"
+            next_index += 1
+            added[name] = template
+            known.append(vector)
+
+    if added:
+        Path(template_dir).mkdir(parents=True, exist_ok=True)
+        for name, template in added.items():
+            if not write_image_atomic(Path(template_dir) / f"{name}.png", template):
+                raise OSError(f"無法寫入模板 {name}")
+        # PNG 寫入後才寫入打包模板庫，模板庫不會比 PNG 舊
+        bank.with_templates(added).save(bank_path)
+    summary['added'] = list(added.keys())
+    return summary
+
+
+def main():
+    """命令列工具"""
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        position = args.index('--workers')
+        workers = int(args[position + 1])
+        del args[position:position + 2]
+    if not args:
+        print(__doc__)
+        return 1
+
+    image_dir = args[0]
+    template_dir = args[1] if len(args) > 1 else "templates"
+    summary = harvest_directory(image_dir, template_dir, workers)
+
+    for image, message in summary['failed']:
+        print(f"✗ {image}: {message}")
+    print(f"✓ 處理 {summary['images']} 張截圖，成功 {summary['harvested']} 張，"
+          f"新增 {len(summary['added'])} 個模板，略過 {summary['duplicates']} 個重複符號")
+    return 0 if not summary['failed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
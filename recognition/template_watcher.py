@@ -0,0 +1,83 @@
+import threading
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Callable, Dict, Set, Tuple
+from recognition.template_bank import list_template_files
+
+
+class TemplateWatcher:
+    """模板目錄監看器 - 定期比對 PNG 的修改時間與大小，偵測新增、修改與刪除的模板
+
+    偵測到變更時呼叫 on_change(更新的模板圖像, 刪除的模板名稱)；
+    無法解碼的檔案（例如仍在寫入中）會在下一次輪詢重試。
+    """
+
+    def __init__(self, template_dir: str,
+                 on_change: Callable[[Dict[str, np.ndarray], Set[str]], None],
+                 interval: float = 1.0):
+        self.template_dir = Path(template_dir)
+        self.on_change = on_change
+        self.interval = interval
+        self._snapshot = self.scan()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """取得目錄中每個模板的 (修改時間, 檔案大小)"""
+        snapshot = {}
+        for file in list_template_files(str(self.template_dir)):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue  # 掃描期間被刪除
+            snapshot[file.stem] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> bool:
+        """檢查一次目錄變更，有變更時通知並返回 True"""
+        current = self.scan()
+        removed = set(self._snapshot) - set(current)
+        changed = [name for name, info in current.items() if self._snapshot.get(name) != info]
+
+        updates = {}
+        for name in changed:
+            image = cv2.imread(str(self.template_dir / f"{name}.png"))
+            if image is None:
+                # 保留舊紀錄，下次輪詢再讀取
+                if name in self._snapshot:
+                    current[name] = self._snapshot[name]
+                else:
+                    del current[name]
+                continue
+            updates[name] = image
+
+        self._snapshot = current
+        if not updates and not removed:
+            return False
+
+        self.on_change(updates, removed)
+        return True
+
+    def start(self):
+        """啟動背景輪詢執行緒"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="TemplateWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """停止輪詢"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """輪詢迴圈"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠ 模板目錄監看錯誤：{e}")
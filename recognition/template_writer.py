@@ -0,0 +1,127 @@
+import os
+import threading
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def write_image_atomic(path: Path, image: np.ndarray) -> bool:
+    """原子性寫入 PNG（先寫暫存檔再改名），寫到一半中斷也不會留下損壞的模板"""
+    success, encoded = cv2.imencode('.png', image)
+    if not success:
+        return False
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded.tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class TemplateWriter:
+    """模板寫入器 - 在背景執行緒批次保存模板 PNG 與打包模板庫
+
+    save() 只把圖像放入待寫入佇列並立即返回，同一符號重複學習時只寫入最新的一份；
+    寫入執行緒等待 batch_delay 秒收集更多變更後一次寫入，避免 SD 卡 I/O 阻塞識別。
+    """
+
+    def __init__(self, template_dir: str, batch_delay: float = 0.5):
+        self.template_dir = Path(template_dir)
+        self.batch_delay = batch_delay
+        self._pending: Dict[str, np.ndarray] = {}
+        self._pending_bank = None  # (模板庫, 檔案路徑)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None  # 有待寫入資料時才存在，寫完即結束
+        self._flushing = False
+        self.written = 0
+        self.failed = 0
+
+    def save(self, symbol_name: str, image: np.ndarray):
+        """排入模板 PNG 寫入（不阻塞）"""
+        with self._lock:
+            self._pending[symbol_name] = image
+            self._schedule()
+
+    def save_bank(self, bank, bank_path: str):
+        """排入打包模板庫寫入，會在同一批 PNG 之後寫入，使模板庫不會比 PNG 舊"""
+        with self._lock:
+            self._pending_bank = (bank, bank_path)
+            self._schedule()
+
+    def _schedule(self):
+        """標記有待寫入資料，需要時啟動寫入執行緒（呼叫時需持有鎖）"""
+        self._idle.clear()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="TemplateWriter", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """寫入執行緒：等待 batch_delay 收集變更後寫入，直到沒有待寫入資料為止"""
+        while True:
+            with self._lock:
+                flushing = self._flushing
+            if not flushing and self.batch_delay > 0:
+                self._wakeup.wait(self.batch_delay)  # flush 時提前喚醒
+
+            with self._lock:
+                self._wakeup.clear()
+                pending, self._pending = self._pending, {}
+                pending_bank, self._pending_bank = self._pending_bank, None
+
+            self._write_batch(pending, pending_bank)
+
+            with self._lock:
+                if not self._pending and self._pending_bank is None:
+                    self._flushing = False
+                    self._thread = None
+                    self._idle.set()
+                    return
+
+    def _write_batch(self, pending: Dict[str, np.ndarray], pending_bank):
+        """寫入一批模板 PNG 與打包模板庫"""
+        if pending:
+            try:
+                self.template_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                print(f"✗ 無法建立模板目錄 {self.template_dir}：{e}")
+
+        for symbol_name, image in pending.items():
+            save_path = self.template_dir / f"{symbol_name}.png"
+            if write_image_atomic(save_path, image):
+                self.written += 1
+                print(f"✓ 已保存新符號模板：{save_path}")
+            else:
+                self.failed += 1
+                print(f"✗ 保存符號模板失敗：{save_path}")
+
+        if pending_bank is not None:
+            bank, bank_path = pending_bank
+            try:
+                bank.save(bank_path)
+            except OSError as e:
+                print(f"⚠ 無法寫入打包模板庫：{e}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """立即寫入所有待寫入的模板並等待完成，逾時返回 False"""
+        with self._lock:
+            if self._idle.is_set():
+                return True
+            self._flushing = True  # 略過批次等待
+            self._wakeup.set()
+        return self._idle.wait(timeout)
+
+    def pending_count(self) -> int:
+        """尚未寫入的模板數"""
+        with self._lock:
+            return len(self._pending)
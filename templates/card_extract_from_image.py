@@ -53,6 +53,7 @@ def extract_card_template(image_path, output_path):
     cv2.imwrite(output_path, card_template)
     print(f"Template saved to {output_path}")
 
-# 用法範例：
-result = extract_card_template('input_image.png', 'output_template.png')
-print(result)
+# 用法範例（整副牌請改用 python -m recognition.template_harvester）：
+if __name__ == "__main__":
+    result = extract_card_template('input_image.png', 'output_template.png')
+    print(result)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+卡牌符號機率信念測試
+測試識別分數的累積、Sinkhorn 正規化與 MemoryLogic 的機率建議
+"""
+
+import unittest
+import numpy as np
+from logic.card_belief import CardBelief
+from logic.memory_logic import MemoryLogic
+from recognition.recognition_result import RecognitionResult
+
+SYMBOLS = ['cake', 'fish', 'bell']
+CELLS = [f'card_{i}' for i in range(6)]
+
+
+def card(symbol=None, top_k=(), grid_pos=(0, 0)):
+    """建立一張卡牌的檢測結果，symbol 為 None 表示蓋著"""
+    recognition = RecognitionResult(symbol=symbol, score=top_k[0][1] if top_k else 0.0,
+                                    top_k=tuple(top_k), uncertain=False) if top_k else None
+    return {'position': (0, 0, 40, 40), 'flipped': symbol is not None, 'symbol': symbol,
+            'grid_pos': grid_pos, 'confidence': top_k[0][1] if top_k else 0.9, 'recognition': recognition}
+
+
+class TestCardBelief(unittest.TestCase):
+    """卡牌符號機率信念測試類"""
+
+    def setUp(self):
+        """建立三種符號、六張卡牌的信念"""
+        self.belief = CardBelief(SYMBOLS, CELLS)
+
+    def assert_normalized(self):
+        """每張卡牌機率總和為 1，每個符號期望兩張"""
+        np.testing.assert_allclose(self.belief.probabilities.sum(axis=1), 1.0, atol=1e-6)
+        np.testing.assert_allclose(self.belief.probabilities.sum(axis=0), 2.0, atol=1e-3)
+
+    def test_uniform_prior(self):
+        """測試沒有觀察時每個符號機率相同"""
+        self.assert_normalized()
+        self.assertAlmostEqual(self.belief.probability('card_0', 'fish'), 1 / 3)
+        self.assertEqual(self.belief.certain_symbols(), {})
+
+    def test_observation_and_constraint(self):
+        """測試識別分數更新機率，且每個符號只有兩張的限制影響其他卡牌"""
+        self.belief.observe({'card_0': {'cake': 0.95, 'fish': 0.5},
+                             'card_1': {'cake': 0.93, 'bell': 0.5}})
+        self.assert_normalized()
+        self.assertGreater(self.belief.probability('card_0', 'cake'), 0.98)
+        self.assertEqual(self.belief.most_likely('card_1')[0], 'cake')
+        # 兩張 cake 都找到了，其他卡牌幾乎不可能是 cake
+        self.assertLess(self.belief.probability('card_2', 'cake'), 0.01)
+        self.assertAlmostEqual(self.belief.probability('card_2', 'fish'), 0.5, places=2)
+        self.assertGreater(self.belief.match_probability('card_0', 'card_1'), 0.95)
+        self.assertEqual(set(self.belief.certain_symbols(0.97, min_observations=1)), {'card_0', 'card_1'})
+
+    def test_certain_needs_agreeing_observations(self):
+        """測試單次高分的識別不算確定，需要多次觀察都以同一符號為最高分"""
+        self.belief.observe({'card_0': {'cake': 0.95, 'fish': 0.6, 'bell': 0.5}})
+        self.assertGreater(self.belief.probability('card_0', 'cake'), 0.99)
+        self.assertEqual(self.belief.certain_symbols(), {})
+
+        # 第二次觀察不一致時仍不確定，且誤認可被修正
+        self.belief.observe({'card_0': {'fish': 0.97, 'cake': 0.5, 'bell': 0.5}})
+        self.assertEqual(self.belief.certain_symbols(), {})
+        self.belief.observe({'card_0': {'fish': 0.97, 'cake': 0.5, 'bell': 0.5}})
+        self.assertEqual(self.belief.certain_symbols(), {'card_0': 'fish'})
+
+        # 已確定（已配對）的卡牌不需多次觀察；觀察次數隨快照還原
+        self.belief.observe({}, fixed={'card_1': 'bell'})
+        self.assertEqual(self.belief.certain_symbols()['card_1'], 'bell')
+        restored = CardBelief.from_snapshot(self.belief.snapshot())
+        self.assertEqual(restored.certain_symbols(), self.belief.certain_symbols())
+
+    def test_misrecognition_recovers(self):
+        """測試單次低差距的識別錯誤可被之後的觀察修正"""
+        self.belief.observe({'card_0': {'fish': 0.72, 'cake': 0.70}})
+        self.assertEqual(self.belief.most_likely('card_0')[0], 'fish')
+        self.belief.observe({'card_0': {'cake': 0.9, 'fish': 0.6}})
+        self.assertEqual(self.belief.most_likely('card_0')[0], 'cake')
+
+        # 另外兩張確定是 fish 時，原本的卡牌不會再被認為是 fish
+        belief = CardBelief(SYMBOLS, CELLS)
+        belief.observe({'card_0': {'fish': 0.72, 'cake': 0.70}},
+                       fixed={'card_1': 'fish', 'card_2': 'fish'})
+        self.assertEqual(belief.most_likely('card_0')[0], 'cake')
+
+    def test_larger_vocabulary(self):
+        """測試符號表比遊戲板上的符號多時，每個符號不超過兩張"""
+        belief = CardBelief(SYMBOLS + ['star', 'moon'], CELLS)
+        belief.observe({'card_0': {'star': 0.9, 'moon': 0.4}})
+        np.testing.assert_allclose(belief.probabilities.sum(axis=1), 1.0, atol=1e-6)
+        self.assertTrue((belief.probabilities.sum(axis=0) <= 2.0 + 1e-6).all())
+        self.assertEqual(belief.most_likely('card_0')[0], 'star')
+
+    def test_observation_scores(self):
+        """測試由檢測結果取出識別分數"""
+        info = card('cake', [('cake', 0.9), ('fish', 0.6)])
+        self.assertEqual(CardBelief.observation_scores(info), {'cake': 0.9, 'fish': 0.6})
+        self.assertEqual(CardBelief.observation_scores({'symbol': 'cake', 'confidence': 0.8}), {'cake': 0.8})
+        self.assertIsNone(CardBelief.observation_scores({'symbol': None, 'confidence': 0.0}))
+
+    def test_empty_symbols(self):
+        """測試沒有符號表時觀察不會出錯，也沒有任何機率"""
+        belief = CardBelief([], CELLS)
+        belief.observe({'card_0': {'cluster_1': 0.9}}, fixed={'card_1': 'cluster_1'})
+        self.assertEqual(belief.probabilities.shape, (len(CELLS), 0))
+        self.assertEqual(belief.most_likely('card_0'), (None, 0.0))
+        self.assertEqual(belief.certain_symbols(), {})
+
+    def test_reset(self):
+        """測試清除觀察"""
+        self.belief.observe({'card_0': {'cake': 0.9}}, fixed={'card_1': 'cake'})
+        self.belief.reset()
+        self.assertAlmostEqual(self.belief.probability('card_1', 'cake'), 1 / 3)
+
+
+class TestMemoryLogicBelief(unittest.TestCase):
+    """MemoryLogic 機率信念測試類"""
+
+    def setUp(self):
+        """建立啟用機率信念的遊戲邏輯"""
+        self.logic = MemoryLogic()
+        self.logic.enable_belief(SYMBOLS)
+        self.cells = {cell: (i % 3, i // 3) for i, cell in enumerate(CELLS)}
+        self.now = 0.0
+
+    def show(self, **flipped):
+        """送出一幀，flipped 為翻開的卡牌與其識別分數 [(符號, 分數), ...]"""
+        self.now += 1.0
+        cards = {}
+        for card_id, grid_pos in self.cells.items():
+            top_k = flipped.get(card_id)
+            cards[card_id] = card(top_k[0][0] if top_k else None, top_k or (), grid_pos)
+        return self.logic.update_game_state({'cards': cards}, now=self.now)
+
+    def test_suggestion_confidence_is_probability(self):
+        """測試建議的信心度為實際的配對機率"""
+        self.show(card_0=[('cake', 0.95), ('fish', 0.5)])
+        self.show()
+        self.show(card_1=[('cake', 0.72), ('bell', 0.70)])
+        suggestion = self.logic.current_suggestions()[0]
+        self.assertEqual((suggestion['type'], suggestion['card_id']), ('direct_match', 'card_0'))
+        expected = self.logic.belief.match_probability('card_1', 'card_0')
+        self.assertAlmostEqual(suggestion['confidence'], expected)
+        self.assertLess(suggestion['confidence'], 0.9)
+
+    def test_memory_follows_belief(self):
+        """測試記憶中的符號改用機率最高的符號"""
+        self.show(card_0=[('fish', 0.72), ('cake', 0.70)])
+        self.show()
+        self.assertEqual(self.logic.memory_map['card_0']['symbol'], 'fish')
+        # 另外兩張清楚的 fish 配對後，card_0 改記為 cake
+        self.show(card_1=[('fish', 0.95), ('cake', 0.5)])
+        self.show(card_1=[('fish', 0.95), ('cake', 0.5)], card_2=[('fish', 0.95), ('bell', 0.5)])
+        self.assertEqual(len(self.logic.matched_pairs), 1)
+        self.assertEqual(self.logic.memory_map['card_0']['symbol'], 'cake')
+        self.assertEqual(self.logic.get_certain_symbols().get('card_1'), 'fish')
+
+    def test_no_symbol_names(self):
+        """測試沒有符號表（分群模式）時不啟用機率信念，建議的信心度沿用識別分數"""
+        logic = MemoryLogic()
+        logic.enable_belief([])
+        self.assertIsNone(logic.belief)
+        self.logic = logic
+        self.show(card_0=[('cluster_1', 0.9)])
+        self.show()
+        self.show(card_1=[('cluster_1', 0.8)])
+        suggestion = logic.current_suggestions()[0]
+        self.assertEqual((suggestion['type'], suggestion['card_id']), ('direct_match', 'card_0'))
+        self.assertAlmostEqual(suggestion['confidence'], 0.72)
+
+    def test_from_belief_cards_not_observed(self):
+        """測試未經識別、直接採用已確定符號的卡牌不重複累積證據"""
+        self.show(card_0=[('cake', 0.95), ('fish', 0.5)])
+        evidence = self.logic.belief.log_evidence.copy()
+        self.show()
+        frame = {'cards': {card_id: card(None, (), grid_pos) for card_id, grid_pos in self.cells.items()}}
+        frame['cards']['card_0'].update(flipped=True, symbol='cake', confidence=1.0, from_belief=True)
+        self.logic.update_game_state(frame, now=10.0)
+        np.testing.assert_array_equal(self.logic.belief.log_evidence, evidence)
+
+
+if __name__ == '__main__':
+    unittest.main()
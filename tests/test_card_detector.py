@@ -10,6 +10,7 @@ import cv2
 import os
 from unittest.mock import Mock, patch
 from recognition.card_detector import CardDetector
+from recognition.recognition_result import RecognitionResult
 
 
 class TestCardDetector(unittest.TestCase):
@@ -263,6 +264,40 @@ class TestCardDetector(unittest.TestCase):
             self.assertGreaterEqual(row, 0)
             self.assertLess(row, 4)
     
+    @patch.object(CardDetector, '_is_card_flipped', return_value=True)
+    def test_detect_cards_passes_possible_symbols(self, mock_is_flipped):
+        """測試檢測時將可能的符號傳給識別器"""
+        self.card_detector.setup_complete = True
+        self.card_detector.card_positions = self.mock_card_positions
+        
+        with patch.object(self.card_detector.symbol_recognizer, 'recognize_batch') as mock_batch:
+            mock_batch.return_value = [RecognitionResult()] * 24
+            self.card_detector.detect_cards(self.test_frame, possible_symbols={'a'},
+                                            remembered_symbols={'card_3': 'b'})
+        
+        _, candidates, expected = mock_batch.call_args[0]
+        self.assertEqual(candidates[0], {'a'})
+        self.assertEqual(candidates[3], {'a', 'b'})
+        self.assertEqual(expected[3], 'b')
+        self.assertIsNone(expected[0])
+
+    @patch.object(CardDetector, '_is_card_flipped', return_value=True)
+    def test_detect_cards_skips_certain_symbols(self, mock_is_flipped):
+        """測試已確定符號的卡牌不再識別"""
+        self.card_detector.setup_complete = True
+        self.card_detector.card_positions = self.mock_card_positions
+
+        with patch.object(self.card_detector.symbol_recognizer, 'recognize_batch') as mock_batch:
+            mock_batch.return_value = [RecognitionResult()] * 22
+            result = self.card_detector.detect_cards(self.test_frame,
+                                                     certain_symbols={'card_0': 'a', 'card_5': 'b'})
+
+        images = mock_batch.call_args[0][0]
+        self.assertEqual(len(images), 22)
+        self.assertEqual(result['cards']['card_5']['symbol'], 'b')
+        self.assertTrue(result['cards']['card_5']['from_belief'])
+        self.assertNotIn('from_belief', result['cards']['card_1'])
+
     def test_is_card_flipped_empty_image(self):
         """測試空圖像的翻牌判斷"""
         empty_image = np.array([])
@@ -332,9 +367,16 @@ class TestCardDetector(unittest.TestCase):
         self.assertIn('game_complete', result)
         
         # 應該有2對配對（blue_bottle和pink_fish各一對）
-        self.assertEqual(result['matched_pairs'], 1)  # 實際實現可能需要調整
+        self.assertEqual(result['matched_pairs'], 2)
         self.assertEqual(result['flipped_count'], 5)
         self.assertEqual(result['total_pairs'], 12)
+        
+        # 三張一組：兩張同符號還不算一組
+        triples = CardDetector(group_size=3)
+        result = triples.get_game_progress(cards_data)
+        self.assertEqual((result['matched_pairs'], result['total_pairs']), (0, 8))
+        cards_data['cards']['card_4'] = {'flipped': True, 'symbol': 'pink_fish'}
+        self.assertEqual(triples.get_game_progress(cards_data)['matched_pairs'], 1)
         self.assertFalse(result['game_complete'])
     
     def test_real_image_completed_game_calibration(self):
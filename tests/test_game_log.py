@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+遊戲事件紀錄測試
+測試事件記錄、JSONL 存取與重播重建遊戲狀態
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import time
+from logic.memory_logic import MemoryLogic
+from logic.game_log import GameEventLog, replay_events, frames_from_events
+
+
+def play_game(logic: MemoryLogic, num_pairs: int = 12, start: float = 1000.0) -> float:
+    """模擬一局遊戲：每回合先翻一張未知卡牌，記得配對就直接配對，否則再翻一張新卡牌"""
+    symbols = [f"symbol_{i // 2}" for i in range(num_pairs * 2)]
+    # 固定打亂順序，讓部分回合失敗
+    order = [symbols[(i * 7) % len(symbols)] for i in range(len(symbols))]
+    cards = {f'card_{i}': {'position': (0, 0, 40, 40), 'flipped': False, 'symbol': None,
+                           'confidence': 0.0, 'grid_pos': (i % 6, i // 6)} for i in range(len(order))}
+    now = start
+    seen = {}
+    matched = set()
+
+    def show(*card_ids):
+        nonlocal now
+        for card_id in card_ids:
+            index = int(card_id.split('_')[1])
+            cards[card_id] = dict(cards[card_id], flipped=True, symbol=order[index], confidence=0.95)
+        now += 1.0
+        logic.update_game_state({'cards': cards}, now=now)
+
+    def hide(*card_ids):
+        nonlocal now
+        for card_id in card_ids:
+            cards[card_id] = dict(cards[card_id], flipped=False, symbol=None, confidence=0.0)
+        now += 1.0
+        logic.update_game_state({'cards': cards}, now=now)
+
+    unknown = list(cards)
+    while len(matched) < len(cards):
+        first = unknown.pop(0)
+        symbol = order[int(first.split('_')[1])]
+        show(first)
+        second = seen.pop(symbol, None) or unknown.pop(0)
+        show(second)
+        second_symbol = order[int(second.split('_')[1])]
+        if second_symbol == symbol:
+            matched.update((first, second))
+        else:
+            seen[symbol] = first
+            seen.setdefault(second_symbol, second)
+            if second_symbol in seen and seen[second_symbol] != second:
+                # 第二張剛好配上之前看過的卡牌，下一回合直接配對
+                unknown.insert(0, second)
+            hide(first, second)
+    return now
+
+
+class TestGameEventLog(unittest.TestCase):
+    """遊戲事件紀錄測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.work_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.work_dir, 'game.jsonl')
+        self.logic = MemoryLogic()
+        self.logic.event_log = GameEventLog(self.log_path)
+        self.end_time = play_game(self.logic)
+        self.logic.event_log.close()
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_events_recorded(self):
+        """測試記錄翻開、蓋回、配對與回合結束事件"""
+        events = self.logic.event_log.events
+        types = {event['type'] for event in events}
+        self.assertEqual(types, {'setup', 'reveal', 'hide', 'match', 'turn_end'})
+        self.assertEqual(events[0]['type'], 'setup')
+        self.assertEqual(events[0]['group_size'], 2)
+        self.assertEqual(sum(event['type'] == 'match' for event in events), 12)
+        turn_ends = [event for event in events if event['type'] == 'turn_end']
+        self.assertEqual([event['turn'] for event in turn_ends], list(range(1, len(turn_ends) + 1)))
+        self.assertEqual(self.logic.turn_count, len(turn_ends))
+        self.assertTrue(all(a['t'] <= b['t'] for a, b in zip(events, events[1:])))
+
+    def test_jsonl_roundtrip(self):
+        """測試 JSONL 檔案與記憶體中的事件相同，不完整的最後一行會被忽略"""
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write('{"type":"reveal","t":')
+        self.assertEqual(GameEventLog.load(self.log_path), self.logic.event_log.events)
+
+    def test_replay_rebuilds_state(self):
+        """測試重播事件得到與實際遊戲相同的狀態"""
+        replayed = replay_events(GameEventLog.load(self.log_path))
+
+        self.assertEqual(replayed.matched_pairs, self.logic.matched_pairs)
+        self.assertEqual(replayed.memory_map, self.logic.memory_map)
+        self.assertEqual(replayed.turn_count, self.logic.turn_count)
+        self.assertEqual(replayed.game_start_time, self.logic.game_start_time)
+        self.assertTrue(replayed.game_complete)
+
+    def test_replay_two_games_in_one_log(self):
+        """測試同一個紀錄檔中的第二局遊戲由 setup 事件重新開始，不會與第一局合併"""
+        logic = MemoryLogic(group_size=3, total_groups=8)
+        logic.event_log = GameEventLog(self.log_path)  # 以附加模式接在第一局之後
+        cards = {f'card_{i}': {'position': (0, 0, 40, 40), 'flipped': i in (1, 2),
+                               'symbol': {1: 'cake', 2: 'fish'}.get(i), 'confidence': 0.9,
+                               'grid_pos': (i, 0)} for i in range(4)}
+        logic.update_game_state({'cards': cards}, now=self.end_time + 10.0)
+        logic.event_log.close()
+
+        replayed = replay_events(GameEventLog.load(self.log_path))
+        self.assertEqual(replayed.matched_pairs, [])
+        self.assertEqual(replayed.memory_map.keys(), {'card_1', 'card_2'})
+        self.assertEqual((replayed.group_size, replayed.total_groups), (3, 8))
+        self.assertEqual(replayed.turn_state.cards, logic.turn_state.cards)
+        self.assertEqual(replayed.turn_count, 0)
+
+    def test_replay_until_time(self):
+        """測試重建任一時間點的狀態"""
+        events = self.logic.event_log.events
+        first_match = next(event for event in events if event['type'] == 'match')
+        before = replay_events(events, until=first_match['t'] - 0.5)
+        after = replay_events(events, until=first_match['t'])
+
+        self.assertEqual(len(before.matched_pairs), 0)
+        self.assertEqual(after.matched_pairs, [tuple(first_match['cards'])])
+
+    def test_rerun_frames_through_logic(self):
+        """測試將事件還原成畫面重新餵給遊戲邏輯"""
+        rerun = MemoryLogic()
+        for frame in frames_from_events(self.logic.event_log.events):
+            rerun.update_game_state(frame, now=frame['time'])
+
+        self.assertEqual(rerun.matched_pairs, self.logic.matched_pairs)
+        self.assertEqual(rerun.memory_map, self.logic.memory_map)
+
+    def test_replay_faster_than_real_time(self):
+        """測試一千局遊戲可在數秒內重播完成"""
+        events = self.logic.event_log.events
+        start = time.perf_counter()
+        for _ in range(1000):
+            replay_events(events)
+        self.assertLess(time.perf_counter() - start, 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+遊戲模擬器測試
+測試批次模擬的策略、記憶錯誤模型與行程池統計
+"""
+
+import unittest
+import numpy as np
+from logic.game_simulator import (
+    MemoryModel, simulate_games, run_simulation, summarize_turns,
+    heuristic_policy, optimal_policy, random_policy, partner_cells
+)
+from logic.memory_solver import MemorySolver, ACTION_FLIP_UNKNOWN
+
+
+def checked_policy(state, first):
+    """檢查最佳策略返回的格子都合法"""
+    cells = optimal_policy(state, first)
+    rows = np.arange(len(state))
+    assert not state.matched[rows, cells].any(), "翻開了已配對的格子"
+    if first is not None:
+        assert (cells != first).all(), "第二張與第一張相同"
+    return cells
+
+
+def first_card_policy(state, first):
+    """自訂策略：依序翻開最前面未見過的卡牌，第二張記得另一半時直接配對"""
+    rows = np.arange(len(state))
+    mask = state.unknown()
+    empty = ~mask.any(axis=1)
+    mask[empty] = ~state.matched[empty]  # 全部見過時改翻未配對的卡牌
+    if first is None:
+        return mask.argmax(axis=1)
+    mask[rows, first] = False
+    empty = ~mask.any(axis=1)
+    mask[empty] = ~state.matched[empty]
+    mask[rows, first] = False
+    cells, found = partner_cells(state, first)
+    return np.where(found, cells, mask.argmax(axis=1))
+
+
+class TestGameSimulator(unittest.TestCase):
+    """遊戲模擬器測試類"""
+
+    def test_optimal_matches_expected_turns(self):
+        """測試最佳策略的平均回合數與求解器的期望值相同"""
+        turns = simulate_games('optimal', 20000, 12, seed=1)
+        expected = MemorySolver(time_budget=0).expected_turns(24, 0)
+        self.assertAlmostEqual(turns.mean(), expected, delta=0.1)
+        self.assertTrue((turns >= 12).all())
+
+    def test_solver_never_flips_known_card(self):
+        """測試求解器在 60 張以內的遊戲板上從不選擇翻開已知的卡牌，貪婪策略即為最佳策略"""
+        solver = MemorySolver(time_budget=0)
+        solver.expected_turns(60, 0)
+        for n in range(1, 60):
+            for k in range(2 - n % 2, n + 1, 2):
+                _, action = solver._second_flip(solver._rows[n - 1], solver._rows[n], n, k)
+                self.assertEqual(action, ACTION_FLIP_UNKNOWN, (n, k))
+
+    def test_policies_ranked(self):
+        """測試使用記憶的策略比隨機翻牌快，最佳策略不比建議策略慢"""
+        optimal = simulate_games(optimal_policy, 5000, 8, seed=2).mean()
+        heuristic = simulate_games(heuristic_policy, 5000, 8, seed=2).mean()
+        random = simulate_games(random_policy, 2000, 8, seed=2).mean()
+        self.assertLessEqual(optimal, heuristic)
+        self.assertLess(heuristic, random)
+
+    def test_custom_policy(self):
+        """測試可傳入自訂策略，且策略只會翻開合法的格子"""
+        turns = simulate_games(checked_policy, 2000, 6, seed=3)
+        self.assertEqual(len(turns), 2000)
+        turns = simulate_games(first_card_policy, 500, 4, seed=3, max_turns=100)
+        self.assertTrue(((turns >= 4) & (turns < 100)).all())
+
+    def test_memory_errors_cost_turns(self):
+        """測試遺忘與記錯會增加完成回合數"""
+        perfect = simulate_games('optimal', 5000, 12, seed=4).mean()
+        forgetful = simulate_games('optimal', 5000, 12, MemoryModel(forget_rate=0.1), seed=4).mean()
+        confused = simulate_games('optimal', 5000, 12, MemoryModel(confusion_rate=0.2), seed=4).mean()
+        self.assertGreater(forgetful, perfect + 1)
+        self.assertGreater(confused, perfect + 1)
+
+        with self.assertRaises(ValueError):
+            MemoryModel(forget_rate=1.5)
+
+    def test_run_simulation_pool(self):
+        """測試行程池分批與單一行程得到相同的統計"""
+        serial = run_simulation('heuristic', 3000, 6, workers=1, batch_size=1000, seed=5)
+        pooled = run_simulation('heuristic', 3000, 6, workers=2, batch_size=1000, seed=5)
+        self.assertEqual(serial['games'], 3000)
+        for key in ('mean', 'p50', 'p90', 'p95', 'p99', 'max'):
+            self.assertEqual(serial[key], pooled[key])
+
+    def test_summarize_turns(self):
+        """測試回合數統計"""
+        stats = summarize_turns(np.arange(1, 101))
+        self.assertEqual(stats['games'], 100)
+        self.assertAlmostEqual(stats['mean'], 50.5)
+        self.assertAlmostEqual(stats['p95'], 95.05)
+        self.assertEqual(stats['max'], 100)
+        self.assertEqual(summarize_turns(np.zeros(0))['games'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+遊戲狀態快照測試
+測試快照的完整還原、原子寫入、背景寫入器與校準結果的還原
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from logic.memory_logic import MemoryLogic
+from logic.game_snapshot import (
+    SnapshotWriter, SNAPSHOT_VERSION, write_json_atomic, load_snapshot, is_resumable
+)
+from recognition.card_detector import CardDetector
+
+CELLS = {f'card_{i}': (i % 3, i // 3) for i in range(6)}
+
+
+def frame(**symbols):
+    """建立一幀的檢測結果，symbols 為翻開的卡牌與符號"""
+    return {'cards': {card_id: {'position': (0, 0, 40, 40), 'flipped': card_id in symbols,
+                                'symbol': symbols.get(card_id), 'grid_pos': grid_pos, 'confidence': 0.9}
+                      for card_id, grid_pos in CELLS.items()}}
+
+
+def play_frames(logic, frames, start=100.0):
+    """依序套用多幀，返回最後一幀的結果"""
+    result = None
+    for i, symbols in enumerate(frames):
+        result = logic.update_game_state(frame(**symbols), now=start + i)
+    return result
+
+
+# 第一回合配對失敗、第二回合配對成功，第三回合翻開一張
+FRAMES = [
+    {'card_0': 'cake'},
+    {'card_0': 'cake', 'card_1': 'fish'},
+    {},
+    {'card_2': 'fish'},
+    {'card_2': 'fish', 'card_1': 'fish'},
+    {'card_2': 'fish', 'card_1': 'fish', 'card_3': 'cake'},
+]
+
+
+class TestGameSnapshot(unittest.TestCase):
+    """遊戲狀態快照測試類"""
+
+    def setUp(self):
+        """建立遊戲進行到一半的邏輯"""
+        self.logic = MemoryLogic()
+        self.logic.enable_belief(['cake', 'fish', 'bell'])
+        play_frames(self.logic, FRAMES)
+
+    def restored(self):
+        """經過 JSON 序列化後還原到新的邏輯"""
+        snapshot = json.loads(json.dumps(self.logic.snapshot()))
+        logic = MemoryLogic()
+        logic.restore_snapshot(snapshot)
+        return logic
+
+    def test_round_trip(self):
+        """測試還原後的記憶、配對、回合階段、計時與建議都相同"""
+        logic = self.restored()
+        self.assertEqual(logic.memory_map, self.logic.memory_map)
+        self.assertEqual(logic.matched_pairs, self.logic.matched_pairs)
+        self.assertEqual(logic.turn_state.phase, self.logic.turn_state.phase)
+        self.assertEqual(logic.turn_state.cards, ['card_3'])
+        self.assertEqual(logic.turn_count, 2)
+        self.assertEqual(logic.game_start_time, 100.0)
+        self.assertEqual(logic.get_statistics(now=110.0)['turns'], 2)
+        self.assertEqual(logic.current_suggestions(), self.logic.current_suggestions())
+        self.assertAlmostEqual(logic.belief.match_probability('card_0', 'card_3'),
+                               self.logic.belief.match_probability('card_0', 'card_3'), places=3)
+
+    def test_continue_after_restore(self):
+        """測試還原後繼續遊戲與沒有中斷的遊戲結果相同"""
+        logic = self.restored()
+        rest = [
+            {'card_2': 'fish', 'card_1': 'fish', 'card_3': 'cake', 'card_0': 'cake'},
+            {'card_2': 'fish', 'card_1': 'fish', 'card_3': 'cake', 'card_0': 'cake', 'card_4': 'bell'},
+        ]
+        expected = play_frames(self.logic, rest, start=200.0)
+        result = play_frames(logic, rest, start=200.0)
+        self.assertEqual(result, expected)
+        self.assertEqual(logic.matched_pairs, self.logic.matched_pairs)
+        self.assertEqual(logic.turn_count, self.logic.turn_count)
+
+    def test_group_setup_restored(self):
+        """測試三張一組的遊戲還原後保留組大小的設定"""
+        logic = MemoryLogic(group_size=3, total_groups=8, group_sizes={'star': 2})
+        play_frames(logic, [{'card_0': 'cake'}, {'card_0': 'cake', 'card_1': 'cake'}])
+        restored = MemoryLogic()
+        restored.restore_snapshot(json.loads(json.dumps(logic.snapshot())))
+        self.assertEqual((restored.group_size, restored.group_sizes, restored.total_groups), (3, {'star': 2}, 8))
+        self.assertEqual(restored.turn_state.group_size, 3)
+        result = play_frames(restored, [{'card_0': 'cake', 'card_1': 'cake', 'card_2': 'cake'}], start=200.0)
+        self.assertEqual(result['matched_pairs'], 1)
+        self.assertEqual(restored.matched_pairs, [('card_0', 'card_1', 'card_2')])
+
+    def test_is_resumable(self):
+        """測試只有未完成且有進度的遊戲值得恢復"""
+        self.assertTrue(is_resumable(self.logic.snapshot()))
+        self.assertFalse(is_resumable(MemoryLogic().snapshot()))
+        self.assertFalse(is_resumable(dict(self.logic.snapshot(), game_complete=True)))
+        self.assertFalse(is_resumable(None))
+
+
+class TestSnapshotFiles(unittest.TestCase):
+    """快照檔案測試類"""
+
+    def setUp(self):
+        """建立暫存目錄"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / 'snapshots' / 'game.json'
+
+    def tearDown(self):
+        """清除暫存目錄"""
+        self.temp_dir.cleanup()
+
+    def test_atomic_write_and_load(self):
+        """測試原子寫入不留下暫存檔，損壞或版本不符的快照不會被讀取"""
+        self.assertTrue(write_json_atomic(self.path, {'version': SNAPSHOT_VERSION, 'memory': []}))
+        self.assertEqual(load_snapshot(str(self.path))['memory'], [])
+        self.assertEqual(os.listdir(self.path.parent), ['game.json'])
+
+        self.assertFalse(write_json_atomic(self.path, {'version': SNAPSHOT_VERSION, 'bad': object()}))
+        self.assertEqual(load_snapshot(str(self.path))['memory'], [])  # 失敗時保留舊的快照
+
+        write_json_atomic(self.path, {'version': SNAPSHOT_VERSION + 1})
+        self.assertIsNone(load_snapshot(str(self.path)))
+        self.path.write_text('{"version": 1, "mem', encoding='utf-8')
+        self.assertIsNone(load_snapshot(str(self.path)))
+        self.assertIsNone(load_snapshot(str(self.path.parent / 'missing.json')))
+
+    def test_writer_keeps_latest(self):
+        """測試背景寫入器只寫入最新的快照，discard 刪除快照檔案"""
+        writer = SnapshotWriter(str(self.path), interval=0.05)
+        for i in range(20):
+            writer.save({'version': SNAPSHOT_VERSION, 'frame': i})
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertEqual(load_snapshot(str(self.path))['frame'], 19)
+        self.assertLess(writer.written, 20)
+        self.assertEqual(writer.failed, 0)
+
+        writer.save({'version': SNAPSHOT_VERSION, 'frame': 20})
+        writer.discard(timeout=5.0)
+        self.assertFalse(self.path.exists())
+
+
+class TestCalibrationReference(unittest.TestCase):
+    """校準結果還原測試類"""
+
+    def test_restore_calibration(self):
+        """測試校準結果可寫入快照並還原"""
+        detector = CardDetector()
+        self.assertIsNone(detector.calibration_reference())
+        detector.card_positions = [(i * 50, 0, i * 50 + 40, 40, 1600.0) for i in range(24)]
+        detector.setup_complete = True
+        reference = json.loads(json.dumps(detector.calibration_reference()))
+
+        restored = CardDetector()
+        self.assertTrue(restored.restore_calibration(reference))
+        self.assertTrue(restored.setup_complete)
+        self.assertEqual(restored.card_positions, detector.card_positions)
+        self.assertFalse(CardDetector().restore_calibration(dict(reference, card_positions=[])))
+        self.assertFalse(CardDetector().restore_calibration(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+遊戲統計時間序列測試
+測試環形緩衝區、回合耗時累計值與 MemoryLogic 的統計匯出
+"""
+
+import os
+import json
+import tempfile
+import unittest
+import numpy as np
+from logic.game_stats import RingBuffer, GameStatistics
+from logic.memory_logic import MemoryLogic
+from logic.game_log import GameEventLog, replay_events
+from test_game_log import play_game
+
+
+class TestRingBuffer(unittest.TestCase):
+    """環形緩衝區測試類"""
+
+    def test_wraps_around(self):
+        """測試超過容量時只保留最近的紀錄並維持順序"""
+        buffer = RingBuffer(3, ('a', 'b'))
+        for i in range(5):
+            buffer.append(i, i * 10)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.total, 5)
+        np.testing.assert_array_equal(buffer.values()[:, 0], [2, 3, 4])
+        self.assertEqual(buffer.last()[1], 40)
+        self.assertEqual(buffer.last(2)[0], 2)
+        self.assertIsNone(buffer.last(3))
+        self.assertEqual(buffer.to_dicts()[0], {'a': 2.0, 'b': 20.0})
+
+
+class TestGameStatistics(unittest.TestCase):
+    """遊戲統計測試類"""
+
+    def setUp(self):
+        """建立統計"""
+        self.stats = GameStatistics(turn_capacity=4, second_capacity=10)
+
+    def play_turns(self, durations, start=100.0):
+        """依序記錄多個回合，返回最後的時間"""
+        now = start
+        for i, duration in enumerate(durations):
+            self.stats.start_turn(now)
+            now += duration
+            self.stats.end_turn(now, matched=i % 2 == 0)
+            now += 0.5
+        return now
+
+    def test_turn_aggregates(self):
+        """測試平均與 p95 回合耗時包含整局（包含已被覆蓋的回合）"""
+        durations = [1.0] * 19 + [10.0]
+        self.play_turns(durations)
+        self.assertEqual(self.stats.turn_count, 20)
+        self.assertEqual(len(self.stats.turns), 4)
+        self.assertAlmostEqual(self.stats.mean_turn_time(), np.mean(durations))
+        self.assertAlmostEqual(self.stats.turn_time_percentile(95), 1.25)  # 區間 [1.0, 1.25) 的上界
+        self.assertAlmostEqual(self.stats.turn_time_percentile(100), 10.0)
+        self.assertEqual(self.stats.matched_turns, 10)
+
+    def test_per_second_samples(self):
+        """測試每秒一筆紀錄，沒有呼叫的秒沿用上一筆的值"""
+        self.stats.sample(100.0, 0, 0, 0)
+        self.stats.sample(100.4, 0, 2, 0)
+        self.stats.sample(103.2, 1, 4, 1)
+        series = self.stats.seconds.values()
+        np.testing.assert_array_equal(series[:, 1], [0, 0, 0, 1])
+        np.testing.assert_array_equal(series[:, 2], [0, 2, 2, 4])
+
+        # 長時間沒有呼叫最多補滿緩衝區
+        self.stats.sample(200.0, 2, 4, 2)
+        self.assertEqual(len(self.stats.seconds), 10)
+        self.assertEqual(self.stats.seconds.last()[1], 2)
+
+    def test_matches_per_minute(self):
+        """測試整局與最近一分鐘的每分鐘配對數"""
+        rates = GameStatistics(second_capacity=120)
+        for second in range(121):
+            rates.sample(second, second // 20, 0, 0)
+        result = rates.matches_per_minute(120.0)
+        self.assertAlmostEqual(result['overall'], 3.0)
+        self.assertAlmostEqual(result['recent'], 3.0)
+        self.assertEqual(GameStatistics().matches_per_minute(0.0)['overall'], 0.0)
+
+    def test_export(self):
+        """測試匯出時間序列到 JSON 檔案"""
+        now = self.play_turns([1.0, 2.0])
+        self.stats.sample(now, 1, 4, 2)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'stats', 'game.json')
+            data = self.stats.export(now, path)
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        self.assertEqual(saved, json.loads(json.dumps(data)))
+        self.assertEqual([turn['duration'] for turn in saved['turns']], [1.0, 2.0])
+        self.assertEqual(saved['summary']['turns'], 2)
+
+
+class TestMemoryLogicStatistics(unittest.TestCase):
+    """MemoryLogic 統計測試類"""
+
+    def test_game_statistics(self):
+        """測試一局遊戲的回合統計與回合數一致，重播得到相同的統計"""
+        logic = MemoryLogic()
+        logic.event_log = GameEventLog()
+        end = play_game(logic, num_pairs=6)
+        stats = logic.get_statistics(now=end)
+        self.assertEqual(stats['turns'], logic.turn_count)
+        self.assertEqual(stats['matched_turns'], 6)
+        self.assertGreater(stats['mean_turn_time'], 0)
+        self.assertGreater(stats['matches_per_minute'], 0)
+
+        exported = logic.export_statistics(now=end)
+        self.assertEqual(len(exported['turns']), logic.turn_count)
+        self.assertEqual(exported['seconds'][-1]['matched_pairs'], 6)
+
+        replayed = replay_events(logic.event_log.events)
+        self.assertEqual(replayed.export_statistics(now=end)['turns'], exported['turns'])
+
+        logic.reset_game()
+        self.assertEqual(logic.get_statistics()['turns'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
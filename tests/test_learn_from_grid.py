@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+卡牌矩形搜尋測試
+測試由截圖依背景顏色找出卡牌矩形與統計尺寸
+"""
+
+import unittest
+import time
+import numpy as np
+from collections import Counter
+from scipy.ndimage import label, find_objects
+from recognition.learn_from_grid import (
+    RECT_COLORS, palette_membership, quantize_to_palette, find_color_rects, group_rect_sizes, learn_from_grid
+)
+
+
+def naive_rects(image, colors, tolerance):
+    """逐顏色建立遮罩並標記的做法（容差重疊的像素歸屬較前面的顏色）"""
+    rects = []
+    assigned = np.zeros(image.shape[:2], dtype=bool)
+    for color in colors:
+        mask = ((image >= np.array(color) - tolerance) &
+                (image <= np.array(color) + tolerance)).all(axis=-1) & ~assigned
+        assigned |= mask
+        labeled, _ = label(mask)
+        for slc in find_objects(labeled):
+            rects.append((slc[1].start, slc[0].start, slc[1].stop - slc[1].start, slc[0].stop - slc[0].start))
+    return rects
+
+
+def naive_groups(rects, tol):
+    """原本兩兩比較尺寸的做法"""
+    sizes = [(w, h) for _, _, w, h in rects]
+    size_counts = Counter(sizes)
+
+    def similar(a, b):
+        return abs(a[0] - b[0]) <= tol and abs(a[1] - b[1]) <= tol
+
+    group_counts = {base: sum(c for s, c in size_counts.items() if similar(s, base)) for base in size_counts}
+    max_count = max(group_counts.values())
+    common = [s for s, c in group_counts.items() if c == max_count]
+    count = sum(1 for s in sizes if any(similar(s, g) for g in common))
+    return count, common, max_count
+
+
+class TestLearnFromGrid(unittest.TestCase):
+    """卡牌矩形搜尋測試類"""
+
+    def setUp(self):
+        """建立 6x4 卡牌格的合成截圖，相鄰卡牌顏色不同"""
+        self.image = np.full((480, 720, 3), 240, dtype=np.uint8)
+        for row in range(4):
+            for col in range(6):
+                color = RECT_COLORS[(row * 6 + col) % len(RECT_COLORS)]
+                y, x = 40 + row * 105, 30 + col * 110
+                h, w = 90 + (row % 2), 95 + (col % 3)  # 輕微尺寸差異
+                self.image[y:y + h, x:x + w] = color
+        # 兩個顏色不同但相鄰的區塊不應合併
+        self.image[5:25, 5:30] = RECT_COLORS[0]
+        self.image[5:25, 30:60] = RECT_COLORS[1]
+
+    def test_quantize_matches_masks(self):
+        """測試一次量化與逐顏色遮罩結果相同"""
+        # 以接近調色盤的隨機顏色測試容差邊界
+        rng = np.random.default_rng(3)
+        picked = np.array(RECT_COLORS)[rng.integers(0, len(RECT_COLORS), (200, 200))]
+        image = np.clip(picked + rng.integers(-25, 26, picked.shape), 0, 255).astype(np.uint8)
+
+        membership = palette_membership(image, RECT_COLORS, 20)
+        expected = np.full(image.shape[:2], -1)
+        for i, color in reversed(list(enumerate(RECT_COLORS))):
+            mask = ((image >= np.array(color) - 20) & (image <= np.array(color) + 20)).all(axis=-1)
+            np.testing.assert_array_equal((membership >> i) & 1 == 1, mask)
+            expected[mask] = i  # 多個顏色符合時取較前面的顏色
+
+        indices = quantize_to_palette(image, RECT_COLORS, 20)
+        np.testing.assert_array_equal(indices, expected)
+        self.assertTrue((indices == -1).any())
+
+    def test_single_pass_matches_per_color_labels(self):
+        """測試單次標記與逐顏色標記找到相同的矩形"""
+        # 黃色與粉紅色的容差範圍重疊，重疊的像素歸屬黃色並與相鄰的粉紅色區塊分開
+        self.image[300:310, 5:20] = [183, 148, 120]
+        self.image[300:310, 20:30] = RECT_COLORS[1]
+        self.assertEqual(sorted(find_color_rects(self.image, RECT_COLORS, 20)),
+                         sorted(naive_rects(self.image, RECT_COLORS, 20)))
+
+    def test_grouping_matches_pairwise(self):
+        """測試分格分組與兩兩比較結果相同"""
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            rects = [(0, 0, int(w), int(h)) for w, h in rng.integers(10, 40, (60, 2))]
+            result = group_rect_sizes(rects, 3)
+            count, common, occurrence = naive_groups(rects, 3)
+            self.assertEqual(result['count'], count)
+            self.assertEqual(sorted(result['most_common_sizes']), sorted(common))
+            self.assertEqual(result['occurrence'], occurrence)
+
+    def test_learn_from_grid_counts_cards(self):
+        """測試找出 24 張卡牌"""
+        alpha = np.full((*self.image.shape[:2], 1), 255, dtype=np.uint8)
+        result = learn_from_grid(np.concatenate([self.image, alpha], axis=2))
+        self.assertEqual(result['count'], 24)
+        self.assertEqual(result['occurrence'], 24)
+
+    def test_empty_image(self):
+        """測試沒有任何卡牌顏色的圖像"""
+        result = learn_from_grid(np.full((50, 50, 3), 255, dtype=np.uint8))
+        self.assertEqual(result['count'], 0)
+        self.assertEqual(result['rects'], [])
+
+    def test_high_resolution_capture(self):
+        """測試高解析度截圖仍能快速處理"""
+        image = np.repeat(np.repeat(self.image, 4, axis=0), 4, axis=1)  # 2880x1920
+        start = time.perf_counter()
+        result = learn_from_grid(image, size_tolerance=12)
+        self.assertLess(time.perf_counter() - start, 5.0)
+        self.assertEqual(result['count'], 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
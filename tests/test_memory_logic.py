@@ -8,7 +8,10 @@ import unittest
 import time
 import os
 import cv2
+import copy
 from logic.memory_logic import MemoryLogic
+from logic.game_log import GameEventLog, replay_events
+from test_game_log import play_game
 from recognition.card_detector import CardDetector
 
 
@@ -211,6 +214,27 @@ class TestMemoryLogic(unittest.TestCase):
             self.assertIn('confidence', suggestion)
             self.assertIn('reason', suggestion)
     
+    def test_get_suggestions_uses_recognition_confidence(self):
+        """測試建議信心度來自識別分數"""
+        cards = {
+            'cards': {
+                'card_0': {'position': (0, 0, 40, 40), 'flipped': True, 'symbol': 'blue_bottle',
+                           'grid_pos': (0, 0), 'confidence': 0.8}
+            }
+        }
+        self.memory_logic.update_game_state(cards)
+        
+        test_cards = {
+            'cards': {
+                'card_2': {'position': (100, 0, 140, 40), 'flipped': True, 'symbol': 'blue_bottle',
+                           'grid_pos': (2, 0), 'confidence': 0.5}
+            }
+        }
+        suggestions = self.memory_logic.get_suggestions(test_cards)
+        
+        self.assertEqual(suggestions[0]['card_id'], 'card_0')
+        self.assertAlmostEqual(suggestions[0]['confidence'], 0.4)
+    
     def test_get_statistics(self):
         """測試統計資訊獲取"""
         # 設置一些初始狀態
@@ -268,6 +292,119 @@ class TestMemoryLogic(unittest.TestCase):
         self.assertFalse(self.memory_logic._is_card_matched('card_2'))
         self.assertFalse(self.memory_logic._is_card_matched('card_10'))
     
+    def test_symbol_index_follows_memory(self):
+        """測試符號索引隨記憶更新（同一張卡牌重新識別為不同符號）"""
+        card = {'position': (0, 0, 40, 40), 'flipped': True, 'symbol': 'blue_bottle', 'grid_pos': (0, 0)}
+        self.memory_logic.update_game_state({'cards': {'card_0': card}})
+        self.memory_logic.update_game_state({'cards': {'card_0': dict(card, symbol='pink_fish')}})
+        
+        self.assertEqual(self.memory_logic._symbol_cards, {'pink_fish': {'card_0': None}})
+        self.assertEqual(self.memory_logic.get_remembered_symbols(), {'card_0': 'pink_fish'})
+        
+        # 直接設定記憶地圖也會重建索引
+        self.memory_logic.memory_map = {
+            'card_3': {'symbol': 'cake', 'position': (3, 0), 'last_seen': 0.0}
+        }
+        self.assertEqual(list(self.memory_logic._symbol_cards), ['cake'])
+        
+    def test_matched_pairs_not_duplicated(self):
+        """測試已配對的卡牌在後續幀不會重複記錄"""
+        self.memory_logic.update_game_state(self.sample_cards_matched)
+        self.memory_logic.update_game_state(self.sample_cards_matched)
+        
+        self.assertEqual(len(self.memory_logic.matched_pairs), 1)
+        self.assertTrue(self.memory_logic._is_card_matched('card_0'))
+        self.assertTrue(self.memory_logic._is_card_matched('card_5'))
+        
+        self.memory_logic.reset_game()
+        self.assertFalse(self.memory_logic._is_card_matched('card_0'))
+        
+    def test_get_possible_symbols(self):
+        """測試仍可能出現的符號"""
+        all_symbols = ['blue_bottle', 'pink_fish', 'red_mask']
+        self.assertEqual(self.memory_logic.get_possible_symbols(all_symbols), set(all_symbols))
+        
+        # blue_bottle 的兩張卡牌都已記住，不可能再出現在其他位置
+        self.memory_logic.update_game_state(self.sample_cards_matched)
+        possible = self.memory_logic.get_possible_symbols(all_symbols)
+        
+        self.assertEqual(possible, {'pink_fish', 'red_mask'})
+        self.assertEqual(self.memory_logic.get_remembered_symbols()['card_0'], 'blue_bottle')
+    
+    def test_card_deltas_match_full_update(self):
+        """測試只套用改變的卡牌與每幀完整更新得到相同的記憶、配對與回合數"""
+        class FrameRecorder:
+            def __init__(self):
+                self.frames = []
+                
+            def update_game_state(self, detected_cards, now=None):
+                self.frames.append((copy.deepcopy(detected_cards), now))
+                
+        recorder = FrameRecorder()
+        play_game(recorder)
+        
+        full, incremental = MemoryLogic(), MemoryLogic()
+        full.event_log = GameEventLog()  # 記錄事件時才會計算回合數
+        turns_ended = 0
+        for frame, now in recorder.frames:
+            full.update_game_state(frame, now=now)
+            changes = incremental.apply_card_deltas(incremental.frame_deltas(frame), now=now)
+            turns_ended += changes['turn_ended']
+            # 沒有改變的幀不產生任何變更
+            self.assertFalse(incremental.apply_card_deltas(incremental.frame_deltas(frame), now=now)['changed'])
+            
+        self.assertEqual(sorted(map(sorted, incremental.matched_pairs)), sorted(map(sorted, full.matched_pairs)))
+        self.assertEqual(incremental.get_remembered_symbols(), full.get_remembered_symbols())
+        self.assertTrue(incremental.game_complete)
+        self.assertEqual(incremental.turn_count, turns_ended)
+        self.assertEqual(incremental.turn_count, full.turn_count)
+        
+    def test_frame_deltas_unchanged_frame(self):
+        """測試與上一個沒有變化的畫面相同時返回空字典，狀態改變後重新比對"""
+        def frame(**symbols):
+            return {'cards': {f'card_{i}': {'position': (0, 0, 40, 40), 'flipped': f'card_{i}' in symbols,
+                                            'symbol': symbols.get(f'card_{i}'), 'grid_pos': (i, 0),
+                                            'confidence': 0.9} for i in range(4)}}
+            
+        logic = self.memory_logic
+        # 尚未套用的變更，下一次呼叫仍要返回
+        self.assertEqual(list(logic.frame_deltas(frame(card_0='cake'))), ['card_0'])
+        self.assertEqual(list(logic.frame_deltas(frame(card_0='cake'))), ['card_0'])
+        logic.apply_card_deltas(logic.frame_deltas(frame(card_0='cake')), now=1.0)
+        self.assertEqual(logic.frame_deltas(frame(card_0='cake')), {})
+        self.assertEqual(logic.frame_deltas(frame(card_0='cake')), {})
+        self.assertEqual(list(logic.frame_deltas(frame(card_0='fish'))), ['card_0'])
+        
+        # 狀態由畫面以外的方式改變（例如重置）後，相同的畫面仍需比對
+        logic.reset_game()
+        self.assertEqual(list(logic.frame_deltas(frame(card_0='cake'))), ['card_0'])
+        
+    def test_card_deltas_change_set(self):
+        """測試變更集合列出翻開、蓋回、配對與回合結束"""
+        def card(symbol=None):
+            return {'position': (0, 0, 40, 40), 'flipped': symbol is not None, 'symbol': symbol,
+                    'grid_pos': (0, 0), 'confidence': 0.9}
+            
+        changes = self.memory_logic.apply_card_deltas({'card_0': card('cake'), 'card_1': card('fish')}, now=1.0)
+        self.assertEqual(changes['revealed'], ['card_0', 'card_1'])
+        self.assertFalse(changes['turn_ended'])
+        
+        changes = self.memory_logic.apply_card_deltas({'card_0': card(), 'card_1': card()}, now=2.0)
+        self.assertEqual(changes['hidden'], ['card_0', 'card_1'])
+        self.assertTrue(changes['turn_ended'])
+        
+        self.memory_logic.apply_card_deltas({'card_2': card('cake')}, now=3.0)
+        changes = self.memory_logic.apply_card_deltas({'card_0': card('cake')}, now=4.0)
+        self.assertEqual(changes['new_pairs'], [('card_2', 'card_0')])
+        self.assertTrue(changes['turn_ended'])
+        self.assertEqual(self.memory_logic.turn_count, 2)
+        self.assertEqual(self.memory_logic.memory_map['card_1']['symbol'], 'fish')
+        
+        # 沒有改變的幀
+        changes = self.memory_logic.apply_card_deltas({})
+        self.assertFalse(changes['changed'])
+        self.assertEqual(changes['new_pairs'], [])
+        
     def test_real_image_completed_memory_logic(self):
         """測試真實完成遊戲圖像的記憶邏輯"""
         if self.image_completed is None:
@@ -569,5 +706,108 @@ class TestMemoryLogic(unittest.TestCase):
             self.assertIsNotNone(memory_info['last_seen'], "應該記錄最後見到的時間")
 
 
+
+class TestGroupMatching(unittest.TestCase):
+    """N 張一組的配對測試類"""
+
+    def setUp(self):
+        """建立三張一組、3x3 遊戲板的遊戲邏輯"""
+        self.logic = MemoryLogic(group_size=3, total_groups=3)
+        self.cells = {f'card_{i}': (i % 3, i // 3) for i in range(9)}
+        self.now = 0.0
+
+    def show(self, **symbols):
+        """送出一幀，symbols 為翻開的卡牌與符號"""
+        self.now += 1.0
+        cards = {card_id: {'position': (0, 0, 40, 40), 'flipped': card_id in symbols,
+                           'symbol': symbols.get(card_id), 'grid_pos': grid_pos, 'confidence': 0.9}
+                 for card_id, grid_pos in self.cells.items()}
+        return self.logic.update_game_state({'cards': cards}, now=self.now)
+
+    def test_triple_match(self):
+        """測試湊滿三張才算配對，兩張相同時回合繼續"""
+        self.show(card_0='cake')
+        self.show(card_0='cake', card_1='cake')
+        self.assertEqual(self.logic.matched_pairs, [])
+        self.assertEqual(self.logic.turn_state.phase, 'second_up')
+        self.show(card_0='cake', card_1='cake', card_2='cake')
+        self.assertEqual(self.logic.matched_pairs, [('card_0', 'card_1', 'card_2')])
+        self.assertEqual(self.logic.turn_count, 1)
+
+    def test_triple_miss_and_suggestions(self):
+        """測試出現不同符號即配對失敗，之後建議記憶中的同組卡牌"""
+        self.show(card_0='cake')
+        self.show(card_0='cake', card_1='fish')
+        self.assertEqual(self.logic.turn_state.phase, 'resolved_miss')
+        self.show()
+        self.assertEqual(self.logic.turn_count, 1)
+        self.show(card_2='cake')
+        self.show()
+
+        # 翻開第三張 cake 時建議記憶中的另外兩張
+        result = self.show(card_3='cake')
+        suggestions = self.logic.current_suggestions()
+        self.assertEqual({s['card_id'] for s in suggestions}, {'card_0', 'card_2'})
+        self.assertEqual({s['type'] for s in suggestions}, {'direct_match'})
+        self.assertAlmostEqual(suggestions[0]['confidence'], 0.9 * 0.9)
+        self.assertFalse(result['game_complete'])
+
+        # 記住整組 cake 時，沒有翻開的卡牌也建議這一組
+        self.show()
+        suggestions = self.logic.current_suggestions()
+        self.assertEqual({s['card_id'] for s in suggestions}, {'card_0', 'card_2', 'card_3'})
+        self.assertEqual({s['type'] for s in suggestions}, {'memory_pair'})
+        self.assertEqual(self.logic.get_possible_symbols(['cake', 'fish', 'bell']), {'fish', 'bell'})
+
+    def test_explore_without_solver(self):
+        """測試非兩張一組時不使用求解器，改為建議翻開未見過的卡牌"""
+        self.show(card_0='cake')
+        suggestion = self.logic.current_suggestions()[0]
+        self.assertEqual(suggestion['type'], 'explore')
+        self.assertAlmostEqual(suggestion['confidence'], 2 / 8)
+        self.assertIsNone(self.logic.get_decision(self.logic._board_cards()))
+
+    def test_full_game_and_replay(self):
+        """測試三張一組的完整遊戲，重播紀錄得到相同結果"""
+        self.logic.event_log = GameEventLog()
+        order = ['cake', 'fish', 'bell'] * 3
+        for group in range(3):
+            cards = {f'card_{i}': order[i] for i in range(9) if order[i] == order[group]}
+            shown = {}
+            for card_id, symbol in cards.items():
+                shown[card_id] = symbol
+                matched = {c: order[int(c.split('_')[1])] for pair in self.logic.matched_pairs for c in pair}
+                result = self.show(**matched, **shown)
+        self.assertTrue(result['game_complete'])
+        self.assertEqual(self.logic.get_statistics()['total_pairs'], 3)
+        self.assertEqual(self.logic.turn_count, 3)
+
+        # 紀錄中的 setup 事件讓預設的重播以三張一組重建
+        replayed = replay_events(self.logic.event_log.events)
+        self.assertEqual((replayed.group_size, replayed.total_groups), (3, 3))
+        self.assertEqual(replayed.turn_state.group_size, 3)
+        self.assertEqual(replayed.matched_pairs, self.logic.matched_pairs)
+        self.assertTrue(replayed.game_complete)
+        self.assertEqual(replayed.turn_count, 3)
+
+    def test_detector_cluster_limit(self):
+        """測試沒有模板時的分群數上限依組大小計算"""
+        self.assertEqual(CardDetector().symbol_recognizer.symbol_clusterer.max_clusters, 12)
+        self.assertEqual(CardDetector(group_size=3).symbol_recognizer.symbol_clusterer.max_clusters, 8)
+
+    def test_mixed_group_sizes(self):
+        """測試個別符號的組大小"""
+        logic = MemoryLogic(group_size=2, total_groups=2, group_sizes={'star': 3})
+        self.logic = logic
+        self.show(card_0='star')
+        self.show(card_0='star', card_1='star')
+        self.assertEqual(logic.matched_pairs, [])
+        self.show(card_0='star', card_1='star', card_2='star')
+        self.show(card_0='star', card_1='star', card_2='star', card_3='moon')
+        self.show(card_0='star', card_1='star', card_2='star', card_3='moon', card_4='moon')
+        self.assertEqual(logic.matched_pairs, [('card_0', 'card_1', 'card_2'), ('card_3', 'card_4')])
+        self.assertTrue(logic.game_complete)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+最佳翻牌求解器測試
+測試盤面知識的位元遮罩編碼、期望值計算、時間預算與快取
+"""
+
+import unittest
+import numpy as np
+from logic.memory_logic import MemoryLogic
+from logic.memory_solver import (
+    MemorySolver, BoardKnowledge, mask_cells,
+    ACTION_MATCH_PAIR, ACTION_MATCH_CARD, ACTION_FLIP_UNKNOWN
+)
+
+
+def play_with_solver(solver, symbols, rng):
+    """以求解器的決策玩一局，返回使用的回合數"""
+    cells = [f'card_{i}' for i in range(len(symbols))]
+    symbol_cards, matched = {}, set()
+
+    def reveal(card_id):
+        symbol = symbols[cells.index(card_id)]
+        symbol_cards.setdefault(symbol, [])
+        if card_id not in symbol_cards[symbol]:
+            symbol_cards[symbol].append(card_id)
+        return symbol
+
+    turns = 0
+    while len(matched) < len(cells):
+        turns += 1
+        board = BoardKnowledge.from_memory(cells, symbol_cards, matched)
+        decision = solver.decide(board)
+        if decision['action'] == ACTION_MATCH_PAIR:
+            matched.update(decision['cards'])
+            continue
+        first = decision['cards'][rng.integers(len(decision['cards']))]  # 未見過的卡牌任選一張
+        reveal(first)
+        board = BoardKnowledge.from_memory(cells, symbol_cards, matched)
+        decision = solver.decide(board, first)
+        second = decision['cards'][rng.integers(len(decision['cards']))]
+        if reveal(second) == reveal(first):
+            matched.update((first, second))
+    return turns
+
+
+class TestMemorySolver(unittest.TestCase):
+    """最佳翻牌求解器測試類"""
+
+    def setUp(self):
+        """設置測試環境"""
+        self.solver = MemorySolver(time_budget=0)
+        self.cells = [f'card_{i}' for i in range(8)]
+
+    def test_board_knowledge_masks(self):
+        """測試由記憶建立位元遮罩"""
+        board = BoardKnowledge.from_memory(
+            self.cells, {'a': ['card_0', 'card_3'], 'b': ['card_5'], 'c': ['card_1', 'card_2']},
+            ['card_1', 'card_2'])
+        self.assertEqual(board.matched, 0b110)
+        self.assertEqual(board.known, {'a': 0b1001, 'b': 0b100000})
+        self.assertEqual(mask_cells(board.unknown, self.cells), ['card_4', 'card_6', 'card_7'])
+        self.assertEqual(board.singles, ['b'])
+        self.assertEqual(board.pairs, ['a'])
+        self.assertEqual(board.symbol_of('card_5'), 'b')
+
+    def test_small_boards_exact(self):
+        """測試小遊戲板的期望值與手算結果相同"""
+        self.assertEqual(self.solver.expected_turns(0, 0), 0.0)
+        self.assertEqual(self.solver.expected_turns(2, 0), 1.0)
+        self.assertAlmostEqual(self.solver.expected_turns(4, 0), 8 / 3)
+        self.assertEqual(self.solver.expected_turns(1, 1), 1.0)
+        self.assertEqual(self.solver.expected_turns(2, 2, known_pairs=1), 3.0)
+        self.assertIsNone(self.solver.expected_turns(3, 0))  # 不存在的狀態
+
+    def test_expected_turns_matches_play(self):
+        """測試依決策實際玩的平均回合數接近期望值"""
+        rng = np.random.default_rng(0)
+        symbols = np.repeat(np.arange(4), 2)
+        turns = [play_with_solver(self.solver, rng.permutation(symbols), rng) for _ in range(2000)]
+        self.assertAlmostEqual(np.mean(turns), self.solver.expected_turns(8, 0), delta=0.1)
+
+    def test_decisions(self):
+        """測試已知配對優先，翻開卡牌的另一半已知時直接配對"""
+        board = BoardKnowledge.from_memory(self.cells, {'a': ['card_0', 'card_3'], 'b': ['card_5']}, [])
+        decision = self.solver.decide(board)
+        self.assertEqual(decision['action'], ACTION_MATCH_PAIR)
+        self.assertEqual(decision['cards'], ['card_0', 'card_3'])
+
+        decision = self.solver.decide(board, 'card_3')
+        self.assertEqual(decision['action'], ACTION_MATCH_CARD)
+        self.assertEqual(decision['cards'], ['card_0'])
+
+        decision = self.solver.decide(board, 'card_5')
+        self.assertEqual(decision['action'], ACTION_FLIP_UNKNOWN)
+        self.assertNotIn('card_5', decision['cards'])
+        self.assertAlmostEqual(decision['match_probability'], 1 / 5)
+
+    def test_inconsistent_board(self):
+        """測試記憶與盤面不一致時不提供決策"""
+        board = BoardKnowledge.from_memory(self.cells[:3], {}, [])
+        self.assertIsNone(self.solver.decide(board))
+
+    def test_time_budget_resumes(self):
+        """測試超過時間預算時返回 None，已計算的部分保留到下一次查詢"""
+        solver = MemorySolver(time_budget=1e-9)
+        self.assertIsNone(solver.expected_turns(400, 0))
+        computed = len(solver._rows)
+        while solver.expected_turns(400, 0) is None:
+            self.assertGreater(len(solver._rows), computed)
+            computed = len(solver._rows)
+        self.assertAlmostEqual(solver.expected_turns(400, 0), self.solver.expected_turns(400, 0))
+
+    def test_bounded_cache(self):
+        """測試快取列數有上限且淘汰後仍算出相同結果"""
+        solver = MemorySolver(max_rows=8, time_budget=0)
+        self.assertAlmostEqual(solver.expected_turns(60, 0), self.solver.expected_turns(60, 0))
+        self.assertLessEqual(len(solver._rows), 8)
+        self.assertAlmostEqual(solver.expected_turns(30, 2), self.solver.expected_turns(30, 2))
+
+    def test_memory_logic_explore_suggestion(self):
+        """測試翻開的卡牌沒有已知配對時建議翻開未見過的卡牌"""
+        logic = MemoryLogic()
+
+        def frame(flipped):
+            return {'cards': {card_id: {
+                'position': (0, 0, 40, 40), 'flipped': card_id in flipped,
+                'symbol': flipped.get(card_id), 'grid_pos': (i % 4, i // 4), 'confidence': 0.9
+            } for i, card_id in enumerate(self.cells)}}
+
+        logic.update_game_state(frame({'card_0': 'a', 'card_1': 'b'}))
+        logic.update_game_state(frame({}))
+        current = frame({'card_2': 'c'})
+        logic.update_game_state(current)
+
+        suggestions = logic.get_suggestions(current)
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0]['type'], 'explore')
+        self.assertIn(suggestions[0]['card_id'], ['card_3', 'card_4', 'card_5', 'card_6', 'card_7'])
+        self.assertAlmostEqual(suggestions[0]['confidence'], 1 / 5)
+        self.assertGreater(suggestions[0]['expected_turns'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
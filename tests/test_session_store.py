@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+多局遊戲狀態儲存測試
+測試批次更新與批次建議和單局 MemoryLogic 的結果一致
+"""
+
+import unittest
+import time
+import numpy as np
+from logic.memory_logic import MemoryLogic
+from logic.session_store import (
+    SessionStore, CELL_DOWN, SUGGEST_NONE, SUGGEST_DIRECT, SUGGEST_EXPLORE, SUGGESTION_TYPES
+)
+
+
+def make_frame(symbols, face_up):
+    """建立一幀 detect_cards 格式的畫面"""
+    return {'cards': {f'card_{i}': {
+        'position': (0, 0, 40, 40),
+        'flipped': i in face_up,
+        'symbol': f'symbol_{symbols[i]}' if i in face_up else None,
+        'confidence': 0.9,
+        'grid_pos': (i % 6, i // 6)
+    } for i in range(len(symbols))}}
+
+
+class TestSessionStore(unittest.TestCase):
+    """多局遊戲狀態儲存測試類"""
+
+    def test_matches_memory_logic(self):
+        """測試多局同時隨機翻牌時，每局的配對、回合、記憶與建議都與 MemoryLogic 相同"""
+        rng = np.random.default_rng(0)
+        num_games = 20
+        boards = [rng.permutation(np.repeat(np.arange(12), 2)) for _ in range(num_games)]
+        store = SessionStore(capacity=4)  # 測試自動擴充
+        logics = [MemoryLogic() for _ in range(num_games)]
+        for game in range(num_games):
+            store.open(('table', game))
+        matched = [set() for _ in range(num_games)]
+        now = 0.0
+
+        for step in range(60):
+            picks = []
+            for game in range(num_games):
+                unmatched = [i for i in range(24) if i not in matched[game]]
+                picks.append(rng.choice(unmatched, 2, replace=False) if unmatched else [])
+
+            # 每回合三幀：第一張翻開、第二張翻開、蓋回（配對的卡牌保持翻開）
+            for stage in range(3):
+                now += 1.0
+                frames = []
+                for game in range(num_games):
+                    face_up = set(matched[game])
+                    if len(picks[game]) and stage < 2:
+                        face_up.update(int(cell) for cell in picks[game][:stage + 1])
+                    frames.append(make_frame(boards[game], face_up))
+                    logics[game].update_game_state(frames[-1], now=now)
+                    store.submit(('table', game), frames[-1])
+                store.update_pending(now)
+
+                if stage == 0:
+                    # 第一張翻開時比較建議
+                    result = store.suggest()
+                    for game in range(num_games):
+                        expected = logics[game].get_suggestions(frames[game])
+                        kind = result['kind'][result['rows'] == store.row(('table', game))][0]
+                        if kind == SUGGEST_NONE:
+                            self.assertEqual(expected, [])
+                        else:
+                            self.assertEqual(SUGGESTION_TYPES[kind], expected[0]['type'])
+                            cell = result['cells'][result['rows'] == store.row(('table', game))][0, 0]
+                            self.assertIn(f'card_{cell}', [s['card_id'] for s in expected])
+
+            for game in range(num_games):
+                for pair in logics[game].matched_pairs[len(matched[game]) // 2:]:
+                    matched[game].update(int(card_id.split('_')[1]) for card_id in pair)
+
+        for game in range(num_games):
+            state = store.session_state(('table', game))
+            self.assertEqual(state['matched_pairs'], len(logics[game].matched_pairs))
+            self.assertEqual(state['turns'], logics[game].turn_count)
+            self.assertEqual(state['memory'], logics[game].get_remembered_symbols())
+        self.assertGreater(sum(len(m) for m in matched), 0)
+
+    def test_suggestion_kinds(self):
+        """測試直接配對與翻開未見過卡牌的建議"""
+        store = SessionStore(num_cells=4)
+        store.open('a')
+        store.open('b')
+        symbols = [0, 1, 0, 1]
+        store.update([0, 1], [[0, 1, CELL_DOWN, CELL_DOWN], [0, CELL_DOWN, CELL_DOWN, CELL_DOWN]], now=1.0)
+        store.update([0, 1], [[CELL_DOWN] * 4, [CELL_DOWN] * 4], now=2.0)
+        store.update([0, 1], [[CELL_DOWN, CELL_DOWN, symbols[2], CELL_DOWN],
+                              [CELL_DOWN, CELL_DOWN, CELL_DOWN, symbols[3]]], now=3.0)
+
+        result = store.suggest([0, 1])
+        self.assertEqual(list(result['kind']), [SUGGEST_DIRECT, SUGGEST_EXPLORE])
+        self.assertEqual(result['cells'][0, 0], 0)
+        self.assertEqual(result['cells'][1, 0], 1)
+
+    def test_session_lifecycle(self):
+        """測試關閉的遊戲列會被重複使用並清除狀態"""
+        store = SessionStore(num_cells=4, capacity=2)
+        first = store.open('a')
+        cake = store.symbol_id('cake')
+        store.update([first], [[cake, cake, CELL_DOWN, CELL_DOWN]], now=1.0)
+        self.assertEqual(store.session_state('a')['matched_pairs'], 1)
+        self.assertEqual(store.session_state('a')['memory'], {'card_0': 'cake', 'card_1': 'cake'})
+
+        store.close('a')
+        self.assertEqual(store.open('b'), first)
+        self.assertEqual(store.session_state('b')['matched_pairs'], 0)
+        self.assertIsNone(store.session_state('b')['start_time'])
+        self.assertEqual(len(store), 1)
+
+    def test_last_seen_round_trip(self):
+        """測試以目前的 epoch 秒數記錄的最後看到時間不會失去精度"""
+        store = SessionStore(num_cells=4, capacity=2)
+        row = store.open('a')
+        cake, fish = store.symbol_id('cake'), store.symbol_id('fish')
+        start = 1760000000.25
+        store.update([row], [[cake, CELL_DOWN, CELL_DOWN, CELL_DOWN]], now=start)
+        store.update([row], [[CELL_DOWN, fish, CELL_DOWN, CELL_DOWN]], now=start + 3.5)
+        last_seen = store.session_state('a')['last_seen']
+        self.assertAlmostEqual(last_seen['card_0'], start, places=3)
+        self.assertAlmostEqual(last_seen['card_1'], start + 3.5, places=3)
+
+    def test_compact_and_fast(self):
+        """測試每局只需數百位元組，一次呼叫更新數千局"""
+        store = SessionStore(capacity=5000)
+        self.assertLess(store.bytes_per_session, 300)
+
+        rng = np.random.default_rng(1)
+        for game in range(5000):
+            store.open(game)
+        rows = np.arange(5000)
+        observed = np.full((5000, 24), CELL_DOWN, dtype=np.int16)
+        observed[rows, rng.integers(0, 24, 5000)] = rng.integers(0, 12, 5000)
+        start = time.perf_counter()
+        store.update(rows, observed, now=1.0)
+        store.suggest(rows)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+符號識別器測試
+測試翻翻樂符號識別功能
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+import cv2
+from recognition.symbol_recognizer import SymbolRecognizer
+from recognition.recognition_cache import RecognitionCache, perceptual_hash
+from recognition.symbol_descriptor import DescriptorIndex, compute_descriptor, DESCRIPTOR_LENGTH
+from recognition.symbol_clusterer import OnlineSymbolClusterer
+from recognition.template_bank import (
+    TemplateBank, MatchingMode, build_template_bank, is_bank_stale, prepare_for_matching,
+    augment_template
+)
+from recognition.recognition_result import RecognitionResult
+from recognition.template_writer import TemplateWriter, write_image_atomic
+
+
+class TestSymbolRecognizer(unittest.TestCase):
+    """符號識別器測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.template_dir = tempfile.mkdtemp()
+        self.recognizer = SymbolRecognizer(template_dir=self.template_dir)
+
+        # 建立幾個隨機符號作為模板
+        rng = np.random.default_rng(0)
+        self.symbols = {
+            f'symbol_{i}': rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+            for i in range(4)
+        }
+        for name, image in self.symbols.items():
+            self.recognizer.learn_symbol(image, name)
+
+    def tearDown(self):
+        """測試後清理"""
+        self.recognizer.flush()
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+
+    def test_recognize_symbol_matches_template(self):
+        """測試單張識別"""
+        for name, image in self.symbols.items():
+            self.assertEqual(self.recognizer.recognize_symbol(image), name)
+
+        self.assertIsNone(self.recognizer.recognize_symbol(None))
+        self.assertIsNone(self.recognizer.recognize_symbol(np.array([])))
+
+    def test_recognize_batch_matches_match_template(self):
+        """測試批次識別分數與 matchTemplate 一致"""
+        names = list(self.symbols.keys())
+        crops = [cv2.resize(self.symbols[name], (80, 60)) for name in names]
+        crops.append(None)
+
+        results = self.recognizer.recognize_batch(crops)
+
+        self.assertEqual(len(results), len(crops))
+        for name, crop, result in zip(names, crops, results):
+            self.assertEqual(result.symbol, name)
+            expected = cv2.matchTemplate(cv2.resize(crop, (64, 64)), self.symbols[name],
+                                         cv2.TM_CCOEFF_NORMED)[0, 0]
+            self.assertAlmostEqual(result.score, float(expected), places=4)
+            self.assertGreater(result.margin, 0)
+
+        self.assertIsNone(results[-1].symbol)
+
+    def test_recognize_batch_below_threshold(self):
+        """測試低於閾值時不返回符號"""
+        noise = np.random.default_rng(1).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+        result = self.recognizer.recognize_batch([noise])[0]
+
+        self.assertIsNone(result.symbol)
+        self.assertLess(result.score, self.recognizer.match_threshold)
+
+    def test_learn_symbol_updates_batch(self):
+        """測試學習新符號後立即可被批次識別"""
+        new_symbol = np.random.default_rng(2).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+        self.recognizer.recognize_batch([new_symbol])
+
+        self.recognizer.learn_symbol(new_symbol, 'new_symbol')
+
+        self.assertEqual(self.recognizer.recognize_batch([new_symbol])[0].symbol, 'new_symbol')
+
+    def test_recognition_cache_hits(self):
+        """測試重複識別同一張卡牌時命中快取"""
+        image = self.symbols['symbol_0']
+        cache = self.recognizer.recognition_cache
+        cache.clear()
+        misses_before = cache.misses
+
+        self.recognizer.recognize_symbol(image)
+        hits_before = cache.hits
+        # 輕微雜訊不應改變感知哈希的結果
+        noisy = np.clip(image.astype(np.int16) + 1, 0, 255).astype(np.uint8)
+        self.assertEqual(self.recognizer.recognize_symbol(noisy), 'symbol_0')
+
+        self.assertEqual(cache.misses, misses_before + 1)
+        self.assertEqual(cache.hits, hits_before + 1)
+
+    def test_recognition_cache_invalidated_on_template_change(self):
+        """測試模板變更時清除快取"""
+        self.recognizer.recognize_symbol(self.symbols['symbol_0'])
+        self.assertGreater(len(self.recognizer.recognition_cache), 0)
+
+        self.recognizer.learn_symbol(self.symbols['symbol_0'], 'symbol_0')
+        self.assertEqual(len(self.recognizer.recognition_cache), 0)
+
+        self.recognizer.recognize_symbol(self.symbols['symbol_0'])
+        self.recognizer.load_templates()
+        self.assertEqual(len(self.recognizer.recognition_cache), 0)
+
+    def test_recognition_cache_invalidated_on_setting_change(self):
+        """測試變更候選數、不確定差距或描述子閾值時清除快取"""
+        image = self.symbols['symbol_0']
+        for name, value in (('top_k', 2), ('uncertain_margin', 0.3), ('descriptor_threshold', 0.8)):
+            self.recognizer.recognize_symbol(image)
+            self.assertGreater(len(self.recognizer.recognition_cache), 0)
+            setattr(self.recognizer, name, value)
+            self.assertEqual(len(self.recognizer.recognition_cache), 0)
+        self.assertEqual(len(self.recognizer.recognize(image).top_k), 2)
+
+    def test_descriptor_mode(self):
+        """測試描述子模式識別（使用專案內建模板）"""
+        recognizer = SymbolRecognizer(template_dir="templates")
+        if not recognizer.templates:
+            self.skipTest("未找到內建模板")
+        recognizer.set_recognition_mode('descriptor')
+
+        for name, template in recognizer.templates.items():
+            # 輕微錯位的裁切不應影響描述子識別
+            enlarged = cv2.resize(template, (72, 72))
+            shifted = enlarged[4:68, 6:70]
+            self.assertEqual(recognizer.recognize_symbol(shifted), name)
+
+        with self.assertRaises(ValueError):
+            recognizer.set_recognition_mode('unknown')
+
+    def test_descriptor_mode_respects_candidates_and_thresholds(self):
+        """測試描述子模式同樣遵守候選範圍與個別符號閾值"""
+        self.recognizer.set_recognition_mode('descriptor')
+        image = self.symbols['symbol_0']
+        self.assertEqual(self.recognizer.recognize_symbol(image), 'symbol_0')
+
+        result = self.recognizer.recognize(image, candidates={'symbol_1', 'symbol_2'})
+        self.assertNotEqual(result.symbol, 'symbol_0')
+        self.assertNotIn('symbol_0', dict(result.top_k))
+
+        self.recognizer.set_symbol_threshold('symbol_0', 1.01)
+        self.assertIsNone(self.recognizer.recognize_symbol(image))
+
+    def test_cascade_matches_brute_force(self):
+        """測試串接識別與暴力匹配結果一致"""
+        crops = [cv2.resize(image, (70, 70)) for image in self.symbols.values()]
+        brute = self.recognizer.recognize_batch(crops)
+
+        self.recognizer.recognition_cache.clear()
+        self.recognizer.cascade_min_templates = 0
+        self.recognizer.cascade_top_k = 2
+        cascade = self.recognizer.recognize_batch(crops)
+
+        for expected, result in zip(brute, cascade):
+            self.assertEqual(result.symbol, expected.symbol)
+            self.assertAlmostEqual(result.score, expected.score, places=4)
+
+    def test_candidates_restrict_matching(self):
+        """測試候選符號限制只比對仍可能出現的模板"""
+        image = self.symbols['symbol_0']
+
+        self.assertEqual(self.recognizer.recognize_symbol(image, candidates={'symbol_0'}), 'symbol_0')
+        self.assertIsNone(self.recognizer.recognize_symbol(image, candidates={'symbol_1', 'symbol_2'}))
+        # 不限制時仍可識別（快取結果不可用於不同的候選範圍）
+        self.assertEqual(self.recognizer.recognize_symbol(image), 'symbol_0')
+
+    def test_expected_symbol_early_accept(self):
+        """測試預期符號分數夠高時提前接受"""
+        images = [self.symbols['symbol_0'], self.symbols['symbol_1']]
+        results = self.recognizer.recognize_batch(images, expected=['symbol_0', 'symbol_2'])
+
+        self.assertEqual(results[0].symbol, 'symbol_0')
+        self.assertAlmostEqual(results[0].margin,
+                               results[0].score - self.recognizer.match_threshold, places=5)
+        # 預期符號不符時仍比對全部模板
+        self.assertEqual(results[1].symbol, 'symbol_1')
+        self.assertTrue(results[0].partial)
+        self.assertFalse(results[1].partial)
+
+        # 提前接受的結果不寫入快取，之後的查詢得到完整的前 k 名
+        result = self.recognizer.recognize(self.symbols['symbol_0'])
+        self.assertFalse(result.partial)
+        self.assertEqual(len(result.top_k), self.recognizer.top_k)
+
+    def test_recognition_result_details(self):
+        """測試識別結果包含前 k 名、差距與不確定旗標"""
+        result = self.recognizer.recognize(self.symbols['symbol_0'])
+
+        self.assertEqual(result.symbol, 'symbol_0')
+        self.assertEqual(len(result.top_k), self.recognizer.top_k)
+        self.assertEqual(result.top_k[0][0], 'symbol_0')
+        self.assertGreaterEqual(result.top_k[0][1], result.top_k[1][1])
+        self.assertAlmostEqual(result.margin, result.score - max(result.top_k[1][1], 0), places=5)
+        self.assertFalse(result.uncertain)
+
+        # 兩個符號的混合圖像差距很小，應標記為不確定
+        blend = cv2.addWeighted(self.symbols['symbol_0'], 0.5, self.symbols['symbol_1'], 0.5, 0)
+        self.assertTrue(self.recognizer.recognize(blend).uncertain)
+
+    def test_per_symbol_threshold(self):
+        """測試個別符號閾值"""
+        image = self.symbols['symbol_0']
+        self.recognizer.set_symbol_threshold('symbol_0', 1.01)
+        self.assertIsNone(self.recognizer.recognize_symbol(image))
+        self.assertEqual(self.recognizer.recognize(image).best_label, 'symbol_0')
+
+        self.recognizer.set_symbol_threshold('symbol_0', None)
+        self.assertEqual(self.recognizer.recognize_symbol(image), 'symbol_0')
+
+    def test_reduced_matching_modes(self):
+        """測試低解析度、單一通道與內縮裁切的匹配設定"""
+        images = list(self.symbols.values())
+        for channels in ('bgr', 'gray', 'chroma_a', 'chroma_b'):
+            self.recognizer.set_matching_mode(32, channels, 0.1)
+            results = self.recognizer.recognize_batch(images)
+            self.assertEqual([result.symbol for result in results], list(self.symbols.keys()))
+
+        # 與 OpenCV 對同樣裁切、縮放後的灰階圖像計算的分數一致
+        self.recognizer.set_matching_mode(16, 'gray', 0.0)
+        result = self.recognizer.recognize(images[0])
+        crop = cv2.resize(cv2.cvtColor(images[0], cv2.COLOR_BGR2GRAY), (16, 16),
+                          interpolation=cv2.INTER_AREA)
+        template = cv2.resize(cv2.cvtColor(images[1], cv2.COLOR_BGR2GRAY), (16, 16),
+                              interpolation=cv2.INTER_AREA)
+        expected = cv2.matchTemplate(crop, template, cv2.TM_CCOEFF_NORMED)[0, 0]
+        scores = dict(result.top_k)
+        self.assertAlmostEqual(scores['symbol_1'], expected, places=4)
+
+    def test_invalid_matching_mode(self):
+        """測試無效的匹配設定"""
+        with self.assertRaises(ValueError):
+            self.recognizer.set_matching_mode(128)
+        with self.assertRaises(ValueError):
+            self.recognizer.set_matching_mode(32, 'hsv')
+        with self.assertRaises(ValueError):
+            self.recognizer.set_matching_mode(32, 'gray', 0.5)
+
+    def test_augmented_bank_matches_rotated_and_relit(self):
+        """測試擴增模板庫可識別旋轉 180 度且光照不同的卡牌"""
+        image = self.symbols['symbol_2']
+        relit = np.clip((image / 255.0) ** 1.6 * 255.0, 0, 255).astype(np.uint8)
+        rotated = np.ascontiguousarray(np.rot90(relit, 2))
+        self.assertIsNone(self.recognizer.recognize_symbol(rotated))
+
+        self.recognizer.set_template_bank(TemplateBank.from_images(self.symbols, augment=True))
+        result = self.recognizer.recognize(rotated)
+        self.assertEqual(result.symbol, 'symbol_2')
+        self.assertGreater(result.score, 0.95)
+        self.assertEqual(len({name for name, _ in result.top_k}), len(result.top_k))
+
+        # 預期符號提前接受也比對所有變體
+        expected = self.recognizer.recognize_batch([np.rot90(image).copy()], expected=['symbol_2'])[0]
+        self.assertEqual(expected.symbol, 'symbol_2')
+
+    def test_load_from_packed_bank(self):
+        """測試重新載入時使用記憶體映射的打包模板庫"""
+        self.assertTrue(is_bank_stale(self.template_dir))  # 預設不寫入打包模板庫
+        self.recognizer.enable_bank_writing()  # 由已載入的 PNG 在背景建立打包模板庫
+        self.assertTrue(self.recognizer.flush(timeout=10.0))
+        self.assertFalse(is_bank_stale(self.template_dir))
+
+        recognizer = SymbolRecognizer(template_dir=self.template_dir)
+
+        self.assertIsInstance(recognizer._get_bank().vectors, np.memmap)
+        self.assertEqual(set(recognizer.templates.keys()), set(self.symbols.keys()))
+        for name, image in self.symbols.items():
+            self.assertEqual(recognizer.recognize_symbol(image), name)
+
+
+class TestTemplateBank(unittest.TestCase):
+    """打包模板庫測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.template_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(5)
+        for i in range(3):
+            image = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+            cv2.imwrite(os.path.join(self.template_dir, f"symbol_{i}.png"), image)
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+
+    def test_build_and_load_roundtrip(self):
+        """測試打包後載入的內容一致"""
+        bank = build_template_bank(self.template_dir)
+        loaded = TemplateBank.load(os.path.join(self.template_dir, "template_bank.npy"))
+
+        self.assertEqual(loaded.names, bank.names)
+        np.testing.assert_array_equal(loaded.images, bank.images)
+        np.testing.assert_allclose(loaded.vectors, bank.vectors)
+        np.testing.assert_allclose(loaded.descriptors, bank.descriptors)
+        self.assertFalse(loaded.vectors.flags.writeable)
+
+    def test_stale_detection(self):
+        """測試模板增加時打包模板庫視為過期"""
+        self.assertTrue(is_bank_stale(self.template_dir))
+        build_template_bank(self.template_dir)
+        self.assertFalse(is_bank_stale(self.template_dir))
+
+        cv2.imwrite(os.path.join(self.template_dir, "symbol_new.png"),
+                    np.zeros((64, 64, 3), dtype=np.uint8))
+        self.assertTrue(is_bank_stale(self.template_dir))
+
+    def test_with_templates(self):
+        """測試更新模板庫時只改變指定的列"""
+        bank = TemplateBank.from_images({'a': np.zeros((64, 64, 3), dtype=np.uint8)})
+        updated = bank.with_templates({'b': np.full((64, 64, 3), 9, dtype=np.uint8)}, removed=['a'])
+
+        self.assertEqual(bank.names, ['a'])
+        self.assertEqual(updated.names, ['b'])
+        self.assertEqual(updated.vectors.shape[0], 1)
+
+
+    def test_augmented_bank_roundtrip(self):
+        """測試擴增模板庫的變體與模板對應可存檔、載入與更新"""
+        bank_path = os.path.join(self.template_dir, 'bank.npy')
+        bank = build_template_bank(self.template_dir, bank_path, augment=True)
+        variants_per_symbol = len(augment_template(bank.images[0]))
+        self.assertEqual(len(bank.variant_symbols), 3 * variants_per_symbol)
+
+        loaded = TemplateBank.load(bank_path)
+        self.assertTrue(loaded.has_variants)
+        np.testing.assert_array_equal(loaded.variant_symbols, bank.variant_symbols)
+        np.testing.assert_array_equal(loaded.variant_vectors, bank.variant_vectors)
+
+        # 每個模板取所有變體的最高分
+        scores = np.random.default_rng(1).random((2, len(loaded.variant_symbols)))
+        reduced = loaded.reduce_variants(scores)
+        for idx in range(len(loaded)):
+            np.testing.assert_allclose(reduced[:, idx], scores[:, loaded.symbol_rows(idx)].max(axis=1))
+
+        updated = loaded.with_templates({'symbol_new': bank.images[0]}, removed=['symbol_0'])
+        self.assertEqual(updated.names, ['symbol_1', 'symbol_2', 'symbol_new'])
+        self.assertEqual(len(updated.variant_symbols), 3 * variants_per_symbol)
+        np.testing.assert_array_equal(updated.variant_images[updated.symbol_rows(0)],
+                                      bank.variant_images[bank.symbol_rows(1)])
+        np.testing.assert_array_equal(updated.variant_images[updated.symbol_rows(2)],
+                                      bank.variant_images[bank.symbol_rows(0)])
+
+    def test_recognizer_writes_bank_only_when_enabled(self):
+        """測試建立識別器不寫入打包模板庫，過期重建時保留擴增變體"""
+        SymbolRecognizer(template_dir=self.template_dir).flush(timeout=10.0)
+        self.assertFalse(os.path.exists(os.path.join(self.template_dir, "template_bank.npy")))
+
+        build_template_bank(self.template_dir, augment=True)
+        cv2.imwrite(os.path.join(self.template_dir, "symbol_new.png"),
+                    np.zeros((64, 64, 3), dtype=np.uint8))
+        recognizer = SymbolRecognizer(template_dir=self.template_dir)
+        self.assertTrue(recognizer.augment_bank)
+        recognizer.enable_bank_writing()
+        self.assertTrue(recognizer.flush(timeout=10.0))
+        loaded = TemplateBank.load(os.path.join(self.template_dir, "template_bank.npy"))
+        self.assertTrue(loaded.has_variants)
+        self.assertIn('symbol_new', loaded.names)
+
+        # 啟用寫入後重新載入過期的模板庫，由背景寫入器存檔
+        cv2.imwrite(os.path.join(self.template_dir, "symbol_newer.png"),
+                    np.full((64, 64, 3), 255, dtype=np.uint8))
+        recognizer.load_templates()
+        self.assertTrue(recognizer.flush(timeout=10.0))
+        self.assertIn('symbol_newer', TemplateBank.load(os.path.join(self.template_dir, "template_bank.npy")).names)
+
+    def test_matching_vectors_cached_per_mode(self):
+        """測試模板庫依匹配設定快取模板向量"""
+        bank = build_template_bank(self.template_dir)
+        self.assertIs(bank.matching_vectors(MatchingMode()), bank.vectors)
+
+        mode = MatchingMode(24, 'chroma_a', 0.2)
+        vectors = bank.matching_vectors(mode)
+        self.assertEqual(vectors.shape, (len(bank), 24 * 24))
+        self.assertIs(bank.matching_vectors(MatchingMode(24, 'chroma_a', 0.2)), vectors)
+        np.testing.assert_allclose(vectors[0], prepare_for_matching(bank.images[0], mode))
+
+
+class TestTemplateWriter(unittest.TestCase):
+    """背景模板寫入測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.template_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(9)
+        self.images = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(3)]
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+
+    def test_learn_symbol_writes_in_background(self):
+        """測試學習符號立即生效，PNG 與打包模板庫在背景批次寫入"""
+        recognizer = SymbolRecognizer(template_dir=self.template_dir)
+        recognizer.enable_bank_writing()
+        recognizer.template_writer.batch_delay = 60.0  # 只有 flush 才會寫入
+        recognizer.learn_symbol(self.images[0], 'symbol_0')
+        recognizer.load_templates()
+        recognizer.learn_symbol(self.images[1], 'symbol_1')
+        recognizer.learn_symbol(self.images[2], 'symbol_1')  # 同一符號只寫入最新的一份
+
+        self.assertEqual(recognizer.recognize_symbol(self.images[2]), 'symbol_1')
+        self.assertFalse(os.path.exists(os.path.join(self.template_dir, 'symbol_1.png')))
+
+        self.assertTrue(recognizer.flush(timeout=10.0))
+        saved = cv2.imread(os.path.join(self.template_dir, 'symbol_1.png'))
+        np.testing.assert_array_equal(saved, self.images[2])
+        self.assertEqual(recognizer.template_writer.written, 2)
+        self.assertFalse(is_bank_stale(self.template_dir))
+        self.assertEqual([file for file in os.listdir(self.template_dir) if file.endswith('.tmp')], [])
+
+    def test_writer_batches_and_restarts(self):
+        """測試寫入器完成後結束執行緒，之後的寫入仍會處理"""
+        writer = TemplateWriter(self.template_dir, batch_delay=0.0)
+        writer.save('symbol_0', self.images[0])
+        self.assertTrue(writer.flush(timeout=10.0))
+        writer.save('symbol_1', self.images[1])
+        self.assertTrue(writer.flush(timeout=10.0))
+
+        self.assertEqual(writer.pending_count(), 0)
+        self.assertEqual(sorted(os.listdir(self.template_dir)), ['symbol_0.png', 'symbol_1.png'])
+
+    def test_write_image_atomic_failure(self):
+        """測試寫入失敗時返回 False 且不留下暫存檔"""
+        from pathlib import Path
+        path = Path(self.template_dir) / 'missing' / 'symbol.png'
+        self.assertFalse(write_image_atomic(path, self.images[0]))
+        self.assertFalse(path.exists())
+
+
+class TestTemplateWatcher(unittest.TestCase):
+    """模板目錄熱更新測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.template_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(11)
+        self.images = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(4)]
+        for i in range(3):
+            path = os.path.join(self.template_dir, f"symbol_{i}.png")
+            cv2.imwrite(path, self.images[i])
+            os.utime(path, (0, 0))  # 確保之後的修改時間一定不同
+        self.recognizer = SymbolRecognizer(template_dir=self.template_dir)
+        self.recognizer.enable_bank_writing()
+        self.recognizer.start_template_watcher(interval=3600)  # 測試中手動輪詢
+
+    def tearDown(self):
+        """測試後清理"""
+        self.recognizer.stop_template_watcher()
+        self.recognizer.flush()
+        shutil.rmtree(self.template_dir, ignore_errors=True)
+
+    def _write(self, name: str, image: np.ndarray):
+        cv2.imwrite(os.path.join(self.template_dir, f"{name}.png"), image)
+
+    def test_hot_reload_applied_between_frames(self):
+        """測試新增、修改與刪除的模板在下一次識別前套用"""
+        old_bank = self.recognizer._get_bank()
+        self._write('symbol_3', self.images[3])
+        self._write('symbol_0', self.images[1][:, ::-1])
+        os.remove(os.path.join(self.template_dir, "symbol_2.png"))
+
+        self.assertTrue(self.recognizer.template_watcher.poll())
+        # 套用前識別端仍使用原本的完整模板庫
+        self.assertIs(self.recognizer._bank, old_bank)
+
+        self.assertEqual(self.recognizer.recognize_symbol(self.images[3]), 'symbol_3')
+        bank = self.recognizer._bank
+        self.assertEqual(sorted(bank.names), ['symbol_0', 'symbol_1', 'symbol_3'])
+        np.testing.assert_array_equal(bank.images[bank.index['symbol_1']],
+                                      old_bank.images[old_bank.index['symbol_1']])
+        self.assertEqual(self.recognizer.recognize_symbol(self.images[1][:, ::-1].copy()), 'symbol_0')
+        self.assertNotEqual(self.recognizer.recognize_symbol(self.images[2]), 'symbol_2')
+
+        self.assertTrue(self.recognizer.flush(timeout=10.0))
+        self.assertFalse(is_bank_stale(self.template_dir))
+
+    def test_own_writes_not_reloaded(self):
+        """測試學習後由背景寫入的 PNG 不會再次觸發更新"""
+        self.recognizer.learn_symbol(self.images[3], 'symbol_3')
+        self.assertTrue(self.recognizer.flush(timeout=10.0))
+        self.assertTrue(self.recognizer.template_watcher.poll())
+        self.assertEqual(self.recognizer._staged_templates, [])
+        self.assertFalse(self.recognizer.template_watcher.poll())
+
+    def test_watcher_does_not_build_bank(self):
+        """測試模板庫尚未建立時監看執行緒不建立模板庫，改由下一次識別計算"""
+        self.recognizer._invalidate_templates()
+        self._write('symbol_3', self.images[3])
+        self.assertTrue(self.recognizer.template_watcher.poll())
+        self.assertIsNone(self.recognizer._bank)
+
+        self.assertEqual(self.recognizer.recognize_symbol(self.images[3]), 'symbol_3')
+        self.assertEqual(sorted(self.recognizer._bank.names), ['symbol_0', 'symbol_1', 'symbol_2', 'symbol_3'])
+
+    def test_unreadable_file_retried(self):
+        """測試無法解碼的檔案會在下一次輪詢重試"""
+        path = os.path.join(self.template_dir, "symbol_3.png")
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+        self.assertFalse(self.recognizer.template_watcher.poll())
+
+        self._write('symbol_3', self.images[3])
+        self.assertTrue(self.recognizer.template_watcher.poll())
+        self.assertEqual(self.recognizer.recognize_symbol(self.images[3]), 'symbol_3')
+
+
+class TestSymbolDescriptor(unittest.TestCase):
+    """符號描述子測試類"""
+
+    def test_descriptor_shape(self):
+        """測試描述子為固定長度的單位向量"""
+        image = np.random.default_rng(4).integers(0, 255, (80, 60, 3), dtype=np.uint8)
+        descriptor = compute_descriptor(image)
+
+        self.assertEqual(descriptor.shape, (DESCRIPTOR_LENGTH,))
+        self.assertAlmostEqual(float(np.linalg.norm(descriptor)), 1.0, places=5)
+
+    def test_index_reject_threshold(self):
+        """測試低於拒絕閾值時不返回符號"""
+        red = np.zeros((64, 64, 3), dtype=np.uint8)
+        red[:, :, 2] = 200
+        blue = np.zeros((64, 64, 3), dtype=np.uint8)
+        blue[:, :, 0] = 200
+        index = DescriptorIndex.from_templates({'red': red}, reject_threshold=0.9)
+
+        results = index.query(np.stack([compute_descriptor(red), compute_descriptor(blue)]))
+
+        self.assertEqual(results[0].symbol, 'red')
+        self.assertIsNone(results[1].symbol)
+
+
+class TestOnlineSymbolClusterer(unittest.TestCase):
+    """線上符號分群測試類"""
+
+    def setUp(self):
+        """載入內建模板作為未標記的符號"""
+        self.images = [cv2.imread(os.path.join("templates", f"symbol_{i}.png")) for i in range(1, 13)]
+        if any(image is None for image in self.images):
+            self.skipTest("未找到內建模板")
+
+    def test_stable_cluster_ids(self):
+        """測試同一符號在輕微變化下得到相同識別碼"""
+        clusterer = OnlineSymbolClusterer(max_clusters=12)
+        first = [clusterer.assign_image(image)[0] for image in self.images]
+        # 重新觀察亮度稍有變化的同一批卡牌
+        second = [clusterer.assign_image(cv2.convertScaleAbs(image, alpha=1.0, beta=5))[0]
+                  for image in self.images]
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[0], 'cluster_1')
+        self.assertEqual(len(set(first)), len(self.images))
+
+    def test_cluster_cap(self):
+        """測試群數不超過上限"""
+        clusterer = OnlineSymbolClusterer(max_clusters=3)
+        for image in self.images:
+            clusterer.assign_image(image)
+
+        self.assertEqual(clusterer.num_clusters, 3)
+        self.assertEqual(sum(clusterer.get_stats()['cluster_sizes']), len(self.images))
+
+    def test_recognizer_without_templates(self):
+        """測試沒有模板時識別器使用分群識別碼"""
+        template_dir = tempfile.mkdtemp()
+        try:
+            recognizer = SymbolRecognizer(template_dir=template_dir)
+            symbols = [recognizer.recognize_symbol(image) for image in self.images[:4]]
+            recognizer.recognition_cache.clear()
+            self.assertEqual(symbols, [recognizer.recognize_symbol(image) for image in self.images[:4]])
+            self.assertTrue(all(symbol.startswith('cluster_') for symbol in symbols))
+        finally:
+            shutil.rmtree(template_dir, ignore_errors=True)
+
+
+class TestRecognitionCache(unittest.TestCase):
+    """識別快取測試類"""
+
+    def test_lru_eviction(self):
+        """測試超過容量時淘汰最久未使用的項目"""
+        cache = RecognitionCache(max_size=2, hamming_tolerance=0)
+        cache.put(0b0001, RecognitionResult('a'))
+        cache.put(0b0010, RecognitionResult('b'))
+        cache.get(0b0001)
+        cache.put(0b0100, RecognitionResult('c'))
+
+        self.assertIsNotNone(cache.get(0b0001))
+        self.assertIsNone(cache.get(0b0010))
+        self.assertEqual(len(cache), 2)
+
+    def test_hamming_tolerance(self):
+        """測試漢明距離容差內視為命中"""
+        cache = RecognitionCache(max_size=4, hamming_tolerance=2)
+        cache.put(0b1111, RecognitionResult('a'))
+
+        self.assertEqual(cache.get(0b1100).symbol, 'a')
+        self.assertIsNone(cache.get(0b0000))
+        self.assertEqual(cache.get_stats()['hits'], 1)
+        self.assertEqual(cache.get_stats()['misses'], 1)
+
+    def test_scoped_entries(self):
+        """測試在候選範圍下算出的結果只適用於其子集範圍"""
+        cache = RecognitionCache(max_size=4, hamming_tolerance=0)
+        cache.put(1, RecognitionResult('a'), frozenset({'a', 'b', 'c'}))
+
+        self.assertIsNotNone(cache.get(1, frozenset({'a', 'b'})))
+        self.assertIsNone(cache.get(1, frozenset({'b', 'c'})))
+        self.assertIsNone(cache.get(1, frozenset({'a', 'd'})))
+        self.assertIsNone(cache.get(1))
+
+    def test_perceptual_hash_stable(self):
+        """測試相同圖像產生相同哈希"""
+        image = np.random.default_rng(3).integers(0, 255, (64, 64, 3), dtype=np.uint8)
+        self.assertEqual(perceptual_hash(image), perceptual_hash(image.copy()))
+        self.assertLess(perceptual_hash(image), 1 << 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
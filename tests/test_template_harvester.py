@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+模板採集測試
+測試由全部翻開的遊戲板截圖自動建立符號模板
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+import cv2
+from recognition.template_harvester import harvest_image, harvest_directory, pair_by_similarity
+from recognition.template_bank import TemplateBank, is_bank_stale
+from recognition.symbol_recognizer import SymbolRecognizer
+
+
+def make_symbols(count: int, seed: int) -> list:
+    """產生平滑的隨機符號圖案"""
+    rng = np.random.default_rng(seed)
+    return [cv2.resize(rng.integers(0, 255, (6, 6, 3), dtype=np.uint8), (64, 64),
+                       interpolation=cv2.INTER_CUBIC) for _ in range(count)]
+
+
+def make_board(symbols: list, seed: int) -> np.ndarray:
+    """將 12 個符號各放兩次，排成 6x4 的全部翻開遊戲板"""
+    rng = np.random.default_rng(seed)
+    layout = rng.permutation(np.repeat(np.arange(len(symbols)), 2))
+    board = np.full((480, 720, 3), 30, dtype=np.uint8)
+    for cell, symbol in enumerate(layout):
+        x, y = 40 + (cell % 6) * 105, 40 + (cell // 6) * 105
+        board[y:y + 80, x:x + 80] = 230
+        board[y + 8:y + 72, x + 8:x + 72] = symbols[symbol]
+    noise = rng.normal(0, 3, board.shape)
+    return np.clip(board + noise, 0, 255).astype(np.uint8)
+
+
+class TestTemplateHarvester(unittest.TestCase):
+    """模板採集測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.work_dir = tempfile.mkdtemp()
+        self.image_dir = os.path.join(self.work_dir, 'boards')
+        self.template_dir = os.path.join(self.work_dir, 'templates')
+        os.makedirs(self.image_dir)
+        self.symbols = make_symbols(12, 0)
+
+    def tearDown(self):
+        """測試後清理"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_pair_by_similarity(self):
+        """測試相同符號的卡牌兩兩配對"""
+        crops = [symbol for symbol in self.symbols[:4] for _ in range(2)]
+        pairs = pair_by_similarity(crops)
+        self.assertEqual(sorted((i, j) for i, j, _ in pairs), [(0, 1), (2, 3), (4, 5), (6, 7)])
+
+    def test_harvest_image(self):
+        """測試由一張遊戲板取出 12 個符號"""
+        path = os.path.join(self.image_dir, 'board.png')
+        cv2.imwrite(path, make_board(self.symbols, 1))
+        result = harvest_image(path)
+
+        self.assertTrue(result['success'], result['message'])
+        self.assertEqual(len(result['templates']), 12)
+        self.assertGreater(min(result['similarities']), 0.9)
+
+    def test_harvest_directory_writes_bank(self):
+        """測試平行處理多張截圖，重複的符號只新增一次並寫入模板庫"""
+        cv2.imwrite(os.path.join(self.image_dir, 'deck_a_1.png'), make_board(self.symbols, 1))
+        cv2.imwrite(os.path.join(self.image_dir, 'deck_a_2.png'), make_board(self.symbols, 2))
+        cv2.imwrite(os.path.join(self.image_dir, 'deck_b.png'), make_board(make_symbols(12, 5), 3))
+        cv2.imwrite(os.path.join(self.image_dir, 'blank.png'), np.full((480, 720, 3), 30, dtype=np.uint8))
+
+        summary = harvest_directory(self.image_dir, self.template_dir, workers=2)
+
+        self.assertEqual(summary['harvested'], 3)
+        self.assertEqual(len(summary['failed']), 1)
+        self.assertEqual(len(summary['added']), 24)
+        self.assertEqual(summary['duplicates'], 12)
+        self.assertFalse(is_bank_stale(self.template_dir))
+        bank = TemplateBank.load(os.path.join(self.template_dir, 'template_bank.npy'))
+        self.assertEqual(sorted(bank.names), sorted(f"symbol_{i}" for i in range(1, 25)))
+
+        # 新模板可直接用於識別，且再次採集不會重複新增
+        recognizer = SymbolRecognizer(template_dir=self.template_dir)
+        board = make_board(self.symbols, 4)
+        crops = [board[40 + row * 105:120 + row * 105, 40 + col * 105:120 + col * 105]
+                 for row in range(4) for col in range(6)]
+        symbols = [result.symbol for result in recognizer.recognize_batch(crops)]
+        self.assertNotIn(None, symbols)
+        self.assertEqual(len(set(symbols)), 12)
+        self.assertEqual(harvest_directory(self.image_dir, self.template_dir, workers=1)['added'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+翻牌回合狀態機測試
+測試回合階段轉換與 MemoryLogic 的階段通知
+"""
+
+import unittest
+from logic.memory_logic import MemoryLogic
+from logic.game_log import GameEventLog, replay_events
+from logic.turn_state import (
+    TurnStateMachine, PHASE_IDLE, PHASE_FIRST_UP, PHASE_SECOND_UP,
+    PHASE_RESOLVED_MATCH, PHASE_RESOLVED_MISS
+)
+
+
+def phases(transitions):
+    """取出轉換後的階段"""
+    return [transition['phase'] for transition in transitions]
+
+
+def card(symbol=None, grid_pos=(0, 0)):
+    """建立一張卡牌的檢測結果，symbol 為 None 表示蓋著"""
+    return {'position': (0, 0, 40, 40), 'flipped': symbol is not None, 'symbol': symbol,
+            'grid_pos': grid_pos, 'confidence': 0.9}
+
+
+class TestTurnStateMachine(unittest.TestCase):
+    """翻牌回合狀態機測試類"""
+
+    def setUp(self):
+        """測試前準備"""
+        self.machine = TurnStateMachine()
+
+    def test_miss_cycle(self):
+        """測試配對失敗：兩張都蓋回後回到閒置"""
+        self.assertEqual(phases(self.machine.reveal('a', 'cake')), [PHASE_FIRST_UP])
+        self.assertEqual(phases(self.machine.reveal('b', 'fish')), [PHASE_SECOND_UP, PHASE_RESOLVED_MISS])
+        self.assertEqual(self.machine.hide('a'), [])
+        transitions = self.machine.hide('b')
+        self.assertEqual(phases(transitions), [PHASE_IDLE])
+        self.assertEqual(transitions[0]['previous'], PHASE_RESOLVED_MISS)
+        self.assertEqual(transitions[0]['cards'], ['a', 'b'])
+        self.assertEqual(self.machine.turn, 1)
+
+    def test_match_cycle(self):
+        """測試配對成功後立即回到閒置"""
+        self.machine.reveal('a', 'cake')
+        transitions = self.machine.reveal('b', 'cake', paired=True)
+        self.assertEqual(phases(transitions), [PHASE_SECOND_UP, PHASE_RESOLVED_MATCH, PHASE_IDLE])
+        self.assertEqual(self.machine.phase, PHASE_IDLE)
+        self.assertEqual(self.machine.turn, 1)
+
+    def test_second_card_recognized_later(self):
+        """測試第二張的符號還沒識別出來時停在第二張翻開"""
+        self.machine.reveal('a', 'cake')
+        self.assertEqual(phases(self.machine.reveal('b', None)), [PHASE_SECOND_UP])
+        self.assertEqual(phases(self.machine.reveal('b', 'fish')), [PHASE_RESOLVED_MISS])
+
+    def test_first_card_recognized_later(self):
+        """測試第一張識別出符號時以相同階段重新進入"""
+        self.machine.reveal('a', None)
+        transitions = self.machine.reveal('a', 'cake')
+        self.assertEqual(phases(transitions), [PHASE_FIRST_UP])
+        self.assertEqual(transitions[0]['previous'], PHASE_FIRST_UP)
+        self.assertEqual(self.machine.reveal('a', 'cake'), [])
+
+    def test_next_turn_before_hide(self):
+        """測試上一回合的卡牌還沒蓋回就翻開新卡牌"""
+        self.machine.reveal('a', 'cake')
+        self.machine.reveal('b', 'fish')
+        self.assertEqual(phases(self.machine.reveal('c', 'bell')), [PHASE_IDLE, PHASE_FIRST_UP])
+        self.assertEqual(self.machine.cards, ['c'])
+        self.assertEqual(self.machine.hide('a'), [])  # 上一回合的卡牌蓋回不影響本回合
+
+    def test_triple_turn(self):
+        """測試三張一組：符號相同時可繼續翻開，出現不同符號即配對失敗"""
+        machine = TurnStateMachine(group_size=3)
+        machine.reveal('a', 'cake')
+        self.assertEqual(phases(machine.reveal('b', 'cake')), [PHASE_SECOND_UP])
+        self.assertEqual(phases(machine.reveal('c', 'fish')), [PHASE_SECOND_UP, PHASE_RESOLVED_MISS])
+        self.assertEqual(machine.cards, ['a', 'b', 'c'])
+
+        machine = TurnStateMachine(group_size=2, group_sizes={'star': 3})
+        machine.reveal('a', 'star')
+        machine.reveal('b', 'star')
+        transitions = machine.reveal('c', 'star', paired=True)
+        self.assertEqual(phases(transitions), [PHASE_SECOND_UP, PHASE_RESOLVED_MATCH, PHASE_IDLE])
+        self.assertEqual(transitions[-1]['cards'], ['a', 'b', 'c'])
+
+    def test_reset_keeps_group_size(self):
+        """測試重置後保留三張一組的設定，兩張相同符號不會被當成配對失敗"""
+        logic = MemoryLogic(group_size=3, total_groups=8, group_sizes={'star': 2})
+        logic.reset_game()
+        machine = logic.turn_state
+        self.assertEqual((machine.group_size, machine.group_sizes), (3, {'star': 2}))
+        machine.reveal('a', 'cake')
+        self.assertEqual(phases(machine.reveal('b', 'cake')), [PHASE_SECOND_UP])
+        self.assertEqual(phases(machine.reveal('c', 'cake', paired=True)),
+                         [PHASE_SECOND_UP, PHASE_RESOLVED_MATCH, PHASE_IDLE])
+
+    def test_single_card_flipped_back(self):
+        """測試只翻一張就蓋回也算一個回合"""
+        self.machine.reveal('a', 'cake')
+        self.assertEqual(phases(self.machine.hide('a')), [PHASE_IDLE])
+        self.assertEqual(self.machine.turn, 1)
+
+
+class TestMemoryLogicPhases(unittest.TestCase):
+    """MemoryLogic 回合階段通知測試類"""
+
+    def setUp(self):
+        """建立 2x2 遊戲板並訂閱階段通知"""
+        self.logic = MemoryLogic()
+        self.logic.event_log = GameEventLog()
+        self.notified = []
+        self.logic.subscribe(self.notified.append)
+        self.cells = {f'card_{i}': (i % 2, i // 2) for i in range(4)}
+        self.now = 0.0
+
+    def show(self, **symbols):
+        """送出一幀，symbols 為翻開的卡牌與符號"""
+        self.now += 1.0
+        frame = {'cards': {card_id: card(symbols.get(card_id), grid_pos)
+                           for card_id, grid_pos in self.cells.items()}}
+        return self.logic.update_game_state(frame, now=self.now)
+
+    def test_phase_notifications(self):
+        """測試只在階段改變時通知，並附上該階段的建議"""
+        self.show()
+        self.assertEqual(self.notified, [])
+
+        self.show(card_0='cake')
+        self.assertEqual(phases(self.notified), [PHASE_FIRST_UP])
+        suggestion = self.notified[0]['suggestions'][0]
+        self.assertEqual(suggestion['type'], 'explore')
+
+        # 沒有變化的幀不通知、不重新計算建議
+        self.show(card_0='cake')
+        self.assertEqual(len(self.notified), 1)
+        self.assertIs(self.logic.current_suggestions(), self.notified[0]['suggestions'])
+
+        self.show(card_0='cake', card_1='fish')
+        self.show()
+        self.assertEqual(phases(self.notified), [PHASE_FIRST_UP, PHASE_SECOND_UP, PHASE_RESOLVED_MISS, PHASE_IDLE])
+        self.assertEqual(self.logic.turn_count, 1)
+
+        # 第二回合翻到記得的符號，建議直接配對
+        self.show(card_2='fish')
+        suggestion = self.notified[-1]['suggestions'][0]
+        self.assertEqual((suggestion['type'], suggestion['card_id']), ('direct_match', 'card_1'))
+
+        result = self.show(card_2='fish', card_1='fish')
+        self.assertEqual(phases(self.notified[-3:]), [PHASE_SECOND_UP, PHASE_RESOLVED_MATCH, PHASE_IDLE])
+        self.assertEqual(result['phase'], PHASE_IDLE)
+        self.assertEqual(self.logic.turn_count, 2)
+
+        # 配對的卡牌保持翻開，之後的幀不會重複配對
+        self.show(card_2='fish', card_1='fish')
+        self.assertEqual(len(self.logic.matched_pairs), 1)
+
+    def test_turn_end_events(self):
+        """測試回合結束事件與階段一致，重播可還原回合階段"""
+        self.show(card_0='cake')
+        self.show(card_0='cake', card_1='fish')
+        self.show()
+        self.show(card_2='fish')
+
+        turn_ends = [event for event in self.logic.event_log if event['type'] == 'turn_end']
+        self.assertEqual([(event['turn'], event['matched']) for event in turn_ends], [(1, False)])
+
+        replayed = replay_events(self.logic.event_log.events)
+        self.assertEqual(replayed.turn_state.phase, PHASE_FIRST_UP)
+        self.assertEqual(replayed.turn_state.cards, ['card_2'])
+        self.assertEqual(replayed.turn_count, 1)
+
+    def test_unsubscribe(self):
+        """測試取消訂閱與訂閱者錯誤不影響遊戲邏輯"""
+        def broken(transition):
+            raise RuntimeError("broken")
+
+        self.logic.unsubscribe(self.notified.append)
+        self.logic.subscribe(broken)
+        self.show(card_0='cake')
+        self.assertEqual(self.notified, [])
+        self.assertEqual(self.logic.turn_state.phase, PHASE_FIRST_UP)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,8 +20,15 @@ class GameGUI:
         self.is_running = False
         self.current_frame = None
         self.setup_complete = False
+        self.stats_export_path = None  # 遊戲完成時匯出統計時間序列的 JSON 檔案
+        self._stats_job = None  # 已排程的統計更新
+        self.snapshot_writer = None  # 設定後在背景寫入遊戲狀態快照（SnapshotWriter）
+        self._snapshot_dirty = False  # 遊戲狀態自上次快照後已改變
+        self._last_snapshot = 0.0  # 上次建立快照的時間
+        self._resume_pending = False  # 已由快照恢復記憶，等待重新校準後繼續
         
         self.setup_ui()
+        self.memory_logic.subscribe(self.on_phase_change)
         self.start_video_thread()
         
     def setup_ui(self):
@@ -171,37 +178,104 @@ class GameGUI:
     def start_game(self):
         """開始遊戲"""
         self.game_started = True
-        self.memory_logic.reset_game()
+        if self._resume_pending:
+            # 恢復快照後重新校準，繼續恢復的遊戲而不是重新開始
+            self._resume_pending = False
+            self.update_suggestions(self.memory_logic.current_suggestions())
+        else:
+            self.memory_logic.reset_game()
+            self.memory_logic.enable_belief(self.card_detector.symbol_recognizer.get_symbol_names())
         self.status_label.configure(text="遊戲進行中...")
         self.start_btn.configure(text="遊戲中", state="disabled")
         
-        # 開始統計更新線程
-        stats_thread = threading.Thread(target=self.update_stats_loop, daemon=True)
-        stats_thread.start()
+        # 每秒讀取一次累計統計（在主執行緒中，不需另外的輪詢線程）
+        if self._stats_job is not None:
+            self.root.after_cancel(self._stats_job)
+        self._stats_job = self.root.after(0, self.refresh_stats)
         
     def process_game_frame(self, frame):
         """處理遊戲幀"""
         try:
-            # 檢測卡牌
-            detected_cards = self.card_detector.detect_cards(frame)
+            # 檢測卡牌，只比對仍可能出現的符號
+            recognizer = self.card_detector.symbol_recognizer
+            detected_cards = self.card_detector.detect_cards(
+                frame,
+                possible_symbols=self.memory_logic.get_possible_symbols(recognizer.get_symbol_names()),
+                remembered_symbols=self.memory_logic.get_remembered_symbols(),
+                certain_symbols=self.memory_logic.get_certain_symbols()
+            )
             
             if 'error' not in detected_cards:
-                # 更新遊戲邏輯
-                game_state = self.memory_logic.update_game_state(detected_cards)
+                # 只將改變的卡牌套用到遊戲邏輯，沒有變化的幀不需更新
+                # 建議在回合階段改變時由 on_phase_change 推送
+                changes = self.memory_logic.apply_card_deltas(self.memory_logic.frame_deltas(detected_cards))
                 
-                # 獲取建議
-                suggestions = self.memory_logic.get_suggestions(detected_cards)
-                
-                # 更新建議顯示
-                self.root.after(0, lambda: self.update_suggestions(suggestions))
+                # 狀態有變化時排入快照寫入（寫入在背景執行緒，不阻塞畫面處理）
+                if changes['changed']:
+                    self._snapshot_dirty = True
+                self.save_snapshot(force=changes['turn_ended'])
                 
                 # 檢查遊戲是否完成
-                if game_state.get('game_complete', False):
+                if changes['changed'] and changes['game_complete']:
                     self.root.after(0, self.game_complete)
                     
         except Exception as e:
             print(f"遊戲處理錯誤: {e}")
             
+    def save_snapshot(self, force=False):
+        """狀態改變時排入快照：最多每 snapshot_writer.interval 秒建立一次，回合結束時立即建立
+        
+        沒有變化的幀也會檢查，節流期間的最後一次變化會在間隔過後寫入；遊戲完成後不再寫入。
+        """
+        if self.snapshot_writer is None or not self._snapshot_dirty:
+            return
+        if self.memory_logic.game_complete:
+            self._snapshot_dirty = False
+            return
+        now = time.monotonic()
+        if force or now - self._last_snapshot >= self.snapshot_writer.interval:
+            self.snapshot_writer.save(self.build_snapshot())
+            self._snapshot_dirty = False
+            self._last_snapshot = now
+            
+    def build_snapshot(self):
+        """遊戲狀態快照，附上校準結果"""
+        snapshot = self.memory_logic.snapshot()
+        snapshot['calibration'] = self.card_detector.calibration_reference()
+        return snapshot
+        
+    def offer_resume(self, snapshot):
+        """詢問是否從上次的快照繼續遊戲，返回是否已恢復"""
+        matched = len(snapshot.get('matched', []))
+        remembered = len(snapshot.get('memory', []))
+        if not messagebox.askyesno("恢復遊戲", f"發現上次未完成的遊戲（已配對 {matched} 組，"
+                                               f"記住 {remembered} 張卡牌），是否繼續？"):
+            return False
+        self.resume_from_snapshot(snapshot)
+        return True
+        
+    def resume_from_snapshot(self, snapshot):
+        """由快照恢復遊戲狀態與校準，校準結果無法使用時需重新校準後再開始"""
+        self.memory_logic.restore_snapshot(snapshot)
+        if self.card_detector.restore_calibration(snapshot.get('calibration')):
+            self.setup_complete = True
+            self.calibration_complete()
+            self.game_started = True
+            self.status_label.configure(text="已恢復上次的遊戲")
+            self.start_btn.configure(text="遊戲中", state="disabled")
+            self.update_suggestions(self.memory_logic.current_suggestions())
+            if self._stats_job is not None:
+                self.root.after_cancel(self._stats_job)
+            self._stats_job = self.root.after(0, self.refresh_stats)
+        else:
+            self._resume_pending = True
+            self.status_label.configure(text="已恢復遊戲記憶，請重新校準後按開始遊戲繼續")
+            
+    def on_phase_change(self, transition):
+        """回合階段改變時更新建議顯示（在處理畫面的執行緒中呼叫）"""
+        suggestions = transition['suggestions']
+        self.root.after(0, lambda: self.update_suggestions(suggestions))
+        
     def update_suggestions(self, suggestions):
         """更新建議顯示"""
         self.suggestions_text.delete(1.0, tk.END)
@@ -213,38 +287,36 @@ class GameGUI:
             
             for i, suggestion in enumerate(suggestions, 1):
                 text = f"{i}. 位置 {suggestion['position']}\n"
-                text += f"   符號: {suggestion['symbol']}\n"
+                text += f"   符號: {suggestion['symbol'] or '未知'}\n"
                 text += f"   原因: {suggestion['reason']}\n"
                 text += f"   信心度: {suggestion['confidence']:.0%}\n\n"
                 
                 self.suggestions_text.insert(tk.END, text)
                 
-    def update_stats_loop(self):
-        """更新統計資訊循環"""
-        while hasattr(self, 'game_started') and self.game_started:
-            try:
-                stats = self.memory_logic.get_statistics()
-                
-                # 更新進度
-                progress_text = f"進度: {stats['matched_pairs']}/12"
-                self.root.after(0, lambda: self.progress_var.set(progress_text))
-                
-                # 更新時間
-                minutes = int(stats['elapsed_time'] // 60)
-                seconds = int(stats['elapsed_time'] % 60)
-                time_text = f"時間: {minutes:02d}:{seconds:02d}"
-                self.root.after(0, lambda: self.time_var.set(time_text))
-                
-                # 更新效率
-                efficiency = stats['efficiency'] * 100
-                efficiency_text = f"效率: {efficiency:.1f}%"
-                self.root.after(0, lambda: self.efficiency_var.set(efficiency_text))
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"統計更新錯誤: {e}")
-                time.sleep(1)
+    def refresh_stats(self):
+        """更新統計顯示，遊戲進行中每秒重新排程一次（只讀取累計值）"""
+        self._stats_job = None
+        if not self.game_started:
+            return
+        try:
+            stats = self.memory_logic.get_statistics()
+            
+            # 更新進度
+            self.progress_var.set(f"進度: {stats['matched_pairs']}/{stats['total_pairs']}")
+            
+            # 更新時間
+            minutes = int(stats['elapsed_time'] // 60)
+            seconds = int(stats['elapsed_time'] % 60)
+            self.time_var.set(f"時間: {minutes:02d}:{seconds:02d}")
+            
+            # 更新效率與回合耗時
+            efficiency = stats['efficiency'] * 100
+            self.efficiency_var.set(f"效率: {efficiency:.1f}%  回合: {stats['turns']} "
+                                    f"(平均 {stats['mean_turn_time']:.1f}s, p95 {stats['p95_turn_time']:.1f}s)")
+            
+        except Exception as e:
+            print(f"統計更新錯誤: {e}")
+        self._stats_job = self.root.after(1000, self.refresh_stats)
                 
     def game_complete(self):
         """遊戲完成"""
@@ -257,7 +329,21 @@ class GameGUI:
         message = f"恭喜完成遊戲！\n\n"
         message += f"用時: {minutes:02d}:{seconds:02d}\n"
         message += f"效率: {stats['efficiency']*100:.1f}%\n"
-        message += f"記憶卡牌數: {stats['cards_remembered']}"
+        message += f"記憶卡牌數: {stats['cards_remembered']}\n"
+        message += f"回合數: {stats['turns']}（平均 {stats['mean_turn_time']:.1f} 秒）\n"
+        message += f"每分鐘配對: {stats['matches_per_minute']:.1f}"
+        
+        # 遊戲已完成，不需要再恢復
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.discard(timeout=1.0)
+            
+        # 匯出整局的統計時間序列
+        if self.stats_export_path:
+            try:
+                self.memory_logic.export_statistics(self.stats_export_path)
+                print(f"✓ 匯出遊戲統計: {self.stats_export_path}")
+            except OSError as e:
+                print(f"✗ 匯出遊戲統計失敗: {e}")
         
         messagebox.showinfo("遊戲完成", message)
         
@@ -267,7 +353,12 @@ class GameGUI:
     def reset_game(self):
         """重置遊戲"""
         self.game_started = False
+        self._resume_pending = False
+        self._snapshot_dirty = False
         self.memory_logic.reset_game()
+        self.memory_logic.enable_belief(self.card_detector.symbol_recognizer.get_symbol_names())
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.discard(timeout=1.0)
         self.status_label.configure(text="遊戲已重置")
         self.start_btn.configure(text="開始遊戲", state="normal" if self.setup_complete else "disabled")
         